@@ -0,0 +1,481 @@
+"""Asyncio serving mode for the library API.
+
+    uvicorn async_app:app --host 0.0.0.0 --port 5000
+
+The routes that dashboards poll (catalog pages, book detail and multi-get,
+search, admin stats and health) and the notification event stream run
+natively on the event loop against an aiomysql pool, so a client waiting on
+MySQL costs a coroutine rather than a thread. Every other /api route is handed to the Flask app in flask_app.py on a bounded
+thread pool, so both serving modes expose exactly the same API. Both halves
+live in one process and share the catalog and token caches, so invalidations
+made by the Flask write routes are seen by the async reads immediately.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import aiomysql
+import jwt
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Match, Route
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
+
+import flask_app as sync
+from dashboard_stats import DASHBOARD_STATS_QUERY, RECONCILE_STATS_SQL, RECOUNT_OVERDUE_SQL
+from notification_hub import MISSED_NOTIFICATIONS_QUERY, RESYNC, sse_message
+
+# aiomysql pool bounds; requests beyond maxsize wait on the event loop
+ASYNC_DB_POOL_MIN = int(os.environ.get('ASYNC_DB_POOL_MIN', 1))
+ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 20))
+
+# Threads running the Flask routes that have no native async version
+ASYNC_SYNC_WORKERS = int(os.environ.get('ASYNC_SYNC_WORKERS', 16))
+
+
+class DatabaseUnavailable(Exception):
+    """Raised when no database connection could be checked out in time"""
+
+
+class AsyncPool:
+    """aiomysql pool with the checkout timeout and counters of db_pool.ConnectionPool"""
+
+    def __init__(self, config, minsize=1, maxsize=20, timeout=5.0, recycle=3600):
+        self.config = dict(config)
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.recycle = recycle
+        self._pool = None
+
+        self._checkouts = 0
+        self._waiting = 0
+        self._peak_waiting = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    async def open(self):
+        self._pool = await aiomysql.create_pool(
+            host=self.config['host'],
+            port=self.config.get('port', 3306),
+            user=self.config['user'],
+            password=self.config['password'],
+            db=self.config['database'],
+            minsize=self.minsize,
+            maxsize=self.maxsize,
+            pool_recycle=self.recycle,
+            # Each read sees fresh data; writers call begin() explicitly
+            autocommit=True
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    @asynccontextmanager
+    async def connection(self):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        if self._pool is None:
+            raise DatabaseUnavailable('Database pool is not open')
+        started = time.monotonic()
+        self._waiting += 1
+        self._peak_waiting = max(self._peak_waiting, self._waiting)
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise DatabaseUnavailable(f"No database connection available within {self.timeout}s")
+        except aiomysql.Error as e:
+            raise DatabaseUnavailable(str(e))
+        finally:
+            self._waiting -= 1
+
+        wait = time.monotonic() - started
+        self._checkouts += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        try:
+            yield conn
+        finally:
+            # aiomysql closes connections released mid-transaction
+            self._pool.release(conn)
+
+    async def fetch(self, sql, params=(), one=False):
+        """Run a single read query and return dict rows (or one row)"""
+        async with self.connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                started = time.perf_counter()
+                await cursor.execute(sql, params)
+                result = await (cursor.fetchone() if one else cursor.fetchall())
+                seconds = time.perf_counter() - started
+                log = sync.slow_query_log
+                if log.enabled and seconds >= log.threshold:
+                    # record() writes the log file; keep that off the event loop
+                    rows = (result is not None) if one else len(result)
+                    asyncio.get_running_loop().run_in_executor(
+                        None, log.record, sql, params, seconds, int(rows), 'async')
+                return result
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        size = self._pool.size if self._pool else 0
+        idle = self._pool.freesize if self._pool else 0
+        checkouts = self._checkouts
+        return {
+            'size': self.maxsize,
+            'open': size,
+            'in_use': size - idle,
+            'idle': idle,
+            'waiting': self._waiting,
+            'peak_waiting': self._peak_waiting,
+            'checkouts': checkouts,
+            'wait_avg_ms': round(self._wait_total / checkouts * 1000, 3) if checkouts else 0,
+            'wait_max_ms': round(self._wait_max * 1000, 3),
+            'timeouts': self._timeouts,
+        }
+
+
+db = AsyncPool(
+    sync.DB_CONFIG,
+    minsize=ASYNC_DB_POOL_MIN,
+    maxsize=ASYNC_DB_POOL_SIZE,
+    timeout=sync.DB_POOL_TIMEOUT,
+    recycle=sync.DB_POOL_RECYCLE
+)
+
+
+def json_response(payload, status=200):
+    """Serialize exactly like flask.jsonify so both modes return identical bodies"""
+    body = sync.app.json.dumps(payload, separators=(',', ':')) + '\n'
+    return Response(body, status_code=status, media_type='application/json')
+
+
+def client_is_current(request, etag, last_modified=None):
+    """Async counterpart of flask_app.client_is_current"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(etag)
+    if_modified_since = parse_date(request.headers.get('if-modified-since'))
+    if last_modified is not None and if_modified_since:
+        return last_modified <= if_modified_since
+    return False
+
+
+def conditional_response(request, payload, etag, last_modified=None):
+    """Return 304 when the client's copy is current, otherwise the JSON payload"""
+    if client_is_current(request, etag, last_modified):
+        response = Response(status_code=304)
+    else:
+        response = json_response(payload)
+    response.headers['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def request_claims(request):
+    """Claims from the bearer token plus the time spent verifying it, in ms"""
+    token = request.headers.get('authorization')
+    if not token:
+        return None, None
+    if token.startswith('Bearer '):
+        token = token[7:]
+    started = time.perf_counter()
+    try:
+        return sync.decode_token(token), (time.perf_counter() - started) * 1000
+    except jwt.InvalidTokenError:
+        return None, (time.perf_counter() - started) * 1000
+
+
+async def health_check(request):
+    """Liveness probe with statistics for both connection pools and the caches"""
+    return json_response({
+        'status': 'ok',
+        'async_pool': db.stats(),
+        'pool': sync.db_pool.stats(),
+        'catalog_cache': sync.catalog_cache.stats(),
+        'password_hasher': sync.password_hasher.stats(),
+        'token_cache': sync.token_cache.stats(),
+        'notification_hub': sync.notification_hub.stats()
+    })
+
+
+async def get_books(request):
+    """Get one page of books with availability, ordered by title"""
+    try:
+        limit = sync.clamp_limit(request.query_params.get('limit'), sync.BOOKS_PAGE_DEFAULT, sync.BOOKS_PAGE_MAX)
+        after = request.query_params.get('after')
+        featured, category = sync.books_page_filters(request.query_params)
+        try:
+            sql, params = sync.books_page_query(after, limit, featured, category)
+        except ValueError as e:
+            return json_response({'message': str(e)}, 400)
+
+        cache_key = ('page', after or '', limit, featured, category)
+        cached = sync.catalog_cache.get(cache_key)
+        if cached is not None:
+            return conditional_response(request, cached['page'], cached['etag'], cached['last_modified'])
+        generation = sync.catalog_cache.generation
+
+        books = await db.fetch(sql, params)
+
+        entry, tags = sync.books_page_entry(books, limit)
+        sync.catalog_cache.set(cache_key, entry, tags=tags, generation=generation)
+
+        return conditional_response(request, entry['page'], entry['etag'], entry['last_modified'])
+
+    except DatabaseUnavailable:
+        return json_response({'message': 'Database connection failed'}, 500)
+    except Exception as e:
+        return json_response({'message': str(e)}, 500)
+
+
+async def get_book(request):
+    """Get a specific book"""
+    try:
+        book_id = request.path_params['book_id']
+        cache_key = ('book', book_id)
+        cached = sync.catalog_cache.get(cache_key)
+        if cached is not None:
+            return conditional_response(request, {'book': cached['book']}, cached['etag'], cached['last_modified'])
+        generation = sync.catalog_cache.generation
+
+        book = await db.fetch(sync.BOOK_QUERY, (book_id,), one=True)
+        if not book:
+            return json_response({'message': 'Book not found'}, 404)
+
+        entry = sync.book_entry(book)
+        sync.catalog_cache.set(cache_key, entry, tags=[cache_key], generation=generation)
+
+        return conditional_response(request, {'book': book}, entry['etag'], entry['last_modified'])
+
+    except DatabaseUnavailable:
+        return json_response({'message': 'Database connection failed'}, 500)
+    except Exception as e:
+        return json_response({'message': str(e)}, 500)
+
+
+async def get_books_batch(request):
+    """Get many books by id in one request; see flask_app.get_books_batch"""
+    try:
+        if request.method == 'POST':
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            values = body.get('ids') if isinstance(body, dict) else None
+        else:
+            raw = request.query_params.get('ids', '')
+            values = [v for v in raw.split(',') if v.strip()] or None
+        ids, error = sync.parse_id_list(values, sync.BOOKS_BATCH_MAX)
+        if error:
+            return json_response({'message': error}, 400)
+
+        entries, pending = sync.cached_book_entries(ids)
+        if pending:
+            generation = sync.catalog_cache.generation
+            sql, params = sync.books_batch_query(pending)
+            books = await db.fetch(sql, params)
+            sync.cache_book_rows(entries, books, generation)
+
+        payload, etag = sync.books_batch_payload(ids, entries)
+        return conditional_response(request, payload, etag)
+
+    except DatabaseUnavailable:
+        return json_response({'message': 'Database connection failed'}, 500)
+    except Exception as e:
+        return json_response({'message': str(e)}, 500)
+
+
+async def search_books(request):
+    """Search books by title, subtitle, description, author or category"""
+    try:
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return json_response({'message': 'Search query required'}, 400)
+
+        limit = sync.clamp_limit(request.query_params.get('limit'), sync.SEARCH_PAGE_DEFAULT, sync.SEARCH_PAGE_MAX)
+        try:
+            sql, params = sync.search_query(query, limit, request.query_params.get('after'))
+        except ValueError as e:
+            return json_response({'message': str(e)}, 400)
+        books = await db.fetch(sql, params)
+
+        return json_response(sync.search_page(books, limit))
+
+    except DatabaseUnavailable:
+        return json_response({'message': 'Database connection failed'}, 500)
+    except Exception as e:
+        return json_response({'message': str(e)}, 500)
+
+
+async def get_admin_stats(request):
+    """Get admin dashboard statistics from the materialized dashboard_stats row"""
+    if not request.headers.get('authorization'):
+        return json_response({'message': 'Token is missing'}, 401)
+    claims, auth_ms = request_claims(request)
+    if not claims:
+        response = json_response({'message': 'Token is invalid'}, 401)
+    elif claims.get('role') != 'admin':
+        response = json_response({'message': 'Admin privileges required'}, 403)
+    else:
+        response = await read_admin_stats()
+    response.headers.append('Server-Timing', f'auth;dur={auth_ms:.3f}')
+    return response
+
+
+async def read_admin_stats():
+    try:
+        async with db.connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(DASHBOARD_STATS_QUERY)
+                row = await cursor.fetchone()
+
+                if not row or row['overdue_stale']:
+                    await conn.begin()
+                    if not row:
+                        # Same steps as dashboard_stats.reconcile_dashboard_stats
+                        await cursor.execute("SELECT stat_id FROM dashboard_stats WHERE stat_id = 1 FOR UPDATE")
+                        await cursor.fetchall()
+                        await cursor.execute(RECONCILE_STATS_SQL)
+                    else:
+                        await cursor.execute(RECOUNT_OVERDUE_SQL)
+                    await conn.commit()
+                    await cursor.execute(DASHBOARD_STATS_QUERY)
+                    row = await cursor.fetchone()
+
+        return json_response({'stats': sync.dashboard_stats_payload(row)})
+
+    except DatabaseUnavailable:
+        return json_response({'message': 'Database connection failed'}, 500)
+    except Exception as e:
+        return json_response({'message': str(e)}, 500)
+
+
+async def notification_stream(request):
+    """Async counterpart of flask_app.notification_stream; an open stream costs
+    a coroutine and its queue instead of a server thread.
+    """
+    claims = sync.stream_claims(request.headers, request.query_params)
+    if not claims:
+        return json_response({'message': 'Token is missing or invalid'}, 401)
+    user_id = claims['user_id']
+
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    subscription = sync.notification_hub.subscribe(user_id, wake=lambda: loop.call_soon_threadsafe(ready.set))
+    if subscription is None:
+        return json_response({'message': 'Too many notification streams, try again later'}, 503)
+
+    missed = []
+    after_id = sync.last_event_id(request.headers, request.query_params)
+    if after_id is not None:
+        try:
+            missed = await db.fetch(MISSED_NOTIFICATIONS_QUERY, (user_id, after_id))
+        except DatabaseUnavailable:
+            sync.notification_hub.unsubscribe(subscription)
+            return json_response({'message': 'Database connection failed'}, 500)
+        except Exception as e:
+            sync.notification_hub.unsubscribe(subscription)
+            return json_response({'message': str(e)}, 500)
+
+    async def generate():
+        replayed = {row['notification_id'] for row in missed}
+        expires = claims.get('exp')
+        try:
+            yield 'retry: 5000\n\n'
+            for row in missed:
+                yield sse_message('due' if row['due_date'] else 'notification', sync.app.json.dumps(row), row['notification_id'])
+            while True:
+                timeout = sync.SSE_HEARTBEAT
+                if expires:
+                    timeout = min(timeout, expires - time.time())
+                    if timeout <= 0:
+                        yield sse_message('expired', '{}')
+                        return
+                try:
+                    await asyncio.wait_for(ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                ready.clear()
+                for name, event_id, row in subscription.drain():
+                    if event_id not in replayed:
+                        yield sse_message(name, sync.app.json.dumps(row), event_id)
+                if subscription.closed:
+                    if subscription.overflowed:
+                        yield sse_message(RESYNC, '{}')
+                    return
+        finally:
+            sync.notification_hub.unsubscribe(subscription)
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await db.open()
+    try:
+        yield
+    finally:
+        await db.close()
+
+
+native = Starlette(
+    routes=[
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/books', get_books, methods=['GET']),
+        Route('/api/books/search', search_books, methods=['GET']),
+        Route('/api/books/batch', get_books_batch, methods=['GET', 'POST']),
+        Route('/api/books/{book_id:int}', get_book, methods=['GET']),
+        Route('/api/admin/stats', get_admin_stats, methods=['GET']),
+        Route('/api/notifications/stream', notification_stream, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_headers=['Content-Type', 'Authorization'],
+                   allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+    ],
+    lifespan=lifespan
+)
+
+flask_fallback = WSGIMiddleware(sync.app, workers=ASYNC_SYNC_WORKERS)
+
+
+def native_route(scope):
+    """The native async route that handles this method and path, or None"""
+    for route in native.routes:
+        if route.matches(scope)[0] == Match.FULL:
+            return route
+    return None
+
+
+async def app(scope, receive, send):
+    """ASGI entry point: native routes on the event loop, the rest through Flask"""
+    if scope['type'] != 'http':
+        await native(scope, receive, send)
+        return
+    route = native_route(scope)
+    if route is None:
+        # Flask records its own request metrics
+        await flask_fallback(scope, receive, send)
+        return
+
+    started = time.perf_counter()
+
+    async def send_timed(message):
+        # Time to response headers, as flask_app measures it (streams stay open)
+        if message['type'] == 'http.response.start':
+            sync.request_seconds.observe(time.perf_counter() - started, route.path, scope['method'],
+                                         str(message['status']))
+        await send(message)
+
+    await native(scope, receive, send_timed)
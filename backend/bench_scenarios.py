@@ -0,0 +1,324 @@
+"""Scenario-based load benchmark with per-endpoint latency and a regression gate.
+
+Start the app against a database with a realistic catalog, then:
+
+    python bench_scenarios.py --url http://localhost:5000 --concurrency 100 --duration 60 \\
+        --mix browse=50,search=20,notifications=20,login=5,circulation=5 --json results.json
+
+Every client connection plays one bench user (bench-<n>@bench.local, registered
+on first use) and loops over scenarios picked by the --mix weights:
+
+    browse          first catalog page, sometimes the next one, then a book
+                    and its reviews; books are picked with a popularity skew
+    search          full-text search for a word taken from the catalog
+    login           password login (bcrypt bound)
+    circulation     issue a book to the user and return it again
+    notifications   unread badge poll, sometimes followed by the first page
+
+Latency and throughput are reported per endpoint. Requests made during
+--warmup are not counted. Results can be kept with --save-baseline and later
+runs compared with --baseline; the script exits with status 1 when an
+endpoint's p50 or p95 latency grew, or its throughput fell, by more than
+--max-regression, or its error rate rose by more than a percentage point.
+Compare runs made at the same concurrency on the same machine and data.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from bench_serving import HTTPClient, summarize
+
+DEFAULT_MIX = 'browse=50,search=20,notifications=20,login=5,circulation=5'
+BENCH_PASSWORD = 'bench-password-1'
+FALLBACK_TERMS = ['history', 'science', 'python', 'novel', 'art', 'war', 'love', 'data']
+
+# Endpoints with fewer measured requests than this are too noisy to gate on
+MIN_SAMPLES = 30
+
+NETWORK_ERRORS = (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError)
+
+
+def parse_mix(text):
+    """'browse=50,search=20' -> {'browse': 50.0, 'search': 20.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('The mix needs at least one scenario with a positive weight')
+    return mix
+
+
+class Recorder:
+    """Latencies and error counts per endpoint label, ignoring the warmup"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, label, seconds, ok):
+        if time.monotonic() < self.measure_from:
+            return
+        self.latencies.setdefault(label, [])
+        self.errors.setdefault(label, 0)
+        if ok:
+            self.latencies[label].append(seconds)
+        else:
+            self.errors[label] += 1
+
+    def results(self, elapsed):
+        endpoints = {label: summarize(self.latencies[label], self.errors[label], elapsed)
+                     for label in sorted(self.latencies)}
+        everything = [s for values in self.latencies.values() for s in values]
+        return endpoints, summarize(everything, sum(self.errors.values()), elapsed)
+
+
+class Session:
+    """One client connection acting as one bench user"""
+
+    def __init__(self, base_url, user, catalog, recorder, rng):
+        self.client = HTTPClient(base_url, {'Authorization': f"Bearer {user['token']}"})
+        self.user = user
+        self.catalog = catalog
+        self.recorder = recorder
+        self.rng = rng
+
+    async def call(self, label, method, path, body=None, expect=(200, 201, 304)):
+        """Make one timed request; returns the decoded JSON body, or None on failure"""
+        started = time.perf_counter()
+        try:
+            status, data = await self.client.request(method, path, body)
+        except NETWORK_ERRORS:
+            self.recorder.add(label, time.perf_counter() - started, False)
+            await asyncio.sleep(0.05)
+            return None
+        seconds = time.perf_counter() - started
+        self.recorder.add(label, seconds, status in expect)
+        if status not in expect:
+            return None
+        try:
+            return json.loads(data) if data else {}
+        except ValueError:
+            return {}
+
+    def popular_book(self):
+        return self.rng.choices(self.catalog['book_ids'], self.catalog['weights'])[0]
+
+
+async def browse(session):
+    page = await session.call('books.page', 'GET', '/api/books?limit=20')
+    if page and page.get('next_cursor') and session.rng.random() < 0.3:
+        await session.call('books.page', 'GET', f"/api/books?limit=20&after={quote(page['next_cursor'])}")
+    book_id = session.popular_book()
+    await session.call('books.detail', 'GET', f'/api/books/{book_id}')
+    await session.call('feedback', 'GET', f'/api/feedback/book/{book_id}?limit=5')
+
+
+async def search(session):
+    term = session.rng.choice(session.catalog['terms'])
+    await session.call('search', 'GET', f'/api/books/search?q={quote(term)}&limit=20')
+
+
+async def login(session):
+    await session.call('auth.login', 'POST', '/api/auth/login',
+                       {'email': session.user['email'], 'password': BENCH_PASSWORD})
+
+
+async def circulation(session):
+    # 400 is the app's answer for a book with no copies left, not a failure
+    issued = await session.call('issues.issue', 'POST', '/api/issues',
+                                {'book_id': session.popular_book(), 'due_days': 14}, expect=(201, 400))
+    if issued and issued.get('issue_id'):
+        await session.call('issues.return', 'PUT', f"/api/issues/{issued['issue_id']}/return")
+
+
+async def notifications(session):
+    user_id = session.user['user_id']
+    await session.call('notifications.unread', 'GET', f'/api/notifications/user/{user_id}/unread-count')
+    if session.rng.random() < 0.2:
+        await session.call('notifications.page', 'GET', f'/api/notifications/user/{user_id}?limit=20')
+
+
+SCENARIOS = {
+    'browse': browse,
+    'search': search,
+    'login': login,
+    'circulation': circulation,
+    'notifications': notifications,
+}
+
+
+async def prepare_users(base_url, count):
+    """Log in (registering where needed) ``count`` bench users"""
+    client = HTTPClient(base_url)
+    users = []
+    try:
+        for n in range(count):
+            email = f'bench-{n}@bench.local'
+            credentials = {'email': email, 'password': BENCH_PASSWORD}
+            status, data = await client.request('POST', '/api/auth/login', credentials)
+            if status == 200:
+                body = json.loads(data)
+                users.append({'email': email, 'user_id': body['user']['user_id'], 'token': body['token']})
+                continue
+            status, data = await client.request('POST', '/api/auth/register', dict(
+                credentials, name=f'Bench User {n}', phone='555-0100'))
+            if status != 201:
+                raise RuntimeError(f'Could not register {email}: {status} {data[:200]!r}')
+            body = json.loads(data)
+            users.append({'email': email, 'user_id': body['user_id'], 'token': body['token']})
+    finally:
+        await client.close()
+    return users
+
+
+async def load_catalog(base_url, max_books):
+    """Book ids with Zipf-like popularity weights, and search terms from their titles"""
+    client = HTTPClient(base_url)
+    book_ids, terms = [], set()
+    path = '/api/books?limit=100'
+    try:
+        while path and len(book_ids) < max_books:
+            status, data = await client.request('GET', path)
+            if status != 200:
+                raise RuntimeError(f'Could not list books: {status} {data[:200]!r}')
+            page = json.loads(data)
+            for book in page['books']:
+                book_ids.append(book['book_id'])
+                terms.update(w.lower() for w in book['title'].split() if len(w) > 3 and w.isalpha())
+            cursor = page.get('next_cursor')
+            path = f'/api/books?limit=100&after={quote(cursor)}' if cursor else None
+    finally:
+        await client.close()
+    if not book_ids:
+        raise RuntimeError('The catalog is empty; seed the database first')
+    return {
+        'book_ids': book_ids,
+        'weights': [1.0 / (rank + 1) for rank in range(len(book_ids))],
+        'terms': sorted(terms)[:200] or FALLBACK_TERMS,
+    }
+
+
+async def run(args, mix):
+    users = await prepare_users(args.url, min(args.users, args.concurrency))
+    catalog = await load_catalog(args.url, args.books)
+    print(f"{len(users)} bench users, {len(catalog['book_ids'])} books, {len(catalog['terms'])} search terms")
+
+    started = time.monotonic()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.duration
+    recorder = Recorder(measure_from)
+    names, weights = list(mix), list(mix.values())
+
+    async def worker(n):
+        rng = random.Random(args.seed * 100003 + n)
+        session = Session(args.url, users[n % len(users)], catalog, recorder, rng)
+        try:
+            while time.monotonic() < deadline:
+                await SCENARIOS[rng.choices(names, weights)[0]](session)
+        finally:
+            await session.client.close()
+
+    await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    return recorder.results(time.monotonic() - measure_from)
+
+
+def compare(current, baseline, max_regression):
+    """Regressions of ``current`` against ``baseline``, as readable strings"""
+    problems = []
+    for label, base in baseline['endpoints'].items():
+        now = current['endpoints'].get(label)
+        if now is None:
+            continue
+        if min(now['requests'], base['requests']) >= MIN_SAMPLES:
+            for key in ('p50_ms', 'p95_ms'):
+                if base[key] and now[key] > base[key] * (1 + max_regression):
+                    problems.append(f"{label}: {key} {base[key]} -> {now[key]}")
+            if now['rps'] < base['rps'] * (1 - max_regression):
+                problems.append(f"{label}: rps {base['rps']} -> {now['rps']}")
+        base_rate = error_rate(base)
+        now_rate = error_rate(now)
+        if now_rate > base_rate + 0.01:
+            problems.append(f"{label}: error rate {base_rate:.1%} -> {now_rate:.1%}")
+    return problems
+
+
+def error_rate(summary):
+    attempts = summary['requests'] + summary['errors']
+    return summary['errors'] / attempts if attempts else 0.0
+
+
+def print_table(endpoints, total):
+    print(f"{'endpoint':<22} {'requests':>9} {'errors':>7} {'rps':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, s in list(endpoints.items()) + [('total', total)]:
+        print(f"{label:<22} {s['requests']:>9} {s['errors']:>7} {s['rps']:>9} "
+              f"{s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {s['max_ms']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Comma-separated scenario=weight pairs')
+    parser.add_argument('--concurrency', type=int, default=50, help='Client connections')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds run before measuring')
+    parser.add_argument('--users', type=int, default=50, help='Bench users to spread the clients over')
+    parser.add_argument('--books', type=int, default=2000, help='Books to sample the workload from')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the scenario and book choices')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    parser.add_argument('--baseline', help='Compare against results saved earlier; exit 1 on regression')
+    parser.add_argument('--save-baseline', help='Also write the results to this baseline file')
+    parser.add_argument('--max-regression', type=float, default=0.15,
+                        help='Allowed relative growth of p50/p95 and drop of throughput (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started_at = datetime.now().isoformat(timespec='seconds')
+    endpoints, total = asyncio.run(run(args, mix))
+    print_table(endpoints, total)
+
+    results = {
+        'url': args.url,
+        'started_at': started_at,
+        'mix': mix,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'seed': args.seed,
+        'endpoints': endpoints,
+        'total': total,
+    }
+    for path in filter(None, (args.json_path, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('concurrency') != args.concurrency or baseline.get('mix') != mix:
+            print('Warning: the baseline was recorded with a different concurrency or mix')
+        problems = compare(results, baseline, args.max_regression)
+        if problems:
+            print(f"Regressions against {args.baseline}:")
+            for problem in problems:
+                print(f"  {problem}")
+            raise SystemExit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
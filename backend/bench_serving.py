@@ -0,0 +1,196 @@
+"""Side-by-side latency and throughput benchmark of the sync and async servers.
+
+Start both servers against the same database, then point this script at them:
+
+    DB_POOL_SIZE=20 DB_POOL_MAX_OVERFLOW=0 \
+        gunicorn --workers 1 --threads 32 --bind 0.0.0.0:5000 flask_app:app   # sync
+    uvicorn async_app:app --port 5001                                         # async
+
+Do not benchmark `python flask_app.py`: that is the debug server with the
+reloader, which imports the app twice and so runs two reconcilers and two
+overdue sweepers. The sync side gets one process with 32 threads and the same
+20 database connections as the async pool (ASYNC_DB_POOL_SIZE), so the two
+modes differ only in how requests are scheduled.
+    python bench_serving.py --sync http://localhost:5000 --async http://localhost:5001 \\
+        --concurrency 50,500,2000 --duration 20
+
+Each concurrency level opens that many keep-alive client connections, driven
+from a single asyncio loop, and cycles them through the --path list for the
+given duration. Admin-only paths need --token. Results are printed as a table
+and can be written to a JSON file with --json.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['/api/books?limit=50', '/api/books/1', '/api/books/search?q=history', '/api/health']
+
+
+class HTTPClient:
+    """Minimal HTTP/1.1 keep-alive client; enough to drive a local benchmark"""
+
+    def __init__(self, base_url, headers=None, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.headers = headers or {}
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+
+    async def request(self, method, path, body=None):
+        """Send one request and return (status, body bytes), reconnecting as needed"""
+        if self._writer is None:
+            await self._connect()
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                 f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines += [f'{k}: {v}' for k, v in self.headers.items()]
+        self._writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        try:
+            return await asyncio.wait_for(self._read_response(method), self.timeout)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _read_response(self, method):
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError('Server closed the connection')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if method == 'HEAD' or status in (204, 304):
+            data = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                data += chunk[:-2]
+        elif 'content-length' in headers:
+            data = await self._reader.readexactly(int(headers['content-length']))
+        else:
+            data = await self._reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close' or status_line.startswith(b'HTTP/1.0'):
+            await self.close()
+        return status, data
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (ms) for one run"""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0,
+    }
+
+
+async def run_level(base_url, paths, concurrency, duration, headers):
+    """Drive ``concurrency`` connections at one server for ``duration`` seconds"""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(offset):
+        nonlocal errors
+        client = HTTPClient(base_url, headers)
+        i = offset
+        try:
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    status, _ = await client.request('GET', path)
+                except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    await asyncio.sleep(0.05)
+                    continue
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            await client.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return summarize(latencies, errors, time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync', dest='sync_url', default='http://localhost:5000', help='Flask server base URL')
+    parser.add_argument('--async', dest='async_url', default='http://localhost:5001', help='ASGI server base URL')
+    parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable)')
+    parser.add_argument('--concurrency', default='50,500', help='Comma-separated client connection counts')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per server and level')
+    parser.add_argument('--token', help='Bearer token sent with every request')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    levels = [int(c) for c in args.concurrency.split(',')]
+    servers = [('sync', args.sync_url), ('async', args.async_url)]
+
+    results = []
+    print(f"{'server':<6} {'conc':>6} {'requests':>9} {'errors':>7} {'rps':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for concurrency in levels:
+        for name, url in servers:
+            summary = asyncio.run(run_level(url, paths, concurrency, args.duration, headers))
+            summary.update({'server': name, 'url': url, 'concurrency': concurrency})
+            results.append(summary)
+            print(f"{name:<6} {concurrency:>6} {summary['requests']:>9} {summary['errors']:>7} "
+                  f"{summary['rps']:>9} {summary['p50_ms']:>8} {summary['p95_ms']:>8} "
+                  f"{summary['p99_ms']:>8} {summary['max_ms']:>8}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'paths': paths, 'duration': args.duration, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""In-process LRU cache with TTL, a memory bound and tag-based invalidation.
+
+Used by the Flask backend to keep catalog rows and pages out of MySQL. Every
+entry may carry tags (for example ``('book', 42)``) so that a write can drop
+exactly the entries that contain the row it changed.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Approximate memory cost of a cached value by its JSON length"""
+    return len(json.dumps(value, default=str, separators=(',', ':')))
+
+
+class TTLCache:
+    """Thread-safe LRU cache bounded by entry count and approximate bytes"""
+
+    def __init__(self, ttl=60.0, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # key -> (value, expires_at, size, tags)
+        self._tags = {}  # tag -> set of keys
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a read that raced a write cannot
+        # store the stale rows it fetched before the write committed
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key):
+        value, expires_at, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        """Return the cached value or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags=(), generation=None, ttl=None):
+        """Store a value, evicting least recently used entries to stay in bounds.
+
+        Pass the ``generation`` read before querying the database; the value is
+        dropped if anything was invalidated in the meantime. ``ttl`` overrides
+        the cache-wide TTL for this entry.
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = (value, expires_at, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop a single key"""
+        with self._lock:
+            self.generation += 1
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_tag(self, tag):
+        """Drop every entry stored with the given tag"""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Snapshot of cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
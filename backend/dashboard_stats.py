@@ -0,0 +1,47 @@
+"""Queries for the trigger-maintained dashboard_stats row.
+
+Shared by flask_app, async_app and generate_dataset.py.
+"""
+
+DASHBOARD_STATS_QUERY = """
+    SELECT total_books, total_users, active_issues, overdue_books, total_fines,
+           overdue_as_of < CURDATE() AS overdue_stale
+    FROM dashboard_stats
+    WHERE stat_id = 1
+"""
+
+
+RECONCILE_STATS_SQL = """
+    REPLACE INTO dashboard_stats
+        (stat_id, total_books, total_users, active_issues, overdue_books, total_fines, overdue_as_of, reconciled_at)
+    SELECT 1,
+        (SELECT COUNT(*) FROM books),
+        (SELECT COUNT(*) FROM users),
+        (SELECT COUNT(*) FROM issues WHERE status = 'issued'),
+        (SELECT COUNT(*) FROM issues WHERE status = 'issued' AND due_date < CURDATE()),
+        (SELECT COALESCE(SUM(fine), 0) FROM issues WHERE fine > 0),
+        CURDATE(),
+        CURRENT_TIMESTAMP
+"""
+
+
+# Loans cross their due date as days pass, so overdue is recounted once a day
+RECOUNT_OVERDUE_SQL = """
+    UPDATE dashboard_stats
+    SET overdue_books = (SELECT COUNT(*) FROM issues WHERE status = 'issued' AND due_date < CURDATE()),
+        overdue_as_of = CURDATE()
+    WHERE stat_id = 1
+"""
+
+
+def reconcile_dashboard_stats(cursor):
+    """Recount every dashboard statistic from the base tables.
+
+    Locking the stats row first makes writers whose triggers have not run yet
+    wait, so their deltas land on top of the fresh totals instead of being
+    double counted. REPLACE ... SELECT reads the base tables with locking
+    reads, so the counts are current even inside an older snapshot.
+    """
+    cursor.execute("SELECT stat_id FROM dashboard_stats WHERE stat_id = 1 FOR UPDATE")
+    cursor.fetchall()
+    cursor.execute(RECONCILE_STATS_SQL)
@@ -0,0 +1,4 @@
+-- Keyset pagination index for GET /api/books
+-- Covers WHERE is_active = 1 ORDER BY title, book_id with a (title, book_id) cursor
+
+CREATE INDEX idx_books_active_title ON books (is_active, title, book_id);
@@ -0,0 +1,18 @@
+-- FULLTEXT search for GET /api/books/search
+-- search_keywords holds the book's author and category names so that a single
+-- FULLTEXT index can cover them; add_book keeps it up to date.
+
+ALTER TABLE books ADD COLUMN search_keywords TEXT NULL AFTER description;
+
+UPDATE books b
+SET b.search_keywords = CONCAT_WS(' ',
+    (SELECT GROUP_CONCAT(a.name SEPARATOR ' ')
+     FROM book_authors ba JOIN authors a ON ba.author_id = a.author_id
+     WHERE ba.book_id = b.book_id),
+    (SELECT GROUP_CONCAT(c.name SEPARATOR ' ')
+     FROM book_categories bc JOIN categories c ON bc.category_id = c.category_id
+     WHERE bc.book_id = b.book_id));
+
+-- InnoDB builds one FULLTEXT index per ALTER TABLE
+ALTER TABLE books ADD FULLTEXT INDEX ft_books_search (title, subtitle, description, search_keywords);
+ALTER TABLE books ADD FULLTEXT INDEX ft_books_title (title);
@@ -0,0 +1,115 @@
+-- Materialized admin dashboard statistics
+-- GET /api/admin/stats reads the single row of dashboard_stats instead of
+-- running five aggregates. The triggers below keep it current on every
+-- write; overdue_books also depends on the date, so it is recounted once a
+-- day (overdue_as_of) and whenever the app reconciles the table.
+-- Rows removed by ON DELETE CASCADE do not fire triggers in MySQL, so the
+-- book and user delete routes remove their issues explicitly first. Writes
+-- made outside the app can still drift; the optional background reconcile
+-- (STATS_RECONCILE_INTERVAL, off by default) or reconcile_dashboard_stats
+-- recounts the row.
+
+CREATE TABLE dashboard_stats (
+    stat_id TINYINT PRIMARY KEY DEFAULT 1,
+    total_books INT NOT NULL DEFAULT 0,
+    total_users INT NOT NULL DEFAULT 0,
+    active_issues INT NOT NULL DEFAULT 0,
+    overdue_books INT NOT NULL DEFAULT 0,
+    total_fines DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    overdue_as_of DATE NOT NULL,
+    reconciled_at TIMESTAMP NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    CHECK (stat_id = 1)
+);
+
+-- Lets the daily overdue recount read only the overdue range
+CREATE INDEX idx_issues_status_due_date ON issues (status, due_date);
+
+INSERT INTO dashboard_stats (stat_id, total_books, total_users, active_issues, overdue_books, total_fines, overdue_as_of, reconciled_at)
+SELECT 1,
+    (SELECT COUNT(*) FROM books),
+    (SELECT COUNT(*) FROM users),
+    (SELECT COUNT(*) FROM issues WHERE status = 'issued'),
+    (SELECT COUNT(*) FROM issues WHERE status = 'issued' AND due_date < CURDATE()),
+    (SELECT COALESCE(SUM(fine), 0) FROM issues WHERE fine > 0),
+    CURDATE(),
+    CURRENT_TIMESTAMP;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_book_added
+AFTER INSERT ON books
+FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET total_books = total_books + 1 WHERE stat_id = 1;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_book_deleted
+AFTER DELETE ON books
+FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET total_books = total_books - 1 WHERE stat_id = 1;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_user_added
+AFTER INSERT ON users
+FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET total_users = total_users + 1 WHERE stat_id = 1;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_user_deleted
+AFTER DELETE ON users
+FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats SET total_users = total_users - 1 WHERE stat_id = 1;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_issue_added
+AFTER INSERT ON issues
+FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats
+    SET active_issues = active_issues + (NEW.status = 'issued'),
+        overdue_books = overdue_books + (NEW.status = 'issued' AND NEW.due_date < CURDATE()),
+        total_fines = total_fines + IF(NEW.fine > 0, NEW.fine, 0)
+    WHERE stat_id = 1;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_issue_changed
+AFTER UPDATE ON issues
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.status <=> OLD.status AND NEW.due_date <=> OLD.due_date AND NEW.fine <=> OLD.fine) THEN
+        UPDATE dashboard_stats
+        SET active_issues = active_issues + (NEW.status = 'issued') - (OLD.status = 'issued'),
+            overdue_books = overdue_books
+                + (NEW.status = 'issued' AND NEW.due_date < CURDATE())
+                - (OLD.status = 'issued' AND OLD.due_date < CURDATE()),
+            total_fines = total_fines + IF(NEW.fine > 0, NEW.fine, 0) - IF(OLD.fine > 0, OLD.fine, 0)
+        WHERE stat_id = 1;
+    END IF;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER dashboard_stats_issue_deleted
+AFTER DELETE ON issues
+FOR EACH ROW
+BEGIN
+    UPDATE dashboard_stats
+    SET active_issues = active_issues - (OLD.status = 'issued'),
+        overdue_books = overdue_books - (OLD.status = 'issued' AND OLD.due_date < CURDATE()),
+        total_fines = total_fines - IF(OLD.fine > 0, OLD.fine, 0)
+    WHERE stat_id = 1;
+END //
+DELIMITER ;
@@ -0,0 +1,8 @@
+-- Indexes for the paginated GET /api/admin/users listing
+-- InnoDB appends the primary key to secondary indexes, so these also serve
+-- the (created_at, user_id) and (name, user_id) keyset cursors
+CREATE INDEX idx_users_created_at ON users (created_at);
+CREATE INDEX idx_users_name ON users (name);
+
+-- Per-user loan aggregates and the overdue-only filter for the returned page
+CREATE INDEX idx_issues_user_status_due ON issues (user_id, status, due_date);
@@ -0,0 +1,93 @@
+-- Per-user circulation counters
+-- The admin user list and delete_user read one user_loan_stats row by primary
+-- key instead of counting the user's issues. The triggers below update the
+-- counters in the same transaction as the issue, return or fine change.
+-- overdue_loans counts issued loans due before overdue_as_of; loans become
+-- overdue as days pass without any write, so the app recounts a user's
+-- overdue loans when overdue_as_of is behind (see refresh_user_overdue).
+-- Rows removed by ON DELETE CASCADE do not fire triggers, so delete_book
+-- removes the book's issues explicitly first. verify_loan_counters.py
+-- rebuilds the counters in bulk and reports drift from any other source.
+
+CREATE TABLE user_loan_stats (
+    user_id INT PRIMARY KEY,
+    total_borrowed INT NOT NULL DEFAULT 0,
+    current_loans INT NOT NULL DEFAULT 0,
+    overdue_loans INT NOT NULL DEFAULT 0,
+    unpaid_fines DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    overdue_as_of DATE NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+INSERT INTO user_loan_stats (user_id, total_borrowed, current_loans, overdue_loans, unpaid_fines, overdue_as_of)
+SELECT u.user_id,
+    COUNT(i.issue_id),
+    COUNT(CASE WHEN i.status = 'issued' THEN 1 END),
+    COUNT(CASE WHEN i.status = 'issued' AND i.due_date < CURDATE() THEN 1 END),
+    COALESCE(SUM(CASE WHEN i.fine > 0 AND NOT i.fine_paid THEN i.fine END), 0),
+    CURDATE()
+FROM users u
+LEFT JOIN issues i ON i.user_id = u.user_id
+GROUP BY u.user_id;
+
+DELIMITER //
+CREATE TRIGGER user_loan_stats_user_added
+AFTER INSERT ON users
+FOR EACH ROW
+BEGIN
+    INSERT INTO user_loan_stats (user_id, overdue_as_of) VALUES (NEW.user_id, CURDATE());
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER user_loan_stats_issue_added
+AFTER INSERT ON issues
+FOR EACH ROW
+BEGIN
+    UPDATE user_loan_stats
+    SET total_borrowed = total_borrowed + 1,
+        current_loans = current_loans + (NEW.status = 'issued'),
+        overdue_loans = overdue_loans + (NEW.status = 'issued' AND NEW.due_date < overdue_as_of),
+        unpaid_fines = unpaid_fines + IF(NEW.fine > 0 AND NOT NEW.fine_paid, NEW.fine, 0)
+    WHERE user_id = NEW.user_id;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER user_loan_stats_issue_changed
+AFTER UPDATE ON issues
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.status <=> OLD.status AND NEW.due_date <=> OLD.due_date
+            AND NEW.fine <=> OLD.fine AND NEW.fine_paid <=> OLD.fine_paid
+            AND NEW.user_id <=> OLD.user_id) THEN
+        UPDATE user_loan_stats
+        SET total_borrowed = total_borrowed - 1,
+            current_loans = current_loans - (OLD.status = 'issued'),
+            overdue_loans = overdue_loans - (OLD.status = 'issued' AND OLD.due_date < overdue_as_of),
+            unpaid_fines = unpaid_fines - IF(OLD.fine > 0 AND NOT OLD.fine_paid, OLD.fine, 0)
+        WHERE user_id = OLD.user_id;
+        UPDATE user_loan_stats
+        SET total_borrowed = total_borrowed + 1,
+            current_loans = current_loans + (NEW.status = 'issued'),
+            overdue_loans = overdue_loans + (NEW.status = 'issued' AND NEW.due_date < overdue_as_of),
+            unpaid_fines = unpaid_fines + IF(NEW.fine > 0 AND NOT NEW.fine_paid, NEW.fine, 0)
+        WHERE user_id = NEW.user_id;
+    END IF;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER user_loan_stats_issue_deleted
+AFTER DELETE ON issues
+FOR EACH ROW
+BEGIN
+    UPDATE user_loan_stats
+    SET total_borrowed = total_borrowed - 1,
+        current_loans = current_loans - (OLD.status = 'issued'),
+        overdue_loans = overdue_loans - (OLD.status = 'issued' AND OLD.due_date < overdue_as_of),
+        unpaid_fines = unpaid_fines - IF(OLD.fine > 0 AND NOT OLD.fine_paid, OLD.fine, 0)
+    WHERE user_id = OLD.user_id;
+END //
+DELIMITER ;
@@ -0,0 +1,25 @@
+-- Bookkeeping for the chunked overdue sweep (overdue_sweeper.py), which
+-- replaces the SendOverdueNotifications procedure.
+-- overdue_notices records one row per loan per day it was notified, so the
+-- sweep dedupes with a primary-key lookup instead of a LIKE over messages.
+CREATE TABLE overdue_notices (
+    issue_id INT NOT NULL,
+    notice_date DATE NOT NULL,
+    notification_id INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (issue_id, notice_date),
+    FOREIGN KEY (issue_id) REFERENCES issues(issue_id) ON DELETE CASCADE
+);
+
+-- Resume point of long-running maintenance jobs, committed with each chunk
+CREATE TABLE job_checkpoints (
+    job_name VARCHAR(64) PRIMARY KEY,
+    run_date DATE NOT NULL,
+    cursor_due_date DATE NULL,
+    cursor_issue_id INT NULL,
+    processed INT NOT NULL DEFAULT 0,
+    notified INT NOT NULL DEFAULT 0,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,56 @@
+-- Keyset pagination and a maintained unread counter for notifications
+-- GET /api/notifications/user/<id> pages over (user_id, send_date, notification_id)
+-- and /unread-count reads one user_notification_stats row. Notifications are
+-- also inserted by stored procedures and the overdue sweep, so the counter is
+-- kept by triggers rather than by each writer.
+CREATE INDEX idx_notifications_user_send ON notifications (user_id, send_date, notification_id);
+
+CREATE TABLE user_notification_stats (
+    user_id INT PRIMARY KEY,
+    unread_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+INSERT INTO user_notification_stats (user_id, unread_count)
+SELECT user_id, SUM(IF(is_read, 0, 1))
+FROM notifications
+GROUP BY user_id;
+
+DELIMITER //
+CREATE TRIGGER notification_stats_added
+AFTER INSERT ON notifications
+FOR EACH ROW
+BEGIN
+    INSERT INTO user_notification_stats (user_id, unread_count)
+    VALUES (NEW.user_id, IF(NEW.is_read, 0, 1))
+    ON DUPLICATE KEY UPDATE unread_count = unread_count + IF(NEW.is_read, 0, 1);
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER notification_stats_changed
+AFTER UPDATE ON notifications
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.is_read <=> OLD.is_read AND NEW.user_id <=> OLD.user_id) THEN
+        UPDATE user_notification_stats
+        SET unread_count = unread_count - IF(OLD.is_read, 0, 1)
+        WHERE user_id = OLD.user_id;
+        INSERT INTO user_notification_stats (user_id, unread_count)
+        VALUES (NEW.user_id, IF(NEW.is_read, 0, 1))
+        ON DUPLICATE KEY UPDATE unread_count = unread_count + IF(NEW.is_read, 0, 1);
+    END IF;
+END //
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER notification_stats_deleted
+AFTER DELETE ON notifications
+FOR EACH ROW
+BEGIN
+    UPDATE user_notification_stats
+    SET unread_count = unread_count - IF(OLD.is_read, 0, 1)
+    WHERE user_id = OLD.user_id;
+END //
+DELIMITER ;
@@ -0,0 +1,35 @@
+-- Per-book rating aggregates and paginated reviews
+-- GET /api/feedback/book/<id> reads one book_rating_stats row for the average,
+-- count and histogram instead of aggregating the book's feedback on every
+-- request. add_feedback updates the row in the same transaction as the
+-- review, and delete_user takes back the ratings of the reviews it cascades.
+
+CREATE TABLE book_rating_stats (
+    book_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0,
+    stars_1 INT NOT NULL DEFAULT 0,
+    stars_2 INT NOT NULL DEFAULT 0,
+    stars_3 INT NOT NULL DEFAULT 0,
+    stars_4 INT NOT NULL DEFAULT 0,
+    stars_5 INT NOT NULL DEFAULT 0,
+    last_feedback_id INT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE
+);
+
+INSERT INTO book_rating_stats (book_id, rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5, last_feedback_id)
+SELECT book_id,
+    SUM(rating),
+    COUNT(*),
+    SUM(rating = 1), SUM(rating = 2), SUM(rating = 3), SUM(rating = 4), SUM(rating = 5),
+    MAX(feedback_id)
+FROM feedback
+WHERE rating IS NOT NULL
+GROUP BY book_id;
+
+-- Keyset orders for the review list; InnoDB appends feedback_id to both
+UPDATE feedback SET helpful_votes = 0 WHERE helpful_votes IS NULL;
+ALTER TABLE feedback MODIFY helpful_votes INT NOT NULL DEFAULT 0;
+CREATE INDEX idx_feedback_book_created ON feedback (book_id, created_at);
+CREATE INDEX idx_feedback_book_helpful ON feedback (book_id, helpful_votes);
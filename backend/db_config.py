@@ -0,0 +1,13 @@
+"""MySQL connection settings shared by the app and the command-line tools.
+
+Importing this module has no side effects, unlike importing flask_app, which
+builds the app, its pools and any enabled background threads.
+"""
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'library_management_system',
+    'user': 'root',
+    'password': 'Gautam@012',
+    'port': 3306
+}
@@ -0,0 +1,331 @@
+"""Thread-safe MySQL connection pool used by the Flask backend.
+
+mysql.connector ships its own pool, but it has no overflow, never waits for a
+free connection and keeps no statistics, so we manage connections ourselves.
+"""
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no connection could be checked out in time"""
+
+
+def inserted_ids(cursor, count, step=1):
+    """Ids of the ``count`` rows added by the INSERT just run on ``cursor``.
+
+    Only valid for one multi-row INSERT ... VALUES of new rows with no
+    explicit ids: InnoDB calls that a "simple insert" and reserves all its
+    auto-increment values at once, so in every innodb_autoinc_lock_mode they
+    are consecutive, ``step`` (@@auto_increment_increment) apart, starting at
+    lastrowid. INSERT ... SELECT, ON DUPLICATE KEY UPDATE and INSERT IGNORE
+    can leave gaps; re-read the ids for those.
+    """
+    first_id = cursor.lastrowid
+    return [first_id + i * step for i in range(count)]
+
+
+class ObservedCursor:
+    """Cursor proxy that reports each statement to the pool's observer.
+
+    Routes use unbuffered cursors, whose rowcount is not known until the rows
+    are read (the C extension reports 0, the pure-Python driver -1). So a
+    statement that returns rows is reported once its result has been read,
+    or when the cursor runs another statement or is closed: the time spent
+    fetching counts towards it and the row count is the rows read. Other
+    statements are reported straight after execute() with their rowcount.
+    """
+
+    def __init__(self, raw, observer):
+        self._raw = raw
+        self._observer = observer
+        self._pending = None  # [statement, params, seconds, rows] until read
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def report(self):
+        """Report the statement whose rows are still being read, if any"""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self._observer(*pending)
+
+    def _timed(self, method, operation, params):
+        self.report()
+        started = time.perf_counter()
+        try:
+            result = method(operation, params)
+        except Exception:
+            self._observer(operation, params, time.perf_counter() - started, None)
+            raise
+        elapsed = time.perf_counter() - started
+        if self._raw.with_rows:
+            self._pending = [operation, params, elapsed, 0]
+        else:
+            rows = self._raw.rowcount
+            self._observer(operation, params, elapsed, rows if rows is not None and rows >= 0 else None)
+        return result
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - started
+
+    def execute(self, operation, params=()):
+        return self._timed(self._raw.execute, operation, params)
+
+    def executemany(self, operation, seq_params):
+        return self._timed(self._raw.executemany, operation, seq_params)
+
+    def fetchone(self):
+        row = self._fetch(self._raw.fetchone)
+        if self._pending is not None:
+            if row is None:
+                self.report()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._fetch(self._raw.fetchmany, size or self._raw.arraysize)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if len(rows) < (size or self._raw.arraysize):
+                self.report()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._raw.fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self.report()
+        return rows
+
+    def close(self):
+        self.report()
+        return self._raw.close()
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+        self._cursors = []
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.observer is None:
+            return cursor
+        cursor = ObservedCursor(cursor, self._pool.observer)
+        self._cursors.append(cursor)
+        return cursor
+
+    @property
+    def released(self):
+        return self._released
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)"""
+        if self._released:
+            return
+        self._released = True
+        # Statements whose rows were never read to the end are reported now
+        for cursor in self._cursors:
+            cursor.report()
+        self._cursors = []
+        self._pool.release(self._raw)
+
+
+class ConnectionPool:
+    """Fixed-size pool with bounded overflow and liveness checks on borrow.
+
+    ``size`` connections are kept open once created; up to ``max_overflow``
+    extra connections may be opened under load and are closed again when
+    returned.  Callers that find the pool exhausted wait up to ``timeout``
+    seconds for a connection to come back.
+
+    ``observer(statement, params, seconds, rows)``, when given, is called
+    once for every statement run on a cursor of a pooled connection (see
+    ObservedCursor for when); ``rows`` is None when it is not known.
+    """
+
+    def __init__(self, config, size=10, max_overflow=10, timeout=5.0,
+                 recycle=3600, ping_after=5.0, observer=None):
+        self.config = dict(config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.observer = observer
+
+        self._idle = deque()  # (connection, created_at, returned_at)
+        self._created_at = {}  # id(connection) -> creation time
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._overflow_opened = 0
+        self._saturated = 0
+        self._peak_in_use = 0
+        self._discarded = 0
+
+    @property
+    def capacity(self):
+        return self.size + self.max_overflow
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.config)
+        self._created_at[id(raw)] = time.monotonic()
+        return raw
+
+    def _discard(self, raw):
+        self._created_at.pop(id(raw), None)
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def _is_alive(self, raw, created_at, returned_at):
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            return False
+        if now - returned_at < self.ping_after:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def acquire(self):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, created_at, returned_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._open < self.capacity:
+                    if self._open >= self.size:
+                        self._overflow_opened += 1
+                    self._open += 1
+                    self._in_use += 1
+                    raw = None
+                    break
+                if not waited:
+                    waited = True
+                    self._saturated += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        # Network I/O happens outside the lock
+        try:
+            if raw is not None and not self._is_alive(raw, created_at, returned_at):
+                self._discard(raw)
+                with self._cond:
+                    self._discarded += 1
+                raw = None
+            if raw is None:
+                raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        wait = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Give a raw connection back, rolling back any open transaction"""
+        healthy = True
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.size:
+                created_at = self._created_at.get(id(raw), time.monotonic())
+                self._idle.append((raw, created_at, time.monotonic()))
+                raw = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        if raw is not None:
+            self._discard(raw)
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'peak_in_use': self._peak_in_use,
+                'saturation': round(self._in_use / self.capacity, 3) if self.capacity else 0,
+                'checkouts': checkouts,
+                'waits': self._waits,
+                'wait_avg_ms': round(self._wait_total / checkouts * 1000, 3) if checkouts else 0,
+                'wait_max_ms': round(self._wait_max * 1000, 3),
+                'saturated': self._saturated,
+                'timeouts': self._timeouts,
+                'overflow_opened': self._overflow_opened,
+                'discarded': self._discarded,
+            }
@@ -1,13 +1,29 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, g, Response, stream_with_context, has_app_context, has_request_context
 from flask_cors import CORS
-from bcrypt import hashpw, gensalt, checkpw
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import mysql.connector
 from mysql.connector import Error
 import os
 from functools import wraps
 import jwt
 import json
+import base64
+import csv
+import io
+import hashlib
+import re
+import threading
+import time
+from db_config import DB_CONFIG
+from db_pool import ConnectionPool, inserted_ids
+from catalog_cache import TTLCache
+from password_hasher import PasswordHasher, PasswordHasherUnavailable, BCRYPT_ROUNDS
+from overdue_sweeper import sweep_overdue
+from notification_hub import NotificationHub, MISSED_NOTIFICATIONS_QUERY, RESYNC, sse_message
+from metrics import MetricsRegistry
+from slow_queries import SlowQueryLog
+from loan_stats import get_user_loan_stats, refresh_user_overdue
+from dashboard_stats import DASHBOARD_STATS_QUERY, RECOUNT_OVERDUE_SQL, reconcile_dashboard_stats
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
@@ -19,69 +35,398 @@ CORS(
     allow_headers=["Content-Type", "Authorization"],
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
 )
-# bcrypt functions are imported directly
-
-# Database configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'database': 'library_management_system',
-    'user': 'root',
-    'password': 'Gautam@012',
-    'port': 3306
-}
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
+
+# Request metrics, served at /api/admin/metrics
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    'http_request_duration_seconds', 'Time to build each response, by route', ('route', 'method', 'status'))
+request_queries = metrics.histogram(
+    'db_queries_per_request', 'SQL statements run per request', ('route',), (0, 1, 2, 3, 5, 10, 20, 50, 100))
+request_db_seconds = metrics.histogram(
+    'db_time_per_request_seconds', 'Time spent running SQL statements per request', ('route',))
+pool_wait_seconds = metrics.histogram(
+    'db_pool_wait_seconds', 'Time to check a connection out of the pool, including connecting')
+bcrypt_seconds = metrics.histogram(
+    'bcrypt_seconds', 'bcrypt run time on the hashing pool', ('operation',),
+    (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+bcrypt_queue_seconds = metrics.histogram(
+    'bcrypt_queue_wait_seconds', 'Time a bcrypt call waited for a hashing worker', ('operation',))
+
+# Slow-query log: statements slower than SLOW_QUERY_MS (negative disables) are
+# written to SLOW_QUERY_LOG as JSON lines (or the app log when unset), and
+# each distinct statement shape is EXPLAINed once when SLOW_QUERY_EXPLAIN=1
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG') or None
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', '1') == '1'
+
+slow_query_log = SlowQueryLog(threshold_ms=SLOW_QUERY_MS, log_path=SLOW_QUERY_LOG, logger=app.logger)
+
+def observe_query(statement, params, seconds, rows):
+    """Count a statement towards the current request's SQL count and DB time,
+    and hand slow ones to the slow-query log.
+    """
+    if has_app_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_seconds += seconds
+    if slow_query_log.enabled and seconds >= slow_query_log.threshold:
+        context = None
+        if has_request_context():
+            context = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        slow_query_log.record(statement, params, seconds, rows, context)
+
+def observe_bcrypt(operation, queue_wait, seconds):
+    bcrypt_queue_seconds.observe(queue_wait, operation)
+    bcrypt_seconds.observe(seconds, operation)
+
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_MAX_OVERFLOW,
+    timeout=DB_POOL_TIMEOUT,
+    recycle=DB_POOL_RECYCLE,
+    observer=observe_query
+)
+if SLOW_QUERY_EXPLAIN:
+    slow_query_log.connect = db_pool.acquire
+
+# Catalog cache configuration (TTL in seconds)
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 60))
+CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', 10000))
+CATALOG_CACHE_MAX_BYTES = int(os.environ.get('CATALOG_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+catalog_cache = TTLCache(
+    ttl=CATALOG_CACHE_TTL,
+    max_entries=CATALOG_CACHE_MAX_ENTRIES,
+    max_bytes=CATALOG_CACHE_MAX_BYTES
+)
+
+# Pagination limits for list endpoints
+BOOKS_PAGE_DEFAULT = int(os.environ.get('BOOKS_PAGE_DEFAULT', 50))
+BOOKS_PAGE_MAX = int(os.environ.get('BOOKS_PAGE_MAX', 200))
+SEARCH_PAGE_DEFAULT = int(os.environ.get('SEARCH_PAGE_DEFAULT', 20))
+SEARCH_PAGE_MAX = int(os.environ.get('SEARCH_PAGE_MAX', 100))
+USERS_PAGE_DEFAULT = int(os.environ.get('USERS_PAGE_DEFAULT', 50))
+USERS_PAGE_MAX = int(os.environ.get('USERS_PAGE_MAX', 200))
+NOTIFICATIONS_PAGE_DEFAULT = int(os.environ.get('NOTIFICATIONS_PAGE_DEFAULT', 20))
+NOTIFICATIONS_PAGE_MAX = int(os.environ.get('NOTIFICATIONS_PAGE_MAX', 100))
+REVIEWS_PAGE_DEFAULT = int(os.environ.get('REVIEWS_PAGE_DEFAULT', 20))
+REVIEWS_PAGE_MAX = int(os.environ.get('REVIEWS_PAGE_MAX', 100))
+
+# Rows per transaction for POST /api/admin/books/bulk
+BULK_IMPORT_CHUNK = int(os.environ.get('BULK_IMPORT_CHUNK', 1000))
+
+# Most issue or book ids accepted by one batch issue/return request
+BATCH_CIRCULATION_MAX = int(os.environ.get('BATCH_CIRCULATION_MAX', 500))
+
+# Most book ids resolved by one GET/POST /api/books/batch
+BOOKS_BATCH_MAX = int(os.environ.get('BOOKS_BATCH_MAX', 300))
+
+# Rows fetched per round trip by the streaming export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# Shortest word InnoDB puts in a FULLTEXT index (innodb_ft_min_token_size)
+# and its default stopword list; neither can be required in a BOOLEAN MODE query
+FULLTEXT_MIN_TOKEN = 3
+FULLTEXT_STOPWORDS = frozenset(
+    'a about an are as at be by com de en for from how i in is it la of on or '
+    'that the this to was what when where who will with und www'.split()
+)
+
+# Seconds between background recounts of dashboard_stats (0 disables)
+STATS_RECONCILE_INTERVAL = int(os.environ.get('STATS_RECONCILE_INTERVAL', 0))
+
+# Seconds between background overdue sweeps (0 disables) and loans per chunk
+OVERDUE_SWEEP_INTERVAL = int(os.environ.get('OVERDUE_SWEEP_INTERVAL', 0))
+OVERDUE_SWEEP_CHUNK = int(os.environ.get('OVERDUE_SWEEP_CHUNK', 500))
+
+# Notification push stream: seconds between heartbeats and between polls for
+# new rows, events buffered per client, and concurrent streams per process
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', 15))
+SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', 1))
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 1000))
+
+# Seconds a ?token= for the notification stream stays valid; it is only
+# needed to open or reconnect the stream, and it ends up in access logs
+SSE_TOKEN_TTL = int(os.environ.get('SSE_TOKEN_TTL', 60))
+
+notification_hub = NotificationHub(
+    db_pool.acquire,
+    poll_interval=SSE_POLL_INTERVAL,
+    queue_size=SSE_QUEUE_SIZE,
+    max_clients=SSE_MAX_CLIENTS
+)
+
+# Password hashing: the dedicated bcrypt worker pool
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', os.cpu_count() or 2))
+BCRYPT_QUEUE_SIZE = int(os.environ.get('BCRYPT_QUEUE_SIZE', 64))
+BCRYPT_TIMEOUT = float(os.environ.get('BCRYPT_TIMEOUT', 5))
+
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    workers=BCRYPT_WORKERS,
+    queue_size=BCRYPT_QUEUE_SIZE,
+    timeout=BCRYPT_TIMEOUT,
+    observer=observe_bcrypt
+)
 
 # JWT configuration
 JWT_SECRET_KEY = 'your-jwt-secret-key'
 JWT_ALGORITHM = 'HS256'
 
+# Verified-token cache: claims of recently verified JWTs, keyed by token digest
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 300))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 10000))
+
+token_cache = TTLCache(
+    ttl=TOKEN_CACHE_TTL,
+    max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    max_bytes=TOKEN_CACHE_MAX_ENTRIES * 1024
+)
+
+# Component counters exported as gauges alongside the request metrics
+metrics.collect('db_pool', db_pool.stats)
+metrics.collect('catalog_cache', catalog_cache.stats)
+metrics.collect('token_cache', token_cache.stats)
+metrics.collect('password_hasher', password_hasher.stats)
+metrics.collect('notification_hub', notification_hub.stats)
+
 def get_db_connection():
-    """Create database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+    """Check out a pooled database connection for the current request.
+
+    The connection is kept on flask.g so that calling close() returns it to
+    the pool, and anything a route forgot to close is returned in teardown.
+    """
+    connection = g.get('db_connection')
+    if connection is not None and not connection.released:
         return connection
+    started = time.perf_counter()
+    try:
+        connection = db_pool.acquire()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
+    finally:
+        wait = time.perf_counter() - started
+        pool_wait_seconds.observe(wait)
+        g.pool_wait = g.get('pool_wait', 0.0) + wait
+    g.db_connection = connection
+    return connection
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    """Return the request's connection to the pool, even if the route errored"""
+    connection = g.pop('db_connection', None)
+    if connection is not None:
+        connection.close()
+
+def decode_token(token):
+    """Return the claims of a valid JWT, verifying each distinct token only once.
+
+    Claims are cached by SHA-256 digest of the token, never past the token's
+    own exp. Raises jwt.InvalidTokenError for bad tokens, which are not cached.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        ttl = TOKEN_CACHE_TTL
+        if 'exp' in claims:
+            ttl = min(ttl, claims['exp'] - time.time())
+        if ttl > 0:
+            token_cache.set(key, claims, ttl=ttl)
+    return claims
+
+def verify_token(token):
+    """decode_token, recording the time spent in g.auth_ms for Server-Timing"""
+    started = time.perf_counter()
+    try:
+        return decode_token(token)
+    finally:
+        g.auth_ms = (time.perf_counter() - started) * 1000
+
+def get_request_claims():
+    """Claims from the request's bearer token, or None if missing or invalid"""
+    token = request.headers.get('Authorization')
+    if not token:
+        return None
+    if token.startswith('Bearer '):
+        token = token[7:]
+    try:
+        return verify_token(token)
+    except jwt.InvalidTokenError:
+        return None
 
 def token_required(f):
     """Decorator to require JWT token"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
+        if not request.headers.get('Authorization'):
             return jsonify({'message': 'Token is missing'}), 401
         
-        try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            current_user_id = data['user_id']
-        except:
+        data = get_request_claims()
+        if not data or 'user_id' not in data:
             return jsonify({'message': 'Token is invalid'}), 401
         
-        return f(current_user_id, *args, **kwargs)
+        return f(data['user_id'], *args, **kwargs)
     return decorated
 
 def admin_required(f):
     """Decorator to require admin privileges"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
+        if not request.headers.get('Authorization'):
             return jsonify({'message': 'Token is missing'}), 401
         
-        try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            if data.get('role') != 'admin':
-                return jsonify({'message': 'Admin privileges required'}), 403
-        except:
+        data = get_request_claims()
+        if not data:
             return jsonify({'message': 'Token is invalid'}), 401
+        if data.get('role') != 'admin':
+            return jsonify({'message': 'Admin privileges required'}), 403
         
         return f(*args, **kwargs)
     return decorated
 
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+@app.after_request
+def add_server_timing(response):
+    """Report time spent authenticating, waiting for the pool and in SQL as Server-Timing metrics"""
+    auth_ms = g.get('auth_ms')
+    if auth_ms is not None:
+        response.headers.add('Server-Timing', f'auth;dur={auth_ms:.3f}')
+    pool_wait = g.get('pool_wait')
+    if pool_wait is not None:
+        response.headers.add('Server-Timing', f'pool;dur={pool_wait * 1000:.3f}')
+    if g.get('db_queries'):
+        response.headers.add('Server-Timing', f'db;dur={g.db_seconds * 1000:.3f};desc="{g.db_queries} queries"')
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency, SQL count and DB time for the route that served the request"""
+    started = g.get('request_started')
+    if started is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_seconds.observe(time.perf_counter() - started, route, request.method, str(response.status_code))
+    request_queries.observe(g.db_queries, route)
+    request_db_seconds.observe(g.db_seconds, route)
+    if response.status_code >= 500 and not response.is_streamed:
+        # Routes answer failures with {'message': str(e)}; keep a server-side record
+        body = response.get_json(silent=True) or {}
+        app.logger.error('%s %s failed with %s: %s', request.method, request.path,
+                         response.status_code, body.get('message'))
+    return response
+
+def invalidate_book_cache(book_id, listing_changed=False):
+    """Drop cached entries containing a book.
+
+    Stock changes only touch the book's own row and the pages it appears on;
+    pass listing_changed when titles or membership change so every page goes.
+    """
+    catalog_cache.invalidate_tag(('book', int(book_id)))
+    if listing_changed:
+        catalog_cache.invalidate_tag('pages')
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Liveness probe with connection pool and cache statistics"""
+    return jsonify({
+        'status': 'ok',
+        'pool': db_pool.stats(),
+        'catalog_cache': catalog_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'token_cache': token_cache.stats(),
+        'notification_hub': notification_hub.stats()
+    }), 200
+
+def encode_cursor(*values):
+    """Encode a keyset position as an opaque URL-safe token"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    """Decode a token produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+def clamp_limit(value, default, maximum):
+    """Page size from a ?limit= value, clamped to [1, maximum]"""
+    try:
+        limit = int(value) if value else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit or default, maximum))
+
+def get_page_limit(default, maximum):
+    """Read ?limit= from the query string, clamped to [1, maximum]"""
+    return clamp_limit(request.args.get('limit'), default, maximum)
+
+def like_prefix(text):
+    """LIKE pattern matching values that start with text, wildcards escaped"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def payload_etag(payload):
+    """Strong ETag over the canonical JSON form of a response payload"""
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def to_http_date(epoch):
+    """Aware UTC datetime for Last-Modified from a UNIX_TIMESTAMP() column.
+
+    Naive TIMESTAMP values are in the MySQL session's time zone, not ours, so
+    the database does the conversion.
+    """
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(int(epoch), timezone.utc)
+
+def client_is_current(etag, last_modified=None):
+    """True when If-None-Match / If-Modified-Since show the client's copy is current.
+
+    If-None-Match takes precedence over If-Modified-Since as per RFC 9110.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+def conditional_response(payload, etag, last_modified=None):
+    """Return 304 when the client's copy is current, otherwise the JSON payload"""
+    if client_is_current(etag, last_modified):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def hasher_unavailable_response(e):
+    """503 for requests turned away by the saturated password hasher"""
+    response = jsonify({'message': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # Authentication Routes
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -97,7 +442,7 @@ def register():
             return jsonify({'message': 'Missing required fields'}), 400
         
         # Hash password
-        hashed_password = hashpw(password.encode('utf-8'), gensalt()).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
         
         connection = get_db_connection()
         if not connection:
@@ -135,6 +480,8 @@ def register():
             'user_id': user_id
         }), 201
         
+    except PasswordHasherUnavailable as e:
+        return hasher_unavailable_response(e)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -159,9 +506,17 @@ def login():
         cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
         user = cursor.fetchone()
         
-        if not user or not checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        if not user or not password_hasher.check(password, user['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with an older cost factor while we have the plaintext
+        if password_hasher.needs_rehash(user['password']):
+            cursor.execute(
+                "UPDATE users SET password = %s WHERE user_id = %s",
+                (password_hasher.hash(password), user['user_id'])
+            )
+            connection.commit()
+        
         # Generate JWT token
         token = jwt.encode({
             'user_id': user['user_id'],
@@ -183,6 +538,8 @@ def login():
             }
         }), 200
         
+    except PasswordHasherUnavailable as e:
+        return hasher_unavailable_response(e)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -229,7 +586,7 @@ def admin_register():
             return jsonify({'message': 'Admin with this email already exists'}), 409
         
         # Hash password
-        hashed_password = hashpw(password.encode('utf-8'), gensalt()).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
         
         # Insert new admin
         cursor.execute(
@@ -262,6 +619,8 @@ def admin_register():
             }
         }), 201
         
+    except PasswordHasherUnavailable as e:
+        return hasher_unavailable_response(e)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -286,9 +645,17 @@ def admin_login():
         cursor.execute("SELECT * FROM admin WHERE email = %s", (email,))
         admin = cursor.fetchone()
         
-        if not admin or not checkpw(password.encode('utf-8'), admin['password'].encode('utf-8')):
+        if not admin or not password_hasher.check(password, admin['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with an older cost factor while we have the plaintext
+        if password_hasher.needs_rehash(admin['password']):
+            cursor.execute(
+                "UPDATE admin SET password = %s WHERE admin_id = %s",
+                (password_hasher.hash(password), admin['admin_id'])
+            )
+            connection.commit()
+        
         # Generate JWT token
         token = jwt.encode({
             'admin_id': admin['admin_id'],
@@ -309,14 +676,133 @@ def admin_login():
             }
         }), 200
         
+    except PasswordHasherUnavailable as e:
+        return hasher_unavailable_response(e)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 # Book Routes
+# Columns shared by every catalog read; the async app selects the same shape
+BOOK_COLUMNS = """
+    b.book_id,
+    b.isbn,
+    b.title,
+    b.subtitle,
+    b.description,
+    b.language,
+    b.page_count,
+    b.edition,
+    b.publication_date,
+    b.price,
+    b.stock,
+    b.available_stock,
+    b.location,
+    b.cover_image,
+    b.digital_copy_url,
+    b.is_digital,
+    b.is_featured,
+    CASE 
+        WHEN b.available_stock > 0 THEN TRUE 
+        ELSE FALSE 
+    END as is_available,
+    b.available_stock as available_copies"""
+
+BOOK_QUERY = f"""
+    SELECT {BOOK_COLUMNS},
+        b.updated_at,
+        UNIX_TIMESTAMP(b.updated_at) AS updated_epoch
+    FROM books b
+    WHERE b.book_id = %s AND b.is_active = 1
+"""
+
+def books_page_filters(args):
+    """(featured, category) from the ?featured=1 and ?category=<name> arguments"""
+    featured = args.get('featured') in ('1', 'true')
+    category = (args.get('category') or '').strip() or None
+    return featured, category
+
+def books_page_query(after, limit, featured=False, category=None):
+    """SQL and parameters for one keyset page of GET /api/books.
+
+    featured keeps only featured books and category only books in the named
+    category. Raises ValueError for a malformed ?after= cursor.
+    """
+    filters = ""
+    params = []
+    if featured:
+        filters += " AND b.is_featured = 1"
+    if category:
+        filters += """ AND EXISTS (
+            SELECT 1 FROM book_categories bc
+            JOIN categories c ON c.category_id = bc.category_id
+            WHERE bc.book_id = b.book_id AND c.name = %s)"""
+        params.append(category)
+    if after:
+        after_title, after_id = decode_cursor(after, 2)
+        filters += " AND (b.title > %s OR (b.title = %s AND b.book_id > %s))"
+        params += [after_title, after_title, after_id]
+    params.append(limit + 1)
+    sql = f"""
+        SELECT {BOOK_COLUMNS},
+            b.updated_at
+        FROM books b
+        WHERE b.is_active = 1{filters}
+        ORDER BY b.title, b.book_id
+        LIMIT %s
+    """
+    return sql, params
+
+def books_page_entry(books, limit):
+    """Build the cached page entry and its tags from up to limit + 1 rows.
+
+    Pages carry no Last-Modified: the newest updated_at on a page does not
+    move when a book is deleted or another slides onto it. The ETag does.
+    """
+    next_cursor = None
+    if len(books) > limit:
+        books = books[:limit]
+        next_cursor = encode_cursor(books[-1]['title'], books[-1]['book_id'])
+    
+    page = {'books': books, 'next_cursor': next_cursor}
+    entry = {
+        'page': page,
+        'etag': payload_etag(page),
+        'last_modified': None
+    }
+    tags = [('book', book['book_id']) for book in books] + ['pages']
+    return entry, tags
+
+def book_entry(book):
+    """Build the cached entry for a single book row"""
+    last_modified = to_http_date(book.pop('updated_epoch'))
+    return {
+        'book': book,
+        'etag': payload_etag({'book': book}),
+        'last_modified': last_modified
+    }
+
 @app.route('/api/books', methods=['GET'])
 def get_books():
-    """Get all books with availability"""
+    """Get one page of books with availability, ordered by title.
+
+    Pass the returned next_cursor as ?after= to fetch the following page.
+    ?featured=1 and ?category=<name> narrow the listing on the server.
+    """
     try:
+        limit = get_page_limit(BOOKS_PAGE_DEFAULT, BOOKS_PAGE_MAX)
+        after = request.args.get('after')
+        featured, category = books_page_filters(request.args)
+        try:
+            sql, params = books_page_query(after, limit, featured, category)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        cache_key = ('page', after or '', limit, featured, category)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            return conditional_response(cached['page'], cached['etag'], cached['last_modified'])
+        generation = catalog_cache.generation
+
         connection = get_db_connection()
         if not connection:
             return jsonify({'message': 'Database connection failed'}), 500
@@ -324,41 +810,17 @@ def get_books():
         cursor = connection.cursor(dictionary=True)
         
         # Get books with availability
-        cursor.execute("""
-            SELECT 
-                b.book_id,
-                b.isbn,
-                b.title,
-                b.subtitle,
-                b.description,
-                b.language,
-                b.page_count,
-                b.edition,
-                b.publication_date,
-                b.price,
-                b.stock,
-                b.available_stock,
-                b.location,
-                b.cover_image,
-                b.digital_copy_url,
-                b.is_digital,
-                b.is_featured,
-                CASE 
-                    WHEN b.available_stock > 0 THEN TRUE 
-                    ELSE FALSE 
-                END as is_available,
-                b.available_stock as available_copies
-            FROM books b
-            WHERE b.is_active = 1
-            ORDER BY b.title
-        """)
+        cursor.execute(sql, params)
         
         books = cursor.fetchall()
         
         cursor.close()
         connection.close()
         
-        return jsonify({'books': books}), 200
+        entry, tags = books_page_entry(books, limit)
+        catalog_cache.set(cache_key, entry, tags=tags, generation=generation)
+        
+        return conditional_response(entry['page'], entry['etag'], entry['last_modified'])
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -367,39 +829,19 @@ def get_books():
 def get_book(book_id):
     """Get a specific book"""
     try:
+        cache_key = ('book', book_id)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            return conditional_response({'book': cached['book']}, cached['etag'], cached['last_modified'])
+        generation = catalog_cache.generation
+        
         connection = get_db_connection()
         if not connection:
             return jsonify({'message': 'Database connection failed'}), 500
         
         cursor = connection.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT 
-                b.book_id,
-                b.isbn,
-                b.title,
-                b.subtitle,
-                b.description,
-                b.language,
-                b.page_count,
-                b.edition,
-                b.publication_date,
-                b.price,
-                b.stock,
-                b.available_stock,
-                b.location,
-                b.cover_image,
-                b.digital_copy_url,
-                b.is_digital,
-                b.is_featured,
-                CASE 
-                    WHEN b.available_stock > 0 THEN TRUE 
-                    ELSE FALSE 
-                END as is_available,
-                b.available_stock as available_copies
-            FROM books b
-            WHERE b.book_id = %s AND b.is_active = 1
-        """, (book_id,))
+        cursor.execute(BOOK_QUERY, (book_id,))
         
         book = cursor.fetchone()
         
@@ -409,61 +851,197 @@ def get_book(book_id):
         cursor.close()
         connection.close()
         
-        return jsonify({'book': book}), 200
+        entry = book_entry(book)
+        catalog_cache.set(cache_key, entry, tags=[cache_key], generation=generation)
+        
+        return conditional_response({'book': book}, entry['etag'], entry['last_modified'])
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+def books_batch_query(ids):
+    """SQL and parameters reading the given books (active only) in one IN query"""
+    placeholders = ', '.join(['%s'] * len(ids))
+    sql = f"""
+        SELECT {BOOK_COLUMNS},
+            b.updated_at,
+            UNIX_TIMESTAMP(b.updated_at) AS updated_epoch
+        FROM books b
+        WHERE b.book_id IN ({placeholders}) AND b.is_active = 1
+    """
+    return sql, list(ids)
+
+def cached_book_entries(ids):
+    """Split ids into cached book entries (by id) and the ids still to be read"""
+    entries = {}
+    for book_id in ids:
+        cached = catalog_cache.get(('book', book_id))
+        if cached is not None:
+            entries[book_id] = cached
+    return entries, [book_id for book_id in ids if book_id not in entries]
+
+def cache_book_rows(entries, books, generation):
+    """Cache freshly read book rows as get_book() would and add them to entries"""
+    for book in books:
+        entry = book_entry(book)
+        cache_key = ('book', book['book_id'])
+        catalog_cache.set(cache_key, entry, tags=[cache_key], generation=generation)
+        entries[book['book_id']] = entry
+
+def books_batch_payload(ids, entries):
+    """Books in request order plus missing ids, with an ETag.
+
+    No Last-Modified: a book that was deleted only shows up as missing.
+    """
+    found = [entries[book_id] for book_id in ids if book_id in entries]
+    payload = {
+        'books': [entry['book'] for entry in found],
+        'missing': [book_id for book_id in ids if book_id not in entries]
+    }
+    etag = payload_etag([[entry['etag'] for entry in found], payload['missing']])
+    return payload, etag
+
+@app.route('/api/books/batch', methods=['GET', 'POST'])
+def get_books_batch():
+    """Get many books by id in one request.
+
+    GET /api/books/batch?ids=3,1,2 or POST {"ids": [3, 1, 2]}. Books come back
+    in the requested order, with the same fields as GET /api/books/<id>; ids
+    that do not exist (or are inactive) are listed under "missing". Books in
+    the catalog cache are served from it and the rest are read with one query.
+    """
+    try:
+        if request.method == 'POST':
+            values = (request.get_json(silent=True) or {}).get('ids')
+        else:
+            raw = request.args.get('ids', '')
+            values = [v for v in raw.split(',') if v.strip()] or None
+        ids, error = parse_id_list(values, BOOKS_BATCH_MAX)
+        if error:
+            return jsonify({'message': error}), 400
+        
+        entries, pending = cached_book_entries(ids)
+        if pending:
+            generation = catalog_cache.generation
+            
+            connection = get_db_connection()
+            if not connection:
+                return jsonify({'message': 'Database connection failed'}), 500
+            
+            cursor = connection.cursor(dictionary=True)
+            sql, params = books_batch_query(pending)
+            cursor.execute(sql, params)
+            books = cursor.fetchall()
+            cursor.close()
+            connection.close()
+            
+            cache_book_rows(entries, books, generation)
+        
+        payload, etag = books_batch_payload(ids, entries)
+        return conditional_response(payload, etag)
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+def build_fulltext_query(query):
+    """Turn free text into a BOOLEAN MODE query that requires every word as a prefix"""
+    words = [w for w in re.findall(r'\w+', query.lower())
+             if len(w) >= FULLTEXT_MIN_TOKEN and w not in FULLTEXT_STOPWORDS]
+    return ' '.join(f'+{w}*' for w in words)
+
+def search_query(query, limit, after=None):
+    """SQL and parameters for one keyset page of ranked search results.
+
+    after is the next_cursor of the previous page, a (relevance, title,
+    book_id) position in the result order. Raises ValueError if malformed.
+    """
+    fulltext_query = build_fulltext_query(query)
+    if fulltext_query:
+        relevance = """(2 * MATCH(b.title) AGAINST (%s IN BOOLEAN MODE)
+            + MATCH(b.title, b.subtitle, b.description, b.search_keywords) AGAINST (%s IN BOOLEAN MODE))"""
+        condition = "MATCH(b.title, b.subtitle, b.description, b.search_keywords) AGAINST (%s IN BOOLEAN MODE)"
+        params = [fulltext_query, fulltext_query, fulltext_query]
+    else:
+        # Only words shorter than the FULLTEXT token size: fall back to a title prefix seek
+        relevance = "0"
+        condition = "b.title LIKE %s"
+        params = [like_prefix(query)]
+    keyset = ""
+    if after:
+        after_relevance, after_title, after_id = decode_cursor(after, 3)
+        if not (isinstance(after_relevance, (int, float)) and isinstance(after_title, str)
+                and isinstance(after_id, int)):
+            raise ValueError('Invalid cursor')
+        keyset = """
+        HAVING relevance < %s
+            OR (relevance = %s AND (b.title > %s OR (b.title = %s AND b.book_id > %s)))"""
+        params += [after_relevance, after_relevance, after_title, after_title, after_id]
+    params.append(limit + 1)
+    sql = f"""
+        SELECT {BOOK_COLUMNS},
+            {relevance} as relevance
+        FROM books b
+        WHERE b.is_active = 1 AND {condition}{keyset}
+        ORDER BY relevance DESC, b.title, b.book_id
+        LIMIT %s
+    """
+    return sql, params
+
+def search_page(books, limit):
+    """Trim the extra look-ahead row and build the search response payload"""
+    next_cursor = None
+    if len(books) > limit:
+        books = books[:limit]
+        last = books[-1]
+        next_cursor = encode_cursor(last['relevance'], last['title'], last['book_id'])
+    return {'books': books, 'next_cursor': next_cursor}
+
+def refresh_book_search_keywords(cursor, book_id):
+    """Copy a book's author and category names into its FULLTEXT-indexed keywords"""
+    cursor.execute("""
+        UPDATE books b
+        SET b.search_keywords = CONCAT_WS(' ',
+            (SELECT GROUP_CONCAT(a.name SEPARATOR ' ')
+             FROM book_authors ba JOIN authors a ON ba.author_id = a.author_id
+             WHERE ba.book_id = b.book_id),
+            (SELECT GROUP_CONCAT(c.name SEPARATOR ' ')
+             FROM book_categories bc JOIN categories c ON bc.category_id = c.category_id
+             WHERE bc.book_id = b.book_id))
+        WHERE b.book_id = %s
+    """, (book_id,))
+
 @app.route('/api/books/search', methods=['GET'])
 def search_books():
-    """Search books by title or author"""
+    """Search books by title, subtitle, description, author or category.
+
+    Results are ranked by FULLTEXT relevance (title matches weigh double) and
+    paginated with ?limit= and the returned next_cursor as ?after=.
+    """
     try:
-        query = request.args.get('q', '')
+        query = request.args.get('q', '').strip()
         if not query:
             return jsonify({'message': 'Search query required'}), 400
         
+        limit = get_page_limit(SEARCH_PAGE_DEFAULT, SEARCH_PAGE_MAX)
+        try:
+            sql, params = search_query(query, limit, request.args.get('after'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         connection = get_db_connection()
         if not connection:
             return jsonify({'message': 'Database connection failed'}), 500
         
         cursor = connection.cursor(dictionary=True)
         
-        search_term = f"%{query}%"
-        cursor.execute("""
-            SELECT 
-                b.book_id,
-                b.isbn,
-                b.title,
-                b.subtitle,
-                b.description,
-                b.language,
-                b.page_count,
-                b.edition,
-                b.publication_date,
-                b.price,
-                b.stock,
-                b.available_stock,
-                b.location,
-                b.cover_image,
-                b.digital_copy_url,
-                b.is_digital,
-                b.is_featured,
-                CASE 
-                    WHEN b.available_stock > 0 THEN TRUE 
-                    ELSE FALSE 
-                END as is_available,
-                b.available_stock as available_copies
-            FROM books b
-            WHERE b.is_active = 1 AND (b.title LIKE %s OR b.description LIKE %s)
-            ORDER BY b.title
-        """, (search_term, search_term))
+        cursor.execute(sql, params)
         
         books = cursor.fetchall()
         
         cursor.close()
         connection.close()
         
-        return jsonify({'books': books}), 200
+        return jsonify(search_page(books, limit)), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -487,21 +1065,18 @@ def issue_book(current_user_id):
         
         cursor = connection.cursor()
         
-        # Check if book is available
-        cursor.execute("""
-            SELECT (b.stock - COALESCE(issued_count.issued_books, 0)) as available_copies
-            FROM books b
-            LEFT JOIN (
-                SELECT book_id, COUNT(*) as issued_books
-                FROM issues 
-                WHERE status = 'issued'
-                GROUP BY book_id
-            ) issued_count ON b.book_id = issued_count.book_id
-            WHERE b.book_id = %s
-        """, (book_id,))
+        # Lock the book row so concurrent requests for the last copy queue up
+        # here instead of both passing the check. The after_book_issued trigger
+        # decrements available_stock when the issue row is inserted below.
+        connection.start_transaction()
+        cursor.execute(
+            "SELECT available_stock FROM books WHERE book_id = %s AND is_active = 1 FOR UPDATE",
+            (book_id,)
+        )
         
         result = cursor.fetchone()
         if not result or result[0] <= 0:
+            connection.rollback()
             return jsonify({'message': 'Book not available'}), 400
         
         # Issue the book
@@ -517,6 +1092,8 @@ def issue_book(current_user_id):
         cursor.close()
         connection.close()
         
+        invalidate_book_cache(book_id)
+        
         return jsonify({
             'message': 'Book issued successfully',
             'issue_id': issue_id,
@@ -563,6 +1140,8 @@ def return_book(current_user_id, issue_id):
         cursor.close()
         connection.close()
         
+        invalidate_book_cache(issue['book_id'])
+        
         return jsonify({
             'message': 'Book returned successfully',
             'fine': fine_amount,
@@ -572,6 +1151,195 @@ def return_book(current_user_id, issue_id):
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+def parse_id_list(values, maximum=BATCH_CIRCULATION_MAX):
+    """Validate a JSON list of ids for the batch routes.
+
+    Returns (ids, error message); duplicates are dropped, order is kept.
+    """
+    if not isinstance(values, list) or not values:
+        return None, 'A non-empty list of IDs is required'
+    if len(values) > maximum:
+        return None, f'At most {maximum} IDs per request'
+    try:
+        ids = [int(v) for v in values]
+    except (TypeError, ValueError):
+        return None, 'IDs must be integers'
+    return list(dict.fromkeys(ids)), None
+
+@app.route('/api/admin/issues/batch', methods=['POST'])
+@admin_required
+def batch_issue_books():
+    """Issue a stack of books to one user in a single transaction (Admin only).
+
+    Body: {"user_id": 7, "book_ids": [1, 2, 3], "due_days": 30}. The books
+    are locked with one SELECT ... FOR UPDATE and issued with one multi-row
+    INSERT; books that are missing or out of stock are reported per item.
+    """
+    try:
+        data = request.get_json() or {}
+        user_id = data.get('user_id')
+        due_days = data.get('due_days', 30)
+        
+        if not user_id:
+            return jsonify({'message': 'User ID required'}), 400
+        book_ids, error = parse_id_list(data.get('book_ids'))
+        if error:
+            return jsonify({'message': error}), 400
+        
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'message': 'Database connection failed'}), 500
+        
+        cursor = connection.cursor(dictionary=True)
+        connection.start_transaction()
+        
+        cursor.execute(
+            "SELECT user_id, @@auto_increment_increment AS step FROM users WHERE user_id = %s AND is_active = 1",
+            (user_id,)
+        )
+        user = cursor.fetchone()
+        if not user:
+            connection.rollback()
+            return jsonify({'message': 'User not found'}), 404
+        
+        # Same locking as issue_book, one statement for the whole stack. The
+        # after_book_issued trigger decrements available_stock per inserted row.
+        placeholders = ', '.join(['%s'] * len(book_ids))
+        cursor.execute(
+            f"SELECT book_id, available_stock FROM books WHERE book_id IN ({placeholders}) AND is_active = 1 FOR UPDATE",
+            book_ids
+        )
+        stock = {row['book_id']: row['available_stock'] for row in cursor.fetchall()}
+        
+        results = []
+        issued = []
+        for book_id in book_ids:
+            if book_id not in stock:
+                results.append({'book_id': book_id, 'error': 'Book not found'})
+            elif stock[book_id] <= 0:
+                results.append({'book_id': book_id, 'error': 'Book not available'})
+            else:
+                result = {'book_id': book_id}
+                results.append(result)
+                issued.append(result)
+        
+        if not issued:
+            connection.rollback()
+            return jsonify({
+                'message': 'No books issued',
+                'issued': 0,
+                'failed': len(results),
+                'results': results
+            }), 400
+        
+        issue_date = datetime.now().date()
+        due_date = (datetime.now() + timedelta(days=due_days)).date()
+        cursor.execute(
+            "INSERT INTO issues (user_id, book_id, issue_date, due_date, status) VALUES "
+            + ', '.join(["(%s, %s, %s, %s, 'issued')"] * len(issued)),
+            [v for result in issued for v in (user_id, result['book_id'], issue_date, due_date)]
+        )
+        for result, issue_id in zip(issued, inserted_ids(cursor, len(issued), user['step'])):
+            result['issue_id'] = issue_id
+            result['due_date'] = due_date.isoformat()
+        
+        connection.commit()
+        
+        cursor.close()
+        connection.close()
+        
+        for result in issued:
+            invalidate_book_cache(result['book_id'])
+        
+        return jsonify({
+            'message': f'Issued {len(issued)} of {len(results)} books',
+            'issued': len(issued),
+            'failed': len(results) - len(issued),
+            'results': results
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@app.route('/api/admin/issues/return', methods=['PUT'])
+@admin_required
+def batch_return_books():
+    """Return a cart of issued books in a single transaction (Admin only).
+
+    Body: {"issue_ids": [10, 11, 12]}. Fines are computed in SQL by one
+    set-based UPDATE; ids that do not exist or are not currently issued are
+    reported per item.
+    """
+    try:
+        data = request.get_json() or {}
+        issue_ids, error = parse_id_list(data.get('issue_ids'))
+        if error:
+            return jsonify({'message': error}), 400
+        
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'message': 'Database connection failed'}), 500
+        
+        cursor = connection.cursor(dictionary=True)
+        connection.start_transaction()
+        
+        placeholders = ', '.join(['%s'] * len(issue_ids))
+        cursor.execute(
+            f"""SELECT issue_id, book_id, status, GREATEST(DATEDIFF(CURDATE(), due_date), 0) AS days_overdue
+               FROM issues WHERE issue_id IN ({placeholders}) FOR UPDATE""",
+            issue_ids
+        )
+        issues = {row['issue_id']: row for row in cursor.fetchall()}
+        
+        results = []
+        returned = []
+        for issue_id in issue_ids:
+            issue = issues.get(issue_id)
+            if not issue:
+                results.append({'issue_id': issue_id, 'error': 'Issue not found'})
+            elif issue['status'] != 'issued':
+                results.append({'issue_id': issue_id, 'error': f"Issue is {issue['status']}, not issued"})
+            else:
+                days_overdue = int(issue['days_overdue'])
+                results.append({
+                    'issue_id': issue_id,
+                    'book_id': issue['book_id'],
+                    'fine': days_overdue * 1.00,  # $1 per day overdue
+                    'days_overdue': days_overdue
+                })
+                returned.append(issue)
+        
+        if returned:
+            # The rows are locked above, so this touches exactly the issues
+            # reported as returned; after_book_returned restocks each book
+            placeholders = ', '.join(['%s'] * len(returned))
+            cursor.execute(
+                f"""UPDATE issues
+                   SET return_date = CURDATE(), status = 'returned',
+                       fine = GREATEST(DATEDIFF(CURDATE(), due_date), 0) * 1.00
+                   WHERE issue_id IN ({placeholders}) AND status = 'issued'""",
+                [issue['issue_id'] for issue in returned]
+            )
+        
+        connection.commit()
+        
+        cursor.close()
+        connection.close()
+        
+        for book_id in {issue['book_id'] for issue in returned}:
+            invalidate_book_cache(book_id)
+        
+        return jsonify({
+            'message': f'Returned {len(returned)} of {len(results)} books',
+            'returned': len(returned),
+            'failed': len(results) - len(returned),
+            'total_fine': sum(r.get('fine', 0) for r in results),
+            'results': results
+        }), 200 if returned else 400
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
 @app.route('/api/issues/user/<int:user_id>', methods=['GET'])
 @token_required
 def get_user_issues(current_user_id, user_id):
@@ -618,6 +1386,9 @@ def get_user_issues(current_user_id, user_id):
         return jsonify({'message': str(e)}), 500
 
 # Feedback Routes
+# book_rating_stats histogram column for each accepted rating
+RATING_STAR_COLUMNS = {1: 'stars_1', 2: 'stars_2', 3: 'stars_3', 4: 'stars_4', 5: 'stars_5'}
+
 @app.route('/api/feedback', methods=['POST'])
 @token_required
 def add_feedback(current_user_id):
@@ -631,7 +1402,8 @@ def add_feedback(current_user_id):
         if not all([book_id, rating]):
             return jsonify({'message': 'Book ID and rating required'}), 400
         
-        if not (1 <= rating <= 5):
+        # bool is a subclass of int, so a JSON true would otherwise pass as 1
+        if not isinstance(rating, int) or isinstance(rating, bool) or rating not in RATING_STAR_COLUMNS:
             return jsonify({'message': 'Rating must be between 1 and 5'}), 400
         
         connection = get_db_connection()
@@ -653,9 +1425,21 @@ def add_feedback(current_user_id):
             "INSERT INTO feedback (user_id, book_id, rating, comment) VALUES (%s, %s, %s, %s)",
             (current_user_id, book_id, rating, comment)
         )
+        feedback_id = cursor.lastrowid
+        
+        # Fold the rating into the book's aggregates in the same transaction
+        stars = RATING_STAR_COLUMNS[rating]
+        cursor.execute(f"""
+            INSERT INTO book_rating_stats (book_id, rating_sum, rating_count, {stars}, last_feedback_id)
+            VALUES (%s, %s, 1, 1, %s)
+            ON DUPLICATE KEY UPDATE
+                rating_sum = rating_sum + VALUES(rating_sum),
+                rating_count = rating_count + 1,
+                {stars} = {stars} + 1,
+                last_feedback_id = GREATEST(COALESCE(last_feedback_id, 0), VALUES(last_feedback_id))
+        """, (book_id, rating, feedback_id))
         
         connection.commit()
-        feedback_id = cursor.lastrowid
         
         cursor.close()
         connection.close()
@@ -684,12 +1468,19 @@ def get_me(current_user_id):
             WHERE user_id = %s
         """, (current_user_id,))
         user = cursor.fetchone()
-        cursor.close(); connection.close()
         if not user:
             return jsonify({'message': 'User not found'}), 404
+        loan = get_user_loan_stats(connection, cursor, [current_user_id]).get(current_user_id, {})
+        cursor.close(); connection.close()
         # Format
         user['created_at'] = user['created_at'].strftime('%Y-%m-%d') if user.get('created_at') else None
         user['status'] = 'active' if user.get('is_active') else 'inactive'
+        user['loans'] = {
+            'total_borrowed': loan.get('total_borrowed') or 0,
+            'current_loans': loan.get('current_loans') or 0,
+            'overdue_loans': loan.get('overdue_loans') or 0,
+            'unpaid_fines': float(loan['unpaid_fines']) if loan.get('unpaid_fines') else 0
+        }
         return jsonify({'user': user}), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -731,7 +1522,7 @@ def update_me(current_user_id):
         if phone is not None:
             fields.append('phone = %s'); values.append(phone)
         if new_password:
-            hashed = hashpw(new_password.encode('utf-8'), gensalt()).decode('utf-8')
+            hashed = password_hasher.hash(new_password)
             fields.append('password = %s'); values.append(hashed)
 
         if not fields:
@@ -743,71 +1534,149 @@ def update_me(current_user_id):
         connection.commit()
         cursor.close(); connection.close()
         return jsonify({'message': 'Profile updated successfully'}), 200
+    except PasswordHasherUnavailable as e:
+        return hasher_unavailable_response(e)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+# Review list orders, newest or most helpful first; both are descending
+REVIEW_SORTS = {
+    'newest': 'f.created_at',
+    'helpful': 'f.helpful_votes'
+}
+
+RATING_STATS_QUERY = """
+    SELECT rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5,
+           last_feedback_id, updated_at
+    FROM book_rating_stats WHERE book_id = %s
+"""
+
+def rating_summary(stats):
+    """Average, count and 1-5 star histogram from a book_rating_stats row"""
+    count = stats['rating_count'] if stats else 0
+    return {
+        'average_rating': round(stats['rating_sum'] / count, 2) if count else 0,
+        'total_reviews': count,
+        'rating_histogram': {str(n): stats[f'stars_{n}'] if stats else 0 for n in range(1, 6)}
+    }
+
 @app.route('/api/feedback/book/<int:book_id>', methods=['GET'])
 def get_book_feedback(book_id):
-    """Get feedback for a specific book"""
+    """Get one page of reviews for a book with its rating summary.
+
+    Query parameters: sort (newest, helpful), limit, and after (the
+    next_cursor of the previous page). The summary comes from the
+    book_rating_stats row. The ETag is a hash of the whole payload: the stats
+    row does not change when a review gets a helpful vote or a reviewer is
+    renamed, so it cannot stand in for the page.
+    """
     try:
+        sort = request.args.get('sort', 'newest')
+        if sort not in REVIEW_SORTS:
+            return jsonify({'message': f"sort must be one of {', '.join(REVIEW_SORTS)}"}), 400
+        column = REVIEW_SORTS[sort]
+        limit = get_page_limit(REVIEWS_PAGE_DEFAULT, REVIEWS_PAGE_MAX)
+        
+        params = [book_id]
+        keyset = ""
+        after = request.args.get('after')
+        if after:
+            try:
+                cursor_sort, after_value, after_id = decode_cursor(after, 3)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            if cursor_sort != sort:
+                return jsonify({'message': 'Cursor does not match sort'}), 400
+            keyset = f"AND ({column} < %s OR ({column} = %s AND f.feedback_id < %s))"
+            params += [after_value, after_value, after_id]
+        params.append(limit + 1)
+        
         connection = get_db_connection()
         if not connection:
             return jsonify({'message': 'Database connection failed'}), 500
         
         cursor = connection.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT 
-                f.feedback_id,
-                f.user_id,
-                u.name as user_name,
-                f.rating,
-                f.comment,
-                f.created_at
-            FROM feedback f
-            JOIN users u ON f.user_id = u.user_id
-            WHERE f.book_id = %s
-            ORDER BY f.created_at DESC
-        """, (book_id,))
-        
-        feedbacks = cursor.fetchall()
-        
-        # Calculate average rating
-        cursor.execute(
-            "SELECT AVG(rating) as avg_rating, COUNT(*) as total_reviews FROM feedback WHERE book_id = %s",
-            (book_id,)
-        )
+        cursor.execute(RATING_STATS_QUERY, (book_id,))
         stats = cursor.fetchone()
         
+        feedbacks = []
+        if stats and stats['rating_count']:
+            cursor.execute(f"""
+                SELECT 
+                    f.feedback_id,
+                    f.user_id,
+                    u.name as user_name,
+                    f.rating,
+                    f.comment,
+                    f.helpful_votes,
+                    f.created_at
+                FROM feedback f
+                JOIN users u ON f.user_id = u.user_id
+                WHERE f.book_id = %s {keyset}
+                ORDER BY {column} DESC, f.feedback_id DESC
+                LIMIT %s
+            """, params)
+            feedbacks = cursor.fetchall()
+        
         cursor.close()
         connection.close()
         
-        return jsonify({
-            'feedbacks': feedbacks,
-            'average_rating': float(stats['avg_rating']) if stats['avg_rating'] else 0,
-            'total_reviews': stats['total_reviews']
-        }), 200
+        next_cursor = None
+        if len(feedbacks) > limit:
+            feedbacks = feedbacks[:limit]
+            last = feedbacks[-1]
+            value = last['created_at'].strftime('%Y-%m-%d %H:%M:%S') if sort == 'newest' else last['helpful_votes']
+            next_cursor = encode_cursor(sort, value, last['feedback_id'])
+        
+        payload = {'feedbacks': feedbacks, 'next_cursor': next_cursor}
+        payload.update(rating_summary(stats))
+        return conditional_response(payload, payload_etag(payload))
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 # Notification Routes
+def get_unread_count(connection, user_id):
+    """Unread notifications for a user from the trigger-maintained counter"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT unread_count FROM user_notification_stats WHERE user_id = %s", (user_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return max(row[0], 0) if row else 0
+
 @app.route('/api/notifications/user/<int:user_id>', methods=['GET'])
 @token_required
 def get_user_notifications(current_user_id, user_id):
-    """Get notifications for a specific user"""
+    """Get one page of a user's notifications, newest first.
+
+    Pass the returned next_cursor as ?after= to fetch older notifications.
+    """
     try:
         # Users can only view their own notifications
         if current_user_id != user_id:
             return jsonify({'message': 'Access denied'}), 403
         
+        limit = get_page_limit(NOTIFICATIONS_PAGE_DEFAULT, NOTIFICATIONS_PAGE_MAX)
+        params = [user_id]
+        keyset = ""
+        after = request.args.get('after')
+        if after:
+            try:
+                after_date, after_id = decode_cursor(after, 2)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            keyset = "AND (send_date < %s OR (send_date = %s AND notification_id < %s))"
+            params += [after_date, after_date, after_id]
+        params.append(limit + 1)
+        
         connection = get_db_connection()
         if not connection:
             return jsonify({'message': 'Database connection failed'}), 500
         
         cursor = connection.cursor(dictionary=True)
         
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 notification_id,
                 message,
@@ -816,20 +1685,167 @@ def get_user_notifications(current_user_id, user_id):
                 due_date,
                 is_read
             FROM notifications
-            WHERE user_id = %s
-            ORDER BY send_date DESC
-        """, (user_id,))
+            WHERE user_id = %s {keyset}
+            ORDER BY send_date DESC, notification_id DESC
+            LIMIT %s
+        """, params)
         
         notifications = cursor.fetchall()
         
         cursor.close()
         connection.close()
         
-        return jsonify({'notifications': notifications}), 200
+        next_cursor = None
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            last = notifications[-1]
+            next_cursor = encode_cursor(last['send_date'].strftime('%Y-%m-%d %H:%M:%S'), last['notification_id'])
+        
+        return jsonify({'notifications': notifications, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@app.route('/api/notifications/user/<int:user_id>/unread-count', methods=['GET'])
+@token_required
+def get_unread_notification_count(current_user_id, user_id):
+    """Number of unread notifications, for badges polled by the dashboard"""
+    try:
+        if current_user_id != user_id:
+            return jsonify({'message': 'Access denied'}), 403
+        
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'message': 'Database connection failed'}), 500
+        
+        unread_count = get_unread_count(connection, user_id)
+        connection.close()
+        
+        return jsonify({'unread_count': unread_count}), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@app.route('/api/notifications/stream-token', methods=['POST'])
+@token_required
+def get_stream_token(current_user_id):
+    """Short-lived token for ?token= on the notification stream.
+
+    EventSource cannot send an Authorization header and query strings are
+    logged, so the login token never goes in the URL. This token carries no
+    user_id claim, so no other route accepts it.
+    """
+    claims = get_request_claims()
+    payload = {'stream_user_id': current_user_id, 'exp': int(time.time()) + SSE_TOKEN_TTL}
+    if claims.get('exp'):
+        # The stream still ends when the login token does
+        payload['session_exp'] = claims['exp']
+    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    return jsonify({'token': token, 'expires_in': SSE_TOKEN_TTL}), 200
+
+def stream_claims(headers, args):
+    """Claims for a notification stream: the bearer token, or a stream token
+    from POST /api/notifications/stream-token as ?token=. None if missing or
+    invalid.
+    """
+    token = headers.get('Authorization')
+    try:
+        if token:
+            if token.startswith('Bearer '):
+                token = token[7:]
+            claims = decode_token(token)
+            return claims if 'user_id' in claims else None
+        token = args.get('token')
+        if not token:
+            return None
+        claims = decode_token(token)
+    except jwt.InvalidTokenError:
+        return None
+    if 'stream_user_id' not in claims:
+        return None
+    return {'user_id': claims['stream_user_id'], 'exp': claims.get('session_exp')}
+
+def last_event_id(headers, args):
+    """Id of the last notification a reconnecting client received, or None"""
+    value = headers.get('Last-Event-ID') or args.get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+@app.route('/api/notifications/stream', methods=['GET'])
+def notification_stream():
+    """Push the signed-in user's new notifications as Server-Sent Events.
+
+    Events are "notification", or "due" for due-date and overdue notices,
+    each carrying the notification row with its id as the event id. Comment
+    heartbeats keep idle connections open. "resync" means the client fell
+    too far behind; EventSource reconnects with Last-Event-ID and the
+    notifications it missed are replayed before live events resume.
+    """
+    claims = stream_claims(request.headers, request.args)
+    if not claims:
+        return jsonify({'message': 'Token is missing or invalid'}), 401
+    user_id = claims['user_id']
+    
+    # Subscribe before replaying so nothing created in between is lost
+    subscription = notification_hub.subscribe(user_id)
+    if subscription is None:
+        return jsonify({'message': 'Too many notification streams, try again later'}), 503
+    
+    missed = []
+    after_id = last_event_id(request.headers, request.args)
+    if after_id is not None:
+        try:
+            connection = get_db_connection()
+            if not connection:
+                notification_hub.unsubscribe(subscription)
+                return jsonify({'message': 'Database connection failed'}), 500
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(MISSED_NOTIFICATIONS_QUERY, (user_id, after_id))
+            missed = cursor.fetchall()
+            cursor.close()
+            connection.close()
+        except Exception as e:
+            notification_hub.unsubscribe(subscription)
+            return jsonify({'message': str(e)}), 500
+    
+    def generate():
+        replayed = {row['notification_id'] for row in missed}
+        expires = claims.get('exp')
+        try:
+            # Reconnect delay for EventSource, in ms
+            yield 'retry: 5000\n\n'
+            for row in missed:
+                yield sse_message('due' if row['due_date'] else 'notification', app.json.dumps(row), row['notification_id'])
+            while True:
+                timeout = SSE_HEARTBEAT
+                if expires:
+                    timeout = min(timeout, expires - time.time())
+                    if timeout <= 0:
+                        # The client must sign in again for a new token
+                        yield sse_message('expired', '{}')
+                        return
+                event = subscription.get(timeout)
+                if event is None:
+                    if subscription.closed:
+                        if subscription.overflowed:
+                            yield sse_message(RESYNC, '{}')
+                        return
+                    yield ': ping\n\n'
+                    continue
+                name, event_id, row = event
+                if event_id not in replayed:
+                    yield sse_message(name, app.json.dumps(row), event_id)
+        finally:
+            notification_hub.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/notifications/<int:notification_id>/read', methods=['PUT'])
 @token_required
 def mark_notification_read(current_user_id, notification_id):
@@ -851,18 +1867,20 @@ def mark_notification_read(current_user_id, notification_id):
         if not result or result[0] != current_user_id:
             return jsonify({'message': 'Notification not found or access denied'}), 404
         
-        # Mark as read
+        # Mark as read; already-read rows are left alone so the
+        # notification_stats_changed trigger only counts real transitions
         cursor.execute(
-            "UPDATE notifications SET is_read = TRUE WHERE notification_id = %s",
+            "UPDATE notifications SET is_read = TRUE, read_date = CURRENT_TIMESTAMP WHERE notification_id = %s AND NOT is_read",
             (notification_id,)
         )
         
         connection.commit()
         
         cursor.close()
+        unread_count = get_unread_count(connection, current_user_id)
         connection.close()
         
-        return jsonify({'message': 'Notification marked as read'}), 200
+        return jsonify({'message': 'Notification marked as read', 'unread_count': unread_count}), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -880,10 +1898,15 @@ def mark_all_notifications_read(current_user_id, user_id):
             return jsonify({'message': 'Database connection failed'}), 500
 
         cursor = connection.cursor()
-        cursor.execute("UPDATE notifications SET is_read = TRUE WHERE user_id = %s", (user_id,))
+        cursor.execute(
+            "UPDATE notifications SET is_read = TRUE, read_date = CURRENT_TIMESTAMP WHERE user_id = %s AND NOT is_read",
+            (user_id,)
+        )
         connection.commit()
-        cursor.close(); connection.close()
-        return jsonify({'message': 'All notifications marked as read'}), 200
+        cursor.close()
+        unread_count = get_unread_count(connection, user_id)
+        connection.close()
+        return jsonify({'message': 'All notifications marked as read', 'unread_count': unread_count}), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -904,8 +1927,10 @@ def delete_notification(current_user_id, notification_id):
             return jsonify({'message': 'Notification not found or access denied'}), 404
         cursor.execute("DELETE FROM notifications WHERE notification_id = %s", (notification_id,))
         connection.commit()
-        cursor.close(); connection.close()
-        return jsonify({'message': 'Notification deleted'}), 200
+        cursor.close()
+        unread_count = get_unread_count(connection, current_user_id)
+        connection.close()
+        return jsonify({'message': 'Notification deleted', 'unread_count': unread_count}), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -922,8 +1947,10 @@ def delete_all_notifications(current_user_id, user_id):
         cursor = connection.cursor()
         cursor.execute("DELETE FROM notifications WHERE user_id = %s", (user_id,))
         connection.commit()
-        cursor.close(); connection.close()
-        return jsonify({'message': 'All notifications cleared'}), 200
+        cursor.close()
+        unread_count = get_unread_count(connection, user_id)
+        connection.close()
+        return jsonify({'message': 'All notifications cleared', 'unread_count': unread_count}), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -991,11 +2018,16 @@ def add_book():
                 (book_id, category_id)
             )
         
+        if authors or category_or_publisher:
+            refresh_book_search_keywords(cursor, book_id)
+        
         connection.commit()
         
         cursor.close()
         connection.close()
         
+        invalidate_book_cache(book_id, listing_changed=True)
+        
         return jsonify({
             'message': 'Book added successfully',
             'book_id': book_id
@@ -1004,6 +2036,232 @@ def add_book():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+# Columns accepted by the bulk import besides title/authors/category
+BULK_BOOK_FIELDS = ['isbn', 'subtitle', 'description', 'language', 'page_count',
+                    'edition', 'publication_date', 'price', 'stock']
+
+def read_bulk_rows(stream, fmt):
+    """Yield (line_number, dict) from a CSV or NDJSON request body without buffering it"""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+def split_names(value):
+    """Split a comma-separated author list the same way add_book does"""
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [a.strip() for a in (value or '').split(',') if a.strip()]
+
+def parse_bulk_book(row):
+    """Validate one import row; returns (book, author_names, category) or raises ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError('Row is not a JSON object')
+    title = (row.get('title') or '').strip()
+    if not title:
+        raise ValueError('Title required')
+    book = {field: (row.get(field) if row.get(field) != '' else None) for field in BULK_BOOK_FIELDS}
+    try:
+        book['stock'] = int(book['stock'] or 0)
+        book['price'] = float(book['price'] or 0)
+        book['page_count'] = int(book['page_count']) if book['page_count'] is not None else None
+    except (TypeError, ValueError):
+        raise ValueError('price, stock and page_count must be numeric')
+    if book['stock'] < 0:
+        raise ValueError('stock cannot be negative')
+    book['title'] = title
+    category = (row.get('category') or row.get('publishers') or '').strip() or None
+    return book, split_names(row.get('authors')), category
+
+# Author or category names resolved per lookup statement
+NAME_LOOKUP_BATCH = 500
+
+def lookup_names(cursor, table, id_column, names, known):
+    """Fill known[name] for the names the table already holds.
+
+    Names are compared by the database, so the column collation decides what
+    counts as the same name (case and accents under utf8mb4_unicode_ci), and
+    each requested spelling maps to the row it matches.
+    """
+    # One indexed lookup per name; comparing the column with a parameter uses
+    # the column's collation. authors.name is not unique, so take the oldest row.
+    branch = f"SELECT %s AS requested, MIN({id_column}) AS id FROM {table} WHERE name = %s"
+    for start in range(0, len(names), NAME_LOOKUP_BATCH):
+        batch = names[start:start + NAME_LOOKUP_BATCH]
+        cursor.execute(' UNION ALL '.join([branch] * len(batch)), [v for n in batch for v in (n, n)])
+        for row in cursor.fetchall():
+            if row['id'] is not None:
+                known[row['requested']] = row['id']
+
+def resolve_names(cursor, table, id_column, names, known):
+    """Fill known (requested name -> id) for names, inserting any that are missing.
+
+    Returns (added, unresolved): the names whose ids came from this call's
+    inserts, so the caller can forget them if the transaction is rolled back,
+    and any name that still has no id.
+    """
+    missing = sorted({n for n in names if n not in known})
+    if not missing:
+        return [], []
+    lookup_names(cursor, table, id_column, missing, known)
+    to_insert = [n for n in missing if n not in known]
+    if not to_insert:
+        return [], []
+    # Names the collation treats as equal collapse into one row here
+    cursor.executemany(f"INSERT IGNORE INTO {table} (name) VALUES (%s)", [(n,) for n in to_insert])
+    lookup_names(cursor, table, id_column, to_insert, known)
+    added = [n for n in to_insert if n in known]
+    return added, [n for n in to_insert if n not in known]
+
+def insert_bulk_books(cursor, entries, author_ids, category_ids, id_step):
+    """Insert one chunk of parsed rows with multi-row statements; returns the new book ids"""
+    columns = ['title'] + BULK_BOOK_FIELDS + ['available_stock', 'search_keywords', 'is_active']
+    values = []
+    for book, authors, category in entries:
+        keywords = ' '.join(authors + ([category] if category else [])) or None
+        values.append([book['title']] + [book[f] for f in BULK_BOOK_FIELDS] + [book['stock'], keywords, True])
+    row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    cursor.execute(
+        f"INSERT INTO books ({', '.join(columns)}) VALUES " + ', '.join([row_placeholder] * len(values)),
+        [v for row in values for v in row]
+    )
+    book_ids = inserted_ids(cursor, len(entries), id_step)
+    
+    author_links = []
+    category_links = []
+    for book_id, (book, authors, category) in zip(book_ids, entries):
+        author_links += [(book_id, author_ids[a]) for a in authors]
+        if category:
+            category_links.append((book_id, category_ids[category]))
+    if author_links:
+        cursor.executemany("INSERT IGNORE INTO book_authors (book_id, author_id) VALUES (%s, %s)", author_links)
+    if category_links:
+        cursor.executemany("INSERT IGNORE INTO book_categories (book_id, category_id) VALUES (%s, %s)", category_links)
+    return book_ids
+
+def import_book_chunk(connection, cursor, chunk, author_ids, category_ids, id_step, errors):
+    """Import a chunk in one transaction, retrying row by row if the batch fails"""
+    def attempt(rows):
+        """Commit rows, returning errors for rows whose names could not be resolved"""
+        added_authors = []
+        added_categories = []
+        try:
+            added_authors, missing_authors = resolve_names(
+                cursor, 'authors', 'author_id', [a for _, (_, authors, _) in rows for a in authors], author_ids
+            )
+            added_categories, missing_categories = resolve_names(
+                cursor, 'categories', 'category_id', [c for _, (_, _, c) in rows if c], category_ids
+            )
+            rejected = []
+            entries = []
+            for line_number, (book, authors, category) in rows:
+                unresolved = [a for a in authors if a in missing_authors]
+                if category in missing_categories:
+                    unresolved.append(category)
+                if unresolved:
+                    rejected.append({'row': line_number, 'message': f"Could not resolve {', '.join(unresolved)}"})
+                else:
+                    entries.append((book, authors, category))
+            if entries:
+                insert_bulk_books(cursor, entries, author_ids, category_ids, id_step)
+            connection.commit()
+            return rejected
+        except Exception:
+            connection.rollback()
+            # Ids handed out inside the rolled back transaction no longer exist
+            for name in added_authors:
+                author_ids.pop(name, None)
+            for name in added_categories:
+                category_ids.pop(name, None)
+            raise
+    
+    try:
+        rejected = attempt(chunk)
+        errors.extend(rejected)
+        return len(chunk) - len(rejected)
+    except Exception:
+        pass
+    
+    # Something in the batch was rejected (e.g. a duplicate ISBN): find out which rows
+    imported = 0
+    for line_number, entry in chunk:
+        try:
+            rejected = attempt([(line_number, entry)])
+        except Exception as e:
+            errors.append({'row': line_number, 'message': getattr(e, 'msg', None) or str(e)})
+            continue
+        errors.extend(rejected)
+        imported += 1 - len(rejected)
+    return imported
+
+@app.route('/api/admin/books/bulk', methods=['POST'])
+@admin_required
+def bulk_import_books():
+    """Import many books from a streamed CSV or NDJSON body (Admin only).
+
+    Each row takes title, authors (comma-separated), category and the optional
+    columns in BULK_BOOK_FIELDS. Rows are committed BULK_IMPORT_CHUNK at a time;
+    the response lists every row that was rejected and why.
+    """
+    try:
+        fmt = request.args.get('format')
+        if not fmt:
+            fmt = 'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+        if fmt not in ('csv', 'ndjson'):
+            return jsonify({'message': 'format must be csv or ndjson'}), 400
+        
+        connection = get_db_connection()
+        if not connection:
+            return jsonify({'message': 'Database connection failed'}), 500
+        
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT @@auto_increment_increment AS step")
+        id_step = cursor.fetchone()['step']
+        
+        author_ids = {}
+        category_ids = {}
+        errors = []
+        imported = 0
+        rows_seen = 0
+        chunk = []
+        
+        for line_number, row in read_bulk_rows(request.stream, fmt):
+            rows_seen += 1
+            try:
+                chunk.append((line_number, parse_bulk_book(row)))
+            except ValueError as e:
+                errors.append({'row': line_number, 'message': str(e)})
+            if len(chunk) >= BULK_IMPORT_CHUNK:
+                imported += import_book_chunk(connection, cursor, chunk, author_ids, category_ids, id_step, errors)
+                chunk = []
+        if chunk:
+            imported += import_book_chunk(connection, cursor, chunk, author_ids, category_ids, id_step, errors)
+        
+        cursor.close()
+        connection.close()
+        
+        if imported:
+            catalog_cache.invalidate_tag('pages')
+        
+        errors.sort(key=lambda e: e['row'])
+        return jsonify({
+            'message': f'Imported {imported} of {rows_seen} books',
+            'imported': imported,
+            'failed': len(errors),
+            'errors': errors
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
 @app.route('/api/admin/books/<int:book_id>', methods=['PUT'])
 @admin_required
 def update_book(book_id):
@@ -1042,6 +2300,8 @@ def update_book(book_id):
         cursor.close()
         connection.close()
         
+        invalidate_book_cache(book_id, listing_changed=True)
+        
         return jsonify({'message': 'Book updated successfully'}), 200
         
     except Exception as e:
@@ -1057,26 +2317,100 @@ def delete_book(book_id):
             return jsonify({'message': 'Database connection failed'}), 500
         
         cursor = connection.cursor()
+        connection.start_transaction()
         
-        cursor.execute("DELETE FROM books WHERE book_id = %s", (book_id,))
-        
-        if cursor.rowcount == 0:
+        cursor.execute("SELECT book_id FROM books WHERE book_id = %s FOR UPDATE", (book_id,))
+        if not cursor.fetchone():
+            connection.rollback()
             return jsonify({'message': 'Book not found'}), 404
         
+        # Rows removed by ON DELETE CASCADE do not fire triggers, so delete
+        # the book's loans first to keep the borrowers' loan counters and
+        # dashboard_stats exact
+        cursor.execute("DELETE FROM issues WHERE book_id = %s", (book_id,))
+        cursor.execute("DELETE FROM books WHERE book_id = %s", (book_id,))
+        
         connection.commit()
         
         cursor.close()
         connection.close()
         
+        invalidate_book_cache(book_id, listing_changed=True)
+        
         return jsonify({'message': 'Book deleted successfully'}), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+def dashboard_stats_payload(row):
+    """Shape a dashboard_stats row for the /api/admin/stats response"""
+    return {
+        'total_books': row['total_books'],
+        'total_users': row['total_users'],
+        'active_issues': row['active_issues'],
+        'overdue_books': row['overdue_books'],
+        'total_fines': float(row['total_fines']) if row['total_fines'] else 0
+    }
+
+def run_stats_reconciler(interval):
+    """Background loop that periodically reconciles dashboard_stats"""
+    while True:
+        time.sleep(interval)
+        try:
+            connection = db_pool.acquire()
+        except Error as e:
+            print(f"Stats reconcile skipped: {e}")
+            continue
+        try:
+            cursor = connection.cursor()
+            reconcile_dashboard_stats(cursor)
+            connection.commit()
+            cursor.close()
+        except Error as e:
+            print(f"Stats reconcile failed: {e}")
+        finally:
+            connection.close()
+
+def run_overdue_sweeper(interval):
+    """Background loop that runs the overdue sweep; later runs on the same day are no-ops"""
+    while True:
+        try:
+            connection = db_pool.acquire()
+        except Error as e:
+            print(f"Overdue sweep skipped: {e}")
+        else:
+            try:
+                sweep_overdue(connection, OVERDUE_SWEEP_CHUNK, refresh_users=refresh_user_overdue)
+            except Error as e:
+                print(f"Overdue sweep failed: {e}")
+            finally:
+                connection.close()
+        time.sleep(interval)
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """Request latency, SQL and pool timings and component counters in the
+    Prometheus text format (Admin only).
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """Statements slower than SLOW_QUERY_MS since startup, grouped by
+    normalized statement, most total time first, with their EXPLAIN plans (Admin only).
+    """
+    top = clamp_limit(request.args.get('top'), 50, 1000)
+    return jsonify({
+        'threshold_ms': SLOW_QUERY_MS,
+        'queries': slow_query_log.report(top)
+    }), 200
+
 @app.route('/api/admin/stats', methods=['GET'])
 @admin_required
 def get_admin_stats():
-    """Get admin dashboard statistics"""
+    """Get admin dashboard statistics from the materialized dashboard_stats row"""
     try:
         connection = get_db_connection()
         if not connection:
@@ -1084,72 +2418,150 @@ def get_admin_stats():
         
         cursor = connection.cursor(dictionary=True)
         
-        # Get various statistics
-        stats = {}
-        
-        # Total books
-        cursor.execute("SELECT COUNT(*) as total_books FROM books")
-        stats['total_books'] = cursor.fetchone()['total_books']
-        
-        # Total users
-        cursor.execute("SELECT COUNT(*) as total_users FROM users")
-        stats['total_users'] = cursor.fetchone()['total_users']
-        
-        # Active issues
-        cursor.execute("SELECT COUNT(*) as active_issues FROM issues WHERE status = 'issued'")
-        stats['active_issues'] = cursor.fetchone()['active_issues']
-        
-        # Overdue books
-        cursor.execute("SELECT COUNT(*) as overdue_books FROM issues WHERE status = 'issued' AND due_date < CURDATE()")
-        stats['overdue_books'] = cursor.fetchone()['overdue_books']
+        cursor.execute(DASHBOARD_STATS_QUERY)
+        row = cursor.fetchone()
         
-        # Total fine amount
-        cursor.execute("SELECT SUM(fine) as total_fines FROM issues WHERE fine > 0")
-        result = cursor.fetchone()
-        stats['total_fines'] = float(result['total_fines']) if result['total_fines'] else 0
+        if not row:
+            # First use: build the row from scratch
+            reconcile_dashboard_stats(cursor)
+            connection.commit()
+            cursor.execute(DASHBOARD_STATS_QUERY)
+            row = cursor.fetchone()
+        elif row['overdue_stale']:
+            cursor.execute(RECOUNT_OVERDUE_SQL)
+            connection.commit()
+            cursor.execute(DASHBOARD_STATS_QUERY)
+            row = cursor.fetchone()
         
         cursor.close()
         connection.close()
         
-        return jsonify({'stats': stats}), 200
+        return jsonify({'stats': dashboard_stats_payload(row)}), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+# Sort keys for GET /api/admin/users: ?sort= value -> column
+USER_SORT_COLUMNS = {
+    'joined': 'u.created_at',
+    'name': 'u.name',
+    'email': 'u.email',
+    'id': 'u.user_id'
+}
+MEMBERSHIP_TYPES = ('student', 'faculty', 'staff', 'public')
+
 @app.route('/api/admin/users', methods=['GET'])
 @admin_required
 def get_users():
-    """Get all users for admin management"""
+    """Get one page of users for admin management.
+
+    Query parameters: sort (joined, name, email, id), order (asc, desc),
+    status (active, inactive), role (membership type), overdue=1 and q (name
+    or email prefix). Pass the returned next_cursor as ?after= for the next
+    page. Loan counts are aggregated for the returned page only.
+    """
     try:
+        limit = get_page_limit(USERS_PAGE_DEFAULT, USERS_PAGE_MAX)
+        sort = request.args.get('sort', 'joined')
+        order = request.args.get('order', 'desc' if sort == 'joined' else 'asc').lower()
+        if sort not in USER_SORT_COLUMNS:
+            return jsonify({'message': f"sort must be one of {', '.join(USER_SORT_COLUMNS)}"}), 400
+        if order not in ('asc', 'desc'):
+            return jsonify({'message': 'order must be asc or desc'}), 400
+        column = USER_SORT_COLUMNS[sort]
+        
+        joins = ""
+        conditions = []
+        params = []
+        
+        status = request.args.get('status')
+        if status:
+            if status not in ('active', 'inactive'):
+                return jsonify({'message': 'status must be active or inactive'}), 400
+            conditions.append("u.is_active = %s")
+            params.append(status == 'active')
+        
+        role = request.args.get('role')
+        if role:
+            if role not in MEMBERSHIP_TYPES:
+                return jsonify({'message': f"role must be one of {', '.join(MEMBERSHIP_TYPES)}"}), 400
+            conditions.append("u.membership_type = %s")
+            params.append(role)
+        
+        if request.args.get('overdue', '').lower() in ('1', 'true', 'yes'):
+            # Trigger-maintained counter, recounted for overdue borrowers by the daily sweep
+            joins = "JOIN user_loan_stats ls ON ls.user_id = u.user_id"
+            conditions.append("ls.overdue_loans > 0")
+        
+        prefix = request.args.get('q', '').strip()
+        if prefix:
+            conditions.append("(u.name LIKE %s OR u.email LIKE %s)")
+            params += [like_prefix(prefix), like_prefix(prefix)]
+        
+        after = request.args.get('after')
+        if after:
+            try:
+                cursor_sort, cursor_order, after_value, after_id = decode_cursor(after, 4)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            if (cursor_sort, cursor_order) != (sort, order):
+                return jsonify({'message': 'Cursor does not match sort order'}), 400
+            op = '<' if order == 'desc' else '>'
+            if sort == 'id':
+                conditions.append(f"u.user_id {op} %s")
+                params.append(after_id)
+            else:
+                conditions.append(f"({column} {op} %s OR ({column} = %s AND u.user_id {op} %s))")
+                params += [after_value, after_value, after_id]
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = order.upper()
+        tiebreak = '' if sort == 'id' else f", u.user_id {direction}"
+        params.append(limit + 1)
+        
         connection = get_db_connection()
         if not connection:
             return jsonify({'message': 'Database connection failed'}), 500
         
         cursor = connection.cursor(dictionary=True)
         
-        # Get users with their loan statistics
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 u.user_id,
                 u.name,
                 u.email,
                 u.membership_type as role,
                 u.is_active as status,
-                u.created_at as joinDate,
-                COUNT(i.issue_id) as booksBorrowed,
-                COUNT(CASE WHEN i.status = 'issued' THEN 1 END) as currentLoans,
-                COUNT(CASE WHEN i.status = 'issued' AND i.due_date < CURDATE() THEN 1 END) as overdueBooks
+                u.created_at as joinDate
             FROM users u
-            LEFT JOIN issues i ON u.user_id = i.user_id
-            GROUP BY u.user_id, u.name, u.email, u.membership_type, u.is_active, u.created_at
-            ORDER BY u.created_at DESC
-        """)
+            {joins}
+            {where}
+            ORDER BY {column} {direction}{tiebreak}
+            LIMIT %s
+        """, params)
         
         users = cursor.fetchall()
         
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            last = users[-1]
+            sort_value = {'joined': last['joinDate'], 'name': last['name'],
+                          'email': last['email'], 'id': last['user_id']}[sort]
+            if isinstance(sort_value, datetime):
+                sort_value = sort_value.strftime('%Y-%m-%d %H:%M:%S')
+            next_cursor = encode_cursor(sort, order, sort_value, last['user_id'])
+        
+        # Loan counters for this page only: primary-key lookups in user_loan_stats
+        loans = get_user_loan_stats(connection, cursor, [user['user_id'] for user in users])
+        
+        cursor.close()
+        connection.close()
+        
         # Format the data for frontend
         formatted_users = []
         for user in users:
+            loan = loans.get(user['user_id'], {})
             formatted_users.append({
                 'id': user['user_id'],
                 'name': user['name'],
@@ -1157,15 +2569,13 @@ def get_users():
                 'role': user['role'],
                 'status': 'active' if user['status'] else 'inactive',
                 'joinDate': user['joinDate'].strftime('%Y-%m-%d') if user['joinDate'] else '',
-                'booksBorrowed': user['booksBorrowed'] or 0,
-                'currentLoans': user['currentLoans'] or 0,
-                'overdueBooks': user['overdueBooks'] or 0
+                'booksBorrowed': loan.get('total_borrowed') or 0,
+                'currentLoans': loan.get('current_loans') or 0,
+                'overdueBooks': loan.get('overdue_loans') or 0,
+                'unpaidFines': float(loan['unpaid_fines']) if loan.get('unpaid_fines') else 0
             })
         
-        cursor.close()
-        connection.close()
-        
-        return jsonify({'users': formatted_users}), 200
+        return jsonify({'users': formatted_users, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -1189,7 +2599,7 @@ def add_user():
             return jsonify({'message': 'Email already exists'}), 400
         
         # Hash password
-        hashed_password = hashpw(data['password'].encode('utf-8'), gensalt()).decode('utf-8')
+        hashed_password = password_hasher.hash(data['password'])
         
         # Insert new user
         cursor.execute("""
@@ -1205,6 +2615,8 @@ def add_user():
         
         return jsonify({'message': 'User added successfully', 'user_id': user_id}), 201
         
+    except PasswordHasherUnavailable as e:
+        return hasher_unavailable_response(e)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -1254,18 +2666,53 @@ def delete_user(user_id):
         
         cursor = connection.cursor(dictionary=True)
         
-        # Check if user exists
-        cursor.execute("SELECT name FROM users WHERE user_id = %s", (user_id,))
+        # Check if user exists and has active loans. Locking the counter row
+        # makes a concurrent issue to this user wait until the delete is done.
+        cursor.execute("""
+            SELECT u.name, COALESCE(s.current_loans, 0) AS active_loans
+            FROM users u
+            LEFT JOIN user_loan_stats s ON s.user_id = u.user_id
+            WHERE u.user_id = %s
+            FOR UPDATE
+        """, (user_id,))
         user = cursor.fetchone()
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        # Check if user has active loans
-        cursor.execute("SELECT COUNT(*) as active_loans FROM issues WHERE user_id = %s AND status = 'issued'", (user_id,))
-        active_loans = cursor.fetchone()['active_loans']
+        if user['active_loans'] > 0:
+            # Confirm against the loans themselves, so a drifted counter
+            # cannot block the delete for good
+            cursor.execute(
+                "SELECT COUNT(*) AS active_loans FROM issues WHERE user_id = %s AND status = 'issued'",
+                (user_id,)
+            )
+            if cursor.fetchone()['active_loans'] > 0:
+                return jsonify({'message': 'Cannot delete user with active loans'}), 400
         
-        if active_loans > 0:
-            return jsonify({'message': 'Cannot delete user with active loans'}), 400
+        # The user's reviews go with them by cascade, which skips
+        # add_feedback, so take their ratings out of the book aggregates
+        cursor.execute("""
+            UPDATE book_rating_stats s
+            JOIN (
+                SELECT book_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count,
+                       SUM(rating = 1) AS stars_1, SUM(rating = 2) AS stars_2, SUM(rating = 3) AS stars_3,
+                       SUM(rating = 4) AS stars_4, SUM(rating = 5) AS stars_5
+                FROM feedback
+                WHERE user_id = %s AND rating IS NOT NULL
+                GROUP BY book_id
+            ) f ON f.book_id = s.book_id
+            SET s.rating_sum = s.rating_sum - f.rating_sum,
+                s.rating_count = s.rating_count - f.rating_count,
+                s.stars_1 = s.stars_1 - f.stars_1,
+                s.stars_2 = s.stars_2 - f.stars_2,
+                s.stars_3 = s.stars_3 - f.stars_3,
+                s.stars_4 = s.stars_4 - f.stars_4,
+                s.stars_5 = s.stars_5 - f.stars_5
+        """, (user_id,))
+        
+        # Delete the loan history explicitly too, so the issue triggers take
+        # returned loans and fines out of dashboard_stats
+        cursor.execute("DELETE FROM issues WHERE user_id = %s", (user_id,))
         
         # Delete user
         cursor.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
@@ -1340,5 +2787,74 @@ def get_test_data():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+# Tables available to the streaming export, each read in primary key order
+EXPORT_TABLES = {
+    'books': "SELECT * FROM books ORDER BY book_id",
+    'users': "SELECT * FROM users ORDER BY user_id",
+    'issues': "SELECT * FROM issues ORDER BY issue_id",
+    'admin': "SELECT * FROM admin ORDER BY admin_id",
+}
+
+@app.route('/api/admin/export', methods=['GET'])
+@admin_required
+def export_data():
+    """Stream tables as NDJSON, one {"table": ..., "row": ...} object per line.
+
+    Rows are read with an unbuffered cursor in EXPORT_BATCH_SIZE batches, so
+    memory stays flat regardless of table size. Password hashes are omitted.
+    Use ?tables=books,issues to export a subset.
+    """
+    requested = request.args.get('tables')
+    tables = [t.strip() for t in requested.split(',') if t.strip()] if requested else list(EXPORT_TABLES)
+    unknown = [t for t in tables if t not in EXPORT_TABLES]
+    if unknown:
+        return jsonify({'message': f"Unknown table(s): {', '.join(unknown)}"}), 400
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'message': 'Database connection failed'}), 500
+    
+    def generate():
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        try:
+            for table in tables:
+                cursor.execute(EXPORT_TABLES[table])
+                while True:
+                    rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    chunk = []
+                    for row in rows:
+                        row.pop('password', None)
+                        chunk.append(app.json.dumps({'table': table, 'row': row}))
+                    yield '\n'.join(chunk) + '\n'
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield app.json.dumps({'error': str(e)}) + '\n'
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            connection.close()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+if STATS_RECONCILE_INTERVAL > 0:
+    threading.Thread(
+        target=run_stats_reconciler,
+        args=(STATS_RECONCILE_INTERVAL,),
+        name='stats-reconciler',
+        daemon=True
+    ).start()
+
+if OVERDUE_SWEEP_INTERVAL > 0:
+    threading.Thread(
+        target=run_overdue_sweeper,
+        args=(OVERDUE_SWEEP_INTERVAL,),
+        name='overdue-sweeper',
+        daemon=True
+    ).start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
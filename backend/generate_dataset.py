@@ -0,0 +1,713 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic dataset for scale testing.
+
+Fills an empty library database (or one emptied with --reset) with authors,
+books, users, loans, reviews and notifications at --scale times the base
+sizes (1M books, 500k users, 5M loans at --scale 1). The same --seed and
+--as-of produce byte-identical data:
+
+    python generate_dataset.py --scale 0.1 --seed 42 --reset
+    python generate_dataset.py --scale 1 --load-data          # LOAD DATA LOCAL INFILE
+    python generate_dataset.py --scale 0.01 --tsv-dir /tmp/ds # files only, no database
+
+Popularity is skewed with Zipf weights over a seeded shuffle of the ids:
+a few titles and authors take most loans and books, and power borrowers
+and reviewers take a large share of the activity. Active loans never exceed
+a book's stock, and loans past their due date form an overdue tail that
+thins out with age.
+
+For the load, secondary indexes (other than unique ones and those backing a
+foreign key) and the triggers on the loaded tables are dropped, and
+foreign-key and unique checks are switched off for the session. Afterwards
+the indexes are rebuilt, one ALTER per table, then available_stock and the
+counter tables the triggers would have kept (dashboard_stats,
+user_loan_stats, user_notification_stats, book_rating_stats) are recomputed.
+Finally the triggers are recreated. The dropped definitions are saved to
+--state first, so an interrupted run can be finished with --restore.
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import random
+import string
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+BASE_COUNTS = {
+    'authors': 200000,
+    'books': 1000000,
+    'users': 500000,
+    'issues': 5000000,
+    'feedback': 2000000,
+    'notifications': 3000000,
+}
+
+# Zipf exponents; higher is more skewed
+BOOK_SKEW = 0.8
+AUTHOR_SKEW = 0.7
+USER_SKEW = 0.5
+
+HISTORY_DAYS = 730
+MEMBERSHIP_DAYS = 5 * 365
+FINE_PER_DAY = Decimal('1.00')
+LOAD_DATA_ROWS = 500000
+DEFAULT_PASSWORD = 'password123'
+
+CATEGORY_NAMES = [
+    'Fiction', 'Mystery', 'Thriller', 'Science Fiction', 'Fantasy', 'Romance', 'Horror', 'Historical Fiction',
+    'Biography', 'History', 'Science', 'Mathematics', 'Computer Science', 'Engineering', 'Medicine',
+    'Psychology', 'Philosophy', 'Religion', 'Economics', 'Business', 'Politics', 'Law', 'Education', 'Art',
+    'Music', 'Travel', 'Cooking', 'Poetry', 'Drama', 'Children', 'Young Adult', 'Self-Help',
+]
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Aarav', 'Priya', 'Wei', 'Mei', 'Hiroshi', 'Yuki', 'Omar', 'Fatima', 'Luca', 'Sofia', 'Mateo', 'Valentina',
+    'Noah', 'Emma', 'Liam', 'Olivia', 'Ethan', 'Ava', 'Lucas', 'Mia', 'Arjun', 'Ananya', 'Kwame', 'Amara',
+    'Ivan', 'Olga', 'Pierre', 'Camille', 'Hans', 'Greta',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee',
+    'Sharma', 'Patel', 'Gupta', 'Singh', 'Chen', 'Wang', 'Li', 'Zhang', 'Tanaka', 'Suzuki', 'Sato', 'Kim',
+    'Park', 'Nguyen', 'Tran', 'Rossi', 'Russo', 'Ferrari', 'Muller', 'Schmidt', 'Schneider', 'Dubois',
+    'Laurent', 'Ivanov', 'Petrov', 'Okafor', 'Mensah', 'Haddad', 'Khan', 'Silva',
+]
+NATIONALITIES = ['American', 'British', 'Indian', 'Chinese', 'Japanese', 'French', 'German', 'Italian',
+                 'Spanish', 'Nigerian', 'Brazilian', 'Canadian', 'Australian', 'Russian', 'Korean']
+ADJECTIVES = [
+    'Silent', 'Hidden', 'Last', 'Lost', 'Broken', 'Golden', 'Secret', 'Endless', 'Forgotten', 'Burning',
+    'Quiet', 'Distant', 'Crimson', 'Hollow', 'Bright', 'Ancient', 'Modern', 'Practical', 'Complete', 'Short',
+]
+NOUNS = [
+    'River', 'Garden', 'Empire', 'Island', 'Kingdom', 'Winter', 'Shadow', 'Voyage', 'Machine', 'Mind',
+    'Algorithm', 'Ocean', 'Mountain', 'City', 'Library', 'Letter', 'Storm', 'Promise', 'Theory', 'History',
+]
+SUBJECTS = [
+    'Data', 'Design', 'Economics', 'Physics', 'Cooking', 'Leadership', 'Music', 'Chemistry', 'Networks',
+    'Statistics', 'Painting', 'Gardening', 'Investing', 'Astronomy', 'Writing', 'Python', 'Databases',
+]
+LANGUAGES = (['English'] * 85) + (['Spanish'] * 5) + (['French'] * 4) + (['German'] * 3) + (['Hindi'] * 3)
+REVIEW_TITLES = {
+    1: ['Not for me', 'Disappointing', 'Could not finish'],
+    2: ['Mediocre', 'Had potential', 'Slow going'],
+    3: ['Decent read', 'Mixed feelings', 'Okay overall'],
+    4: ['Really enjoyed it', 'Solid book', 'Recommended'],
+    5: ['Masterpiece', 'Loved every page', 'A must read'],
+}
+RATING_WEIGHTS = [5, 7, 15, 33, 40]
+NOTIFICATION_KINDS = [
+    # (weight, type, title)
+    (50, 'info', 'Library News'),
+    (20, 'success', 'Book Returned'),
+    (15, 'warning', 'Book Due Soon'),
+    (10, 'error', 'Overdue Book Notice'),
+    (5, 'reservation', 'Reservation Ready'),
+]
+
+# Tables the generator writes, in load order, with their columns
+TABLES = {
+    'categories': ('category_id', 'name', 'description'),
+    'authors': ('author_id', 'name', 'biography', 'birth_date', 'nationality'),
+    'books': ('book_id', 'isbn', 'title', 'subtitle', 'description', 'search_keywords', 'language',
+              'page_count', 'edition', 'publication_date', 'price', 'stock', 'available_stock',
+              'location', 'is_featured', 'created_at'),
+    'book_authors': ('book_id', 'author_id'),
+    'book_categories': ('book_id', 'category_id'),
+    'users': ('user_id', 'name', 'email', 'password', 'phone', 'membership_type',
+              'membership_start_date', 'max_books_allowed', 'created_at'),
+    'issues': ('issue_id', 'user_id', 'book_id', 'issue_date', 'return_date', 'due_date', 'status',
+               'fine', 'fine_paid', 'created_at'),
+    'feedback': ('feedback_id', 'user_id', 'book_id', 'rating', 'title', 'comment', 'is_verified',
+                 'helpful_votes', 'created_at'),
+    'notifications': ('notification_id', 'user_id', 'title', 'message', 'type', 'send_date', 'read_date',
+                      'fine', 'due_date', 'is_read', 'created_at'),
+}
+
+# Emptied by --reset along with TABLES; all are derived from or hang off them
+DEPENDENT_TABLES = ['overdue_notices', 'reservations', 'book_publishers', 'audit_log',
+                    'user_loan_stats', 'user_notification_stats', 'book_rating_stats']
+
+# Counter tables rebuilt after the load, as their migrations backfill them
+REBUILD_SQL = [
+    ('books', ["""
+        UPDATE books b
+        LEFT JOIN (SELECT book_id, COUNT(*) AS loans FROM issues WHERE status = 'issued' GROUP BY book_id) i
+            ON i.book_id = b.book_id
+        SET b.available_stock = b.stock - COALESCE(i.loans, 0)
+    """]),
+    ('user_loan_stats', ["DELETE FROM user_loan_stats", """
+        INSERT INTO user_loan_stats (user_id, total_borrowed, current_loans, overdue_loans, unpaid_fines, overdue_as_of)
+        SELECT u.user_id,
+            COUNT(i.issue_id),
+            COUNT(CASE WHEN i.status = 'issued' THEN 1 END),
+            COUNT(CASE WHEN i.status = 'issued' AND i.due_date < CURDATE() THEN 1 END),
+            COALESCE(SUM(CASE WHEN i.fine > 0 AND NOT i.fine_paid THEN i.fine END), 0),
+            CURDATE()
+        FROM users u
+        LEFT JOIN issues i ON i.user_id = u.user_id
+        GROUP BY u.user_id
+    """]),
+    ('user_notification_stats', ["DELETE FROM user_notification_stats", """
+        INSERT INTO user_notification_stats (user_id, unread_count)
+        SELECT user_id, SUM(IF(is_read, 0, 1))
+        FROM notifications
+        GROUP BY user_id
+    """]),
+    ('book_rating_stats', ["DELETE FROM book_rating_stats", """
+        INSERT INTO book_rating_stats (book_id, rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5, last_feedback_id)
+        SELECT book_id,
+            SUM(rating),
+            COUNT(*),
+            SUM(rating = 1), SUM(rating = 2), SUM(rating = 3), SUM(rating = 4), SUM(rating = 5),
+            MAX(feedback_id)
+        FROM feedback
+        WHERE rating IS NOT NULL
+        GROUP BY book_id
+    """]),
+]
+
+
+def scaled_counts(scale, overrides):
+    counts = {name: max(1, int(round(count * scale))) for name, count in BASE_COUNTS.items()}
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+class Skewed:
+    """Zipf-weighted picks over ids 1..n, with popularity shuffled across the ids"""
+
+    def __init__(self, rng, n, exponent):
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+        total = 0.0
+        self.cum_weights = []
+        for rank in range(1, n + 1):
+            total += rank ** -exponent
+            self.cum_weights.append(total)
+        self.total = total
+
+    def pick(self, rng):
+        return self.ids[bisect.bisect_left(self.cum_weights, rng.random() * self.total)]
+
+
+def table_rng(seed, table):
+    # One stream per table, so changing one table's size leaves the others alone
+    return random.Random(f'{seed}:{table}')
+
+
+def author_name(author_id):
+    first = FIRST_NAMES[author_id % len(FIRST_NAMES)]
+    last = LAST_NAMES[(author_id // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    initial = string.ascii_uppercase[(author_id // (len(FIRST_NAMES) * len(LAST_NAMES))) % 26]
+    return f'{first} {initial}. {last}'
+
+
+def isbn13(book_id):
+    digits = f'978{book_id:09d}'
+    check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return digits + str(check)
+
+
+def password_hash(seed, password, rounds):
+    """bcrypt hash shared by every generated user, with a salt derived from the seed"""
+    import bcrypt
+    rng = random.Random(f'{seed}:salt')
+    alphabet = './' + string.ascii_uppercase + string.ascii_lowercase + string.digits
+    # The last salt character only carries two bits
+    salt = ''.join(rng.choice(alphabet) for _ in range(21)) + rng.choice('.Oeu')
+    return bcrypt.hashpw(password.encode('utf-8'), f'$2b${rounds:02d}${salt}'.encode('ascii')).decode('ascii')
+
+
+def generate_catalog(seed, counts, out, as_of):
+    """Categories, authors and books with their links; returns each book's stock"""
+    rng = table_rng(seed, 'categories')
+    categories = CATEGORY_NAMES
+    for category_id, name in enumerate(categories, 1):
+        out['categories'].add((category_id, name, f'Books about {name.lower()}'))
+    category_pick = Skewed(rng, len(categories), 1.0)
+
+    rng = table_rng(seed, 'authors')
+    for author_id in range(1, counts['authors'] + 1):
+        born = as_of - timedelta(days=rng.randrange(25 * 365, 90 * 365))
+        out['authors'].add((author_id, author_name(author_id), None, born, rng.choice(NATIONALITIES)))
+    author_pick = Skewed(rng, counts['authors'], AUTHOR_SKEW)
+
+    rng = table_rng(seed, 'books')
+    book_pick = Skewed(rng, counts['books'], BOOK_SKEW)
+    rank = [0] * (counts['books'] + 1)
+    for position, book_id in enumerate(book_pick.ids):
+        rank[book_id] = position
+    stocks = bytearray(counts['books'] + 1)
+    for book_id in range(1, counts['books'] + 1):
+        pattern = rng.random()
+        if pattern < 0.4:
+            title = f'The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+        elif pattern < 0.7:
+            title = f'{rng.choice(NOUNS)} of the {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+        else:
+            title = f'{rng.choice(("Introduction to", "Practical", "Advanced", "Essential"))} {rng.choice(SUBJECTS)}'
+        authors = {author_pick.pick(rng) for _ in range(rng.choices((1, 2, 3), (80, 15, 5))[0])}
+        book_categories = {category_pick.pick(rng) for _ in range(rng.choices((1, 2), (75, 25))[0])}
+        # Popular titles are stocked deeper
+        stock = min(50, 1 + int(rng.expovariate(1.0) * (8 if rank[book_id] < 1000 else 2)))
+        stocks[book_id] = stock
+        keywords = ' '.join([author_name(a) for a in sorted(authors)] +
+                            [categories[c - 1] for c in sorted(book_categories)])
+        out['books'].add((
+            book_id, isbn13(book_id), title,
+            f'{rng.choice(ADJECTIVES)} {rng.choice(SUBJECTS).lower()}' if rng.random() < 0.3 else None,
+            f'A {rng.choice(ADJECTIVES).lower()} book about {rng.choice(NOUNS).lower()}s and '
+            f'{rng.choice(SUBJECTS).lower()}, first published in {1950 + rng.randrange(75)}.',
+            keywords, rng.choice(LANGUAGES), rng.randrange(80, 1200),
+            rng.choices(('1st', '2nd', '3rd'), (80, 15, 5))[0],
+            as_of - timedelta(days=rng.randrange(365, 70 * 365)),
+            Decimal(rng.randrange(499, 8999)) / 100, stock, stock,
+            f'{string.ascii_uppercase[book_id % 26]}-{book_id % 40 + 1}-{book_id % 8 + 1}',
+            rank[book_id] < 50,
+            datetime.combine(as_of - timedelta(days=HISTORY_DAYS + rng.randrange(365)), datetime.min.time()),
+        ))
+        for author_id in sorted(authors):
+            out['book_authors'].add((book_id, author_id))
+        for category_id in sorted(book_categories):
+            out['book_categories'].add((book_id, category_id))
+    return stocks, book_pick
+
+
+def generate_users(seed, counts, out, as_of, password):
+    """Members; returns the days before --as-of that each one joined"""
+    rng = table_rng(seed, 'users')
+    joined_days_ago = [0] * (counts['users'] + 1)
+    for user_id in range(1, counts['users'] + 1):
+        days_ago = rng.randrange(MEMBERSHIP_DAYS)
+        joined_days_ago[user_id] = days_ago
+        joined = as_of - timedelta(days=days_ago)
+        membership = rng.choices(('student', 'faculty', 'staff', 'public'), (45, 10, 10, 35))[0]
+        out['users'].add((
+            user_id,
+            f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            f'user{user_id}@example.test',
+            password,
+            f'555-{rng.randrange(10000):04d}',
+            membership,
+            joined,
+            10 if membership == 'faculty' else 5,
+            datetime.combine(joined, datetime.min.time()) + timedelta(seconds=rng.randrange(86400)),
+        ))
+    return joined_days_ago
+
+
+def generate_issues(seed, counts, out, as_of, stocks, book_pick, joined_days_ago):
+    """Loans over the last HISTORY_DAYS with an overdue tail"""
+    rng = table_rng(seed, 'issues')
+    user_pick = Skewed(rng, counts['users'], USER_SKEW)
+    active = bytearray(len(stocks))
+    for issue_id in range(1, counts['issues'] + 1):
+        user_id = user_pick.pick(rng)
+        book_id = book_pick.pick(rng)
+        issued_ago = rng.randrange(min(joined_days_ago[user_id], HISTORY_DAYS) + 1)
+        loan_days = 14 if rng.random() < 0.7 else 30
+        issue_date = as_of - timedelta(days=issued_ago)
+        due_date = issue_date + timedelta(days=loan_days)
+        past_due = issued_ago - loan_days
+        fine = Decimal('0.00')
+        fine_paid = False
+        return_date = None
+
+        # Most loans past their due date came back; the rest thin out with age
+        keep_out = rng.random() < (0.9 if past_due < 0 else 0.15 * math.exp(-past_due / 30) + 0.005)
+        if keep_out and active[book_id] < stocks[book_id]:
+            active[book_id] += 1
+            status = 'issued'
+        else:
+            status = 'returned'
+            if rng.random() < 0.85 or past_due <= 0:
+                kept = rng.randrange(min(loan_days, issued_ago) + 1)
+            else:
+                kept = loan_days + min(past_due, 1 + int(rng.expovariate(1 / 7)))
+                fine = FINE_PER_DAY * (kept - loan_days)
+                fine_paid = rng.random() < 0.7
+            return_date = issue_date + timedelta(days=kept)
+        out['issues'].add((
+            issue_id, user_id, book_id, issue_date, return_date, due_date, status, fine, fine_paid,
+            datetime.combine(issue_date, datetime.min.time()) + timedelta(seconds=rng.randrange(86400)),
+        ))
+    return user_pick
+
+
+def generate_feedback(seed, counts, out, as_of, book_pick, user_pick, joined_days_ago):
+    rng = table_rng(seed, 'feedback')
+    for feedback_id in range(1, counts['feedback'] + 1):
+        user_id = user_pick.pick(rng)
+        rating = rng.choices((1, 2, 3, 4, 5), RATING_WEIGHTS)[0]
+        created = as_of - timedelta(days=rng.randrange(min(joined_days_ago[user_id], HISTORY_DAYS) + 1))
+        out['feedback'].add((
+            feedback_id, user_id, book_pick.pick(rng), rating,
+            rng.choice(REVIEW_TITLES[rating]),
+            f'{rng.choice(REVIEW_TITLES[rating])}. The {rng.choice(NOUNS).lower()} '
+            f'{rng.choice(("stayed with me", "felt rushed", "was well drawn", "dragged a little"))}.',
+            rng.random() < 0.6,
+            int(rng.paretovariate(1.5)) - 1,
+            datetime.combine(created, datetime.min.time()) + timedelta(seconds=rng.randrange(86400)),
+        ))
+
+
+def generate_notifications(seed, counts, out, as_of, user_pick, joined_days_ago):
+    rng = table_rng(seed, 'notifications')
+    weights = [kind[0] for kind in NOTIFICATION_KINDS]
+    for notification_id in range(1, counts['notifications'] + 1):
+        user_id = user_pick.pick(rng)
+        _, kind, title = rng.choices(NOTIFICATION_KINDS, weights)[0]
+        days_ago = rng.randrange(min(joined_days_ago[user_id], HISTORY_DAYS) + 1)
+        sent = datetime.combine(as_of - timedelta(days=days_ago), datetime.min.time()) + \
+            timedelta(seconds=rng.randrange(86400))
+        due_date = None
+        fine = Decimal('0.00')
+        if kind == 'error':
+            due_date = sent.date() - timedelta(days=1 + int(rng.expovariate(1 / 10)))
+            fine = FINE_PER_DAY * (sent.date() - due_date).days
+            message = f'A book you borrowed was due on {due_date.isoformat()}. Please return it.'
+        elif kind == 'warning':
+            due_date = sent.date() + timedelta(days=rng.randrange(1, 4))
+            message = f'A book you borrowed is due on {due_date.isoformat()}.'
+        elif kind == 'success':
+            message = f'Thank you for returning "The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}".'
+        elif kind == 'reservation':
+            message = f'"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}" is ready for pickup at the front desk.'
+        else:
+            message = f'New {rng.choice(SUBJECTS).lower()} titles have been added to the catalog.'
+        is_read = rng.random() < (0.95 if days_ago > 30 else 0.5)
+        read_date = sent + timedelta(seconds=rng.randrange(1, 3 * 86400)) if is_read else None
+        out['notifications'].add((
+            notification_id, user_id, title, message, kind, sent, read_date, fine, due_date, is_read, sent,
+        ))
+
+
+def generate(seed, counts, out, as_of, password):
+    stocks, book_pick = generate_catalog(seed, counts, out, as_of)
+    joined_days_ago = generate_users(seed, counts, out, as_of, password)
+    user_pick = generate_issues(seed, counts, out, as_of, stocks, book_pick, joined_days_ago)
+    generate_feedback(seed, counts, out, as_of, book_pick, user_pick, joined_days_ago)
+    generate_notifications(seed, counts, out, as_of, user_pick, joined_days_ago)
+
+
+def tsv_field(value):
+    """One field in LOAD DATA's default format (tab separated, backslash escaped, \\N for NULL)"""
+    kind = type(value)
+    if kind is str:
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+    if kind is int or kind is Decimal:
+        return str(value)
+    if value is None:
+        return '\\N'
+    if kind is bool:
+        return '1' if value else '0'
+    if kind is datetime:
+        # Generated times are whole seconds
+        return value.isoformat(' ')
+    return value.isoformat() if kind is date else str(value)
+
+
+class InsertLoader:
+    """Buffers rows for one table and writes them with multi-row INSERTs"""
+
+    def __init__(self, connection, table, columns, batch_rows):
+        self.connection = connection
+        self.table = table
+        self.columns = columns
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self.seconds = 0.0
+        self._buffer = []
+        self._row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+
+    def add(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        started = time.monotonic()
+        cursor = self.connection.cursor()
+        cursor.execute(
+            f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES "
+            + ', '.join([self._row_sql] * len(self._buffer)),
+            [v for row in self._buffer for v in row]
+        )
+        cursor.close()
+        self.connection.commit()
+        self.rows += len(self._buffer)
+        self._buffer = []
+        self.seconds += time.monotonic() - started
+
+
+class TsvWriter:
+    """Writes rows for one table to ``<directory>/<table>.tsv``"""
+
+    def __init__(self, directory, table, columns):
+        self.table = table
+        self.columns = columns
+        self.path = os.path.join(directory, f'{table}.tsv')
+        self.rows = 0
+        self.seconds = 0.0
+        self._file = open(self.path, 'w', encoding='utf-8', newline='\n')
+
+    def add(self, row):
+        self._file.write('\t'.join(tsv_field(v) for v in row) + '\n')
+        self.rows += 1
+
+    def flush(self):
+        self._file.close()
+
+
+class LoadDataLoader(TsvWriter):
+    """Spools rows to a temporary file and loads it with LOAD DATA LOCAL INFILE"""
+
+    def __init__(self, connection, table, columns, file_rows=LOAD_DATA_ROWS):
+        self.connection = connection
+        self.file_rows = file_rows
+        self._pending = 0
+        super().__init__(tempfile.mkdtemp(prefix='library-dataset-'), table, columns)
+
+    def add(self, row):
+        super().add(row)
+        self._pending += 1
+        if self._pending >= self.file_rows:
+            self._load()
+            self._file = open(self.path, 'w', encoding='utf-8', newline='\n')
+
+    def _load(self):
+        self._file.close()
+        if self._pending:
+            started = time.monotonic()
+            cursor = self.connection.cursor()
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.table} CHARACTER SET utf8mb4 ({', '.join(self.columns)})",
+                (self.path,)
+            )
+            cursor.close()
+            self.connection.commit()
+            self.seconds += time.monotonic() - started
+            self._pending = 0
+        os.remove(self.path)
+
+    def flush(self):
+        self._load()
+        os.rmdir(os.path.dirname(self.path))
+
+
+def existing_tables(cursor):
+    cursor.execute("SELECT TABLE_NAME AS name FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+    return {row['name'] for row in cursor.fetchall()}
+
+
+def droppable_indexes(cursor, table):
+    """(name, definition) of secondary indexes that can be rebuilt after the load.
+
+    Primary keys, unique indexes, expression indexes and indexes leading with
+    a foreign key column stay: they are constraints, or InnoDB needs them.
+    """
+    cursor.execute("""
+        SELECT COLUMN_NAME AS column_name FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+    """, (table,))
+    foreign_keys = {row['column_name'] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT INDEX_NAME AS name, NON_UNIQUE AS non_unique, INDEX_TYPE AS type,
+               COLUMN_NAME AS column_name, SUB_PART AS sub_part
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    indexes = {}
+    for row in cursor.fetchall():
+        indexes.setdefault(row['name'], []).append(row)
+    droppable = []
+    for name, parts in indexes.items():
+        if name == 'PRIMARY' or not parts[0]['non_unique'] or parts[0]['column_name'] in foreign_keys:
+            continue
+        if any(part['column_name'] is None for part in parts):
+            continue
+        columns = ', '.join(
+            f"`{part['column_name']}`" + (f"({part['sub_part']})" if part['sub_part'] else '') for part in parts)
+        kind = 'FULLTEXT INDEX' if parts[0]['type'] == 'FULLTEXT' else 'INDEX'
+        droppable.append((name, f'{kind} `{name}` ({columns})'))
+    return droppable
+
+
+def table_triggers(cursor, table):
+    """(name, CREATE TRIGGER statement) for every trigger on ``table``"""
+    cursor.execute("""
+        SELECT TRIGGER_NAME AS name FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s
+        ORDER BY ACTION_TIMING, EVENT_MANIPULATION, ACTION_ORDER
+    """, (table,))
+    triggers = []
+    for row in cursor.fetchall():
+        cursor.execute(f"SHOW CREATE TRIGGER `{row['name']}`")
+        triggers.append((row['name'], cursor.fetchone()['SQL Original Statement']))
+    return triggers
+
+
+def prepare_load(connection, state_path, report):
+    """Drop triggers and rebuildable indexes on the loaded tables, saving them first"""
+    cursor = connection.cursor(dictionary=True)
+    state = {'indexes': {}, 'triggers': []}
+    for table in TABLES:
+        state['indexes'][table] = droppable_indexes(cursor, table)
+        state['triggers'] += table_triggers(cursor, table)
+    with open(state_path, 'w') as f:
+        json.dump(state, f, indent=2)
+
+    for name, _ in state['triggers']:
+        cursor.execute(f"DROP TRIGGER `{name}`")
+    for table, indexes in state['indexes'].items():
+        if indexes:
+            started = time.monotonic()
+            cursor.execute(f"ALTER TABLE {table} " + ', '.join(f'DROP INDEX `{name}`' for name, _ in indexes))
+            report(f'{table}: dropped {len(indexes)} indexes in {time.monotonic() - started:.1f}s')
+    report(f"Dropped {len(state['triggers'])} triggers; definitions saved to {state_path}")
+    cursor.close()
+
+
+def finish_load(connection, state_path, report):
+    """Rebuild the dropped indexes, recount derived data and recreate the triggers"""
+    with open(state_path) as f:
+        state = json.load(f)
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+
+    for table, indexes in state['indexes'].items():
+        plain = [definition for _, definition in indexes if not definition.startswith('FULLTEXT')]
+        fulltext = [definition for _, definition in indexes if definition.startswith('FULLTEXT')]
+        # InnoDB builds one FULLTEXT index per ALTER TABLE
+        for definitions in ([plain] if plain else []) + [[d] for d in fulltext]:
+            started = time.monotonic()
+            cursor.execute(f"ALTER TABLE {table} " + ', '.join(f'ADD {d}' for d in definitions))
+            report(f'{table}: built {len(definitions)} index(es) in {time.monotonic() - started:.1f}s')
+
+    tables = existing_tables(cursor)
+    for table, statements in REBUILD_SQL:
+        if table not in tables:
+            continue
+        started = time.monotonic()
+        for sql in statements:
+            cursor.execute(sql)
+        connection.commit()
+        report(f'{table}: recomputed ({cursor.rowcount} rows) in {time.monotonic() - started:.1f}s')
+    if 'dashboard_stats' in tables:
+        from dashboard_stats import reconcile_dashboard_stats
+        reconcile_dashboard_stats(cursor)
+        connection.commit()
+        report('dashboard_stats: reconciled')
+
+    for name, statement in state['triggers']:
+        cursor.execute(statement)
+    report(f"Recreated {len(state['triggers'])} triggers")
+
+    for table in TABLES:
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+    os.remove(state_path)
+
+
+def reset_tables(connection, report):
+    cursor = connection.cursor(dictionary=True)
+    tables = existing_tables(cursor)
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    for table in DEPENDENT_TABLES + list(reversed(list(TABLES))):
+        if table in tables:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET SESSION foreign_key_checks = 1")
+    cursor.close()
+    report('Emptied the generated tables')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the base table sizes')
+    for name in BASE_COUNTS:
+        parser.add_argument(f'--{name}', type=int, help=f'Number of {name} (overrides --scale)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed; the same seed and --as-of give the same data')
+    parser.add_argument('--as-of', type=date.fromisoformat, default=date.today(),
+                        help='Date the history ends on (default today), YYYY-MM-DD')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every generated user')
+    parser.add_argument('--batch', type=int, default=2000, help='Rows per multi-row INSERT')
+    parser.add_argument('--load-data', action='store_true', help='Load with LOAD DATA LOCAL INFILE')
+    parser.add_argument('--tsv-dir', help='Only write one TSV file per table to this directory')
+    parser.add_argument('--reset', action='store_true', help='Empty the generated tables first')
+    parser.add_argument('--state', default='generate_dataset.state.json',
+                        help='Where dropped index and trigger definitions are kept during the load')
+    parser.add_argument('--restore', action='store_true',
+                        help='Only rebuild indexes, counters and triggers from an interrupted run')
+    args = parser.parse_args()
+
+    counts = scaled_counts(args.scale, {name: getattr(args, name) for name in BASE_COUNTS})
+    started = time.monotonic()
+
+    if args.tsv_dir:
+        os.makedirs(args.tsv_dir, exist_ok=True)
+        from password_hasher import BCRYPT_ROUNDS
+        out = {table: TsvWriter(args.tsv_dir, table, columns) for table, columns in TABLES.items()}
+        generate(args.seed, counts, out, args.as_of, password_hash(args.seed, args.password, BCRYPT_ROUNDS))
+        for writer in out.values():
+            writer.flush()
+            print(f'{writer.table}: {writer.rows} rows -> {writer.path}')
+        print(f'Done in {time.monotonic() - started:.1f}s')
+        return
+
+    import mysql.connector
+    from db_config import DB_CONFIG
+    from password_hasher import BCRYPT_ROUNDS
+
+    connection = mysql.connector.connect(**DB_CONFIG, allow_local_infile=args.load_data)
+    try:
+        if args.restore:
+            finish_load(connection, args.state, print)
+            return
+        if os.path.exists(args.state):
+            raise SystemExit(f'{args.state} exists: a previous load did not finish. Run with --restore first.')
+
+        cursor = connection.cursor(dictionary=True)
+        if args.reset:
+            reset_tables(connection, print)
+        cursor.execute("SELECT (SELECT COUNT(*) FROM books) + (SELECT COUNT(*) FROM users) AS existing")
+        if cursor.fetchone()['existing']:
+            raise SystemExit('books or users already hold rows; use --reset to replace them')
+        cursor.close()
+
+        print('Generating ' + ', '.join(f'{count} {name}' for name, count in counts.items())
+              + f' (seed {args.seed}, as of {args.as_of})')
+        prepare_load(connection, args.state, print)
+        session = connection.cursor()
+        session.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+        session.close()
+
+        if args.load_data:
+            out = {table: LoadDataLoader(connection, table, columns)
+                   for table, columns in TABLES.items()}
+        else:
+            out = {table: InsertLoader(connection, table, columns, args.batch) for table, columns in TABLES.items()}
+        generated = time.monotonic()
+        generate(args.seed, counts, out, args.as_of, password_hash(args.seed, args.password, BCRYPT_ROUNDS))
+        for loader in out.values():
+            loader.flush()
+            rate = loader.rows / loader.seconds if loader.seconds else 0
+            print(f'{loader.table}: {loader.rows} rows, {loader.seconds:.1f}s in the database ({rate:.0f} rows/s)')
+        print(f'Generated and loaded in {time.monotonic() - generated:.1f}s')
+
+        finish_load(connection, args.state, print)
+    finally:
+        connection.close()
+    print(f'Done in {time.monotonic() - started:.1f}s; every user logs in with password {args.password!r}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Helpers for the trigger-maintained user_loan_stats counters.
+
+Shared by flask_app, overdue_sweeper.py and verify_loan_counters.py, which
+import it without building the Flask app.
+"""
+
+USER_LOAN_FIELDS = ('total_borrowed', 'current_loans', 'overdue_loans', 'unpaid_fines')
+
+
+def refresh_user_overdue(cursor, user_ids):
+    """Recount overdue loans for users whose counters are from an earlier day.
+
+    Loans turn overdue as days pass without any write to fire a trigger, so
+    user_loan_stats.overdue_loans is only exact as of overdue_as_of.
+    """
+    if not user_ids:
+        return 0
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    cursor.execute(f"""
+        UPDATE user_loan_stats s
+        SET s.overdue_loans = (
+                SELECT COUNT(*) FROM issues i
+                WHERE i.user_id = s.user_id AND i.status = 'issued' AND i.due_date < CURDATE()),
+            s.overdue_as_of = CURDATE()
+        WHERE s.user_id IN ({placeholders}) AND s.overdue_as_of < CURDATE()
+    """, list(user_ids))
+    return cursor.rowcount
+
+
+def get_user_loan_stats(connection, cursor, user_ids):
+    """Loan counters for the given users keyed by user_id, overdue brought up to date"""
+    if not user_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    query = f"""
+        SELECT user_id, total_borrowed, current_loans, overdue_loans, unpaid_fines,
+               overdue_as_of < CURDATE() AS overdue_stale
+        FROM user_loan_stats
+        WHERE user_id IN ({placeholders})
+    """
+    cursor.execute(query, list(user_ids))
+    stats = {row['user_id']: row for row in cursor.fetchall()}
+    
+    stale = [user_id for user_id, row in stats.items() if row['overdue_stale']]
+    if stale:
+        refresh_user_overdue(cursor, stale)
+        connection.commit()
+        cursor.execute(query, list(user_ids))
+        stats = {row['user_id']: row for row in cursor.fetchall()}
+    return stats
+
+
+def rebuild_user_loan_stats(cursor, first_user_id, last_user_id):
+    """Recount the loan counters of users in [first_user_id, last_user_id].
+
+    Locks the range's counter rows first so concurrent issue/return triggers
+    wait and apply their deltas on top of the recount. Returns a list of
+    (user_id, stored, actual) for counters that had drifted; rows whose only
+    difference is a stale overdue count are refreshed but not reported.
+    """
+    cursor.execute("""
+        SELECT user_id, total_borrowed, current_loans, overdue_loans, unpaid_fines,
+               overdue_as_of < CURDATE() AS overdue_stale
+        FROM user_loan_stats
+        WHERE user_id BETWEEN %s AND %s
+        FOR UPDATE
+    """, (first_user_id, last_user_id))
+    stored = {row['user_id']: row for row in cursor.fetchall()}
+    
+    cursor.execute("""
+        SELECT u.user_id,
+            COUNT(i.issue_id) AS total_borrowed,
+            COUNT(CASE WHEN i.status = 'issued' THEN 1 END) AS current_loans,
+            COUNT(CASE WHEN i.status = 'issued' AND i.due_date < CURDATE() THEN 1 END) AS overdue_loans,
+            COALESCE(SUM(CASE WHEN i.fine > 0 AND NOT i.fine_paid THEN i.fine END), 0) AS unpaid_fines
+        FROM users u
+        LEFT JOIN issues i ON i.user_id = u.user_id
+        WHERE u.user_id BETWEEN %s AND %s
+        GROUP BY u.user_id
+    """, (first_user_id, last_user_id))
+    
+    drifted = []
+    changed = []
+    for actual in cursor.fetchall():
+        row = stored.get(actual['user_id'])
+        fields = USER_LOAN_FIELDS if row is None or not row['overdue_stale'] else \
+            tuple(f for f in USER_LOAN_FIELDS if f != 'overdue_loans')
+        if row is None or any(row[f] != actual[f] for f in fields):
+            drifted.append((actual['user_id'], row and {f: row[f] for f in USER_LOAN_FIELDS}, actual))
+            changed.append(actual)
+        elif row['overdue_stale']:
+            changed.append(actual)
+    
+    if changed:
+        cursor.execute(
+            "INSERT INTO user_loan_stats (user_id, total_borrowed, current_loans, overdue_loans, unpaid_fines, overdue_as_of) VALUES "
+            + ', '.join(['(%s, %s, %s, %s, %s, CURDATE())'] * len(changed))
+            + """ ON DUPLICATE KEY UPDATE
+                total_borrowed = VALUES(total_borrowed),
+                current_loans = VALUES(current_loans),
+                overdue_loans = VALUES(overdue_loans),
+                unpaid_fines = VALUES(unpaid_fines),
+                overdue_as_of = VALUES(overdue_as_of)""",
+            [row[f] for row in changed for f in ('user_id',) + USER_LOAN_FIELDS]
+        )
+    return drifted
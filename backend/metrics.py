@@ -0,0 +1,106 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Histograms keep cumulative bucket counts per label set behind one lock each,
+so recording an observation is a dict lookup and a short loop. Component
+statistics that are already kept elsewhere (connection pool, caches, bcrypt
+pool) are not copied here but read and rendered as gauges at scrape time.
+"""
+import bisect
+import math
+import re
+import threading
+
+# Seconds; covers cache hits through slow report queries
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Histogram family keyed by label values"""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = format_labels(self.labels, label_values, f'le="{format_value(float(bound))}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {series[-1]}')
+            labels = format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {format_value(series[-2])}')
+            lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+
+class MetricsRegistry:
+    """Histograms registered by the app plus gauges collected at scrape time"""
+
+    def __init__(self, prefix='library'):
+        self.prefix = prefix
+        self._histograms = []
+        self._collectors = []
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        histogram = Histogram(f'{self.prefix}_{name}', help_text, labels, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def collect(self, component, stats):
+        """Render the numeric values of ``stats()`` as <prefix>_<component>_<key> gauges"""
+        self._collectors.append((component, stats))
+
+    def render(self):
+        lines = []
+        for histogram in self._histograms:
+            lines += histogram.render()
+        for component, stats in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = _NAME_RE.sub('_', f'{self.prefix}_{component}_{key}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""Versioned schema migrations for a live database.
+
+Applies database/migrations/NNN_name.sql in version order and records each
+one in schema_migrations, so a run only applies what is new:
+
+    python migrate.py                  # apply pending migrations
+    python migrate.py --status         # list applied and pending versions
+    python migrate.py --dry-run        # print the statements that would run
+    python migrate.py --baseline 008   # record 001-008 as applied (databases migrated by hand)
+    python migrate.py --file database/enhanced-schema.sql   # run one file, untracked
+
+Files are split the way the mysql client splits them: DELIMITER lines change
+the statement terminator, and terminators inside quotes or comments are
+ignored, so procedure and trigger bodies run as single statements.
+
+MySQL commits DDL as it goes, so progress is saved after every statement.
+A migration that fails part way is resumed from the failed statement on the
+next run (as long as the file is unchanged), instead of being started again.
+
+ALTER TABLE, CREATE INDEX and DROP INDEX are tried in the cheapest mode
+MySQL accepts: ALGORITHM=INSTANT (ALTER TABLE only), then ALGORITHM=INPLACE
+with LOCK=NONE, so reads and writes continue during the build, then
+LOCK=SHARED (a FULLTEXT index), and only then as written. Each refusal and
+the mode finally used are reported. DDL waits at most
+--lock-wait-timeout seconds for the table's metadata lock and then retries,
+rather than queueing every other query on the table behind it.
+"""
+import argparse
+import hashlib
+import re
+import time
+from pathlib import Path
+
+import mysql.connector
+from mysql.connector import Error
+
+from db_config import DB_CONFIG
+
+MIGRATIONS_DIR = Path(__file__).parent / 'database' / 'migrations'
+LOCK_NAME = 'library_schema_migrations'
+
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_ALTER_OPERATION_NOT_SUPPORTED = 1845
+ER_ALTER_OPERATION_NOT_SUPPORTED_REASON = 1846
+ER_UNKNOWN_ALTER_ALGORITHM = 1800
+
+_FILE_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+_DELIMITER_RE = re.compile(r'DELIMITER[ \t]+(\S+)[ \t]*(?:\r?\n|$)', re.I)
+_ONLINE_DDL_RE = re.compile(
+    r'^(ALTER\s+TABLE|CREATE\s+(UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?INDEX|DROP\s+INDEX)\b', re.I)
+_ALGORITHM_RE = re.compile(r'\b(ALGORITHM|LOCK)\s*=', re.I)
+_PARTITION_RE = re.compile(r'\bPARTITION\b', re.I)
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(20) PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        status ENUM('applying', 'applied') NOT NULL,
+        statements_done INT NOT NULL DEFAULT 0,
+        statements_total INT NOT NULL DEFAULT 0,
+        execution_ms INT NOT NULL DEFAULT 0,
+        started_at TIMESTAMP NULL,
+        applied_at TIMESTAMP NULL
+    )
+"""
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied or the history does not match the files"""
+
+
+def split_statements(sql):
+    """Split SQL text into (line number, statement) pairs like the mysql client.
+
+    Understands DELIMITER lines, quoted strings and identifiers, and --, #
+    and /* */ comments. Comments are dropped, except /*! ... */ version
+    comments, which MySQL executes.
+    """
+    statements = []
+    delimiter = ';'
+    buffer = []
+    start_line = None
+    line = 1
+    i = 0
+    n = len(sql)
+
+    def finish():
+        text = ''.join(buffer).strip()
+        if text:
+            statements.append((start_line, text))
+        buffer.clear()
+
+    while i < n:
+        ch = sql[i]
+
+        # DELIMITER is a client command, only recognized at the start of a statement
+        if start_line is None and (i == 0 or sql[i - 1] == '\n'):
+            match = _DELIMITER_RE.match(sql, i)
+            if match:
+                buffer.clear()
+                delimiter = match.group(1)
+                line += match.group(0).count('\n')
+                i = match.end()
+                continue
+
+        if sql.startswith(delimiter, i):
+            finish()
+            start_line = None
+            i += len(delimiter)
+            continue
+
+        if ch in ("'", '"', '`'):
+            end = i + 1
+            while end < n:
+                if sql[end] == '\\' and ch != '`':
+                    end += 2
+                    continue
+                if sql[end] == ch:
+                    if end + 1 < n and sql[end + 1] == ch:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            token = sql[i:end + 1]
+        elif ch == '#' or (sql.startswith('--', i) and (i + 2 >= n or sql[i + 2] in ' \t\r\n')):
+            end = sql.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            end = n - 2 if end < 0 else end
+            token = sql[i:end + 2]
+            if not token.startswith('/*!'):
+                line += token.count('\n')
+                buffer.append(' ')
+                i = end + 2
+                continue
+        else:
+            token = ch
+
+        if start_line is None and not token.isspace():
+            start_line = line
+        buffer.append(token)
+        line += token.count('\n')
+        i += len(token)
+
+    finish()
+    return statements
+
+
+def online_variants(statement):
+    """(mode, sql) pairs to try before running a DDL statement as written.
+
+    Cheapest first: INSTANT only changes metadata (ADD COLUMN and similar in
+    MySQL 8), INPLACE with LOCK=NONE keeps the table writable while it is
+    rebuilt, and LOCK=SHARED at least keeps it readable (FULLTEXT indexes).
+    CREATE INDEX and DROP INDEX do not accept INSTANT. Empty when the
+    statement is not DDL or already names an algorithm or lock.
+    """
+    if not _ONLINE_DDL_RE.match(statement) or _ALGORITHM_RE.search(statement):
+        return []
+    if statement[:5].upper() != 'ALTER':
+        return [(f'ALGORITHM=INPLACE, LOCK={lock}', f'{statement} ALGORITHM=INPLACE LOCK={lock}')
+                for lock in ('NONE', 'SHARED')]
+    if _PARTITION_RE.search(statement):
+        return []
+    modes = ['ALGORITHM=INSTANT', 'ALGORITHM=INPLACE, LOCK=NONE', 'ALGORITHM=INPLACE, LOCK=SHARED']
+    return [(mode, f'{statement}, {mode}') for mode in modes]
+
+
+def summary(statement, width=90):
+    text = ' '.join(statement.split())
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Migration files as (version, name, path, checksum), in version order"""
+    migrations = []
+    seen = {}
+    for path in sorted(Path(directory).glob('*.sql')):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            continue
+        version, name = match.groups()
+        if version in seen:
+            raise MigrationError(f'{path.name} and {seen[version]} share version {version}')
+        seen[version] = path.name
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations.append((version, name, path, checksum))
+    migrations.sort(key=lambda m: int(m[0]))
+    return migrations
+
+
+def applied_migrations(cursor, create=True):
+    """schema_migrations rows by version; with create=False a missing table reads as empty"""
+    if create:
+        cursor.execute(CREATE_TABLE_SQL)
+    else:
+        cursor.execute("SELECT COUNT(*) AS found FROM information_schema.TABLES "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'schema_migrations'")
+        if not cursor.fetchone()['found']:
+            return {}
+    cursor.execute("SELECT version, name, checksum, status, statements_done, applied_at FROM schema_migrations")
+    return {row['version']: row for row in cursor.fetchall()}
+
+
+class Runner:
+    """Runs statements on one autocommit connection, reporting each step"""
+
+    def __init__(self, connection, retries=5, online=True, report=print):
+        self.connection = connection
+        self.retries = retries
+        self.online = online
+        self.report = report
+
+    def execute(self, statement):
+        """Run one statement in the cheapest mode MySQL accepts; returns (mode, rows)"""
+        variants = online_variants(statement) if self.online else []
+        for mode, sql in variants:
+            try:
+                return mode, self._execute(sql)
+            except Error as e:
+                if e.errno not in (ER_ALTER_OPERATION_NOT_SUPPORTED, ER_ALTER_OPERATION_NOT_SUPPORTED_REASON,
+                                   ER_UNKNOWN_ALTER_ALGORITHM):
+                    raise
+                self.report(f'      not {mode}: {e.msg}')
+        return ('as written' if variants else ''), self._execute(statement)
+
+    def _execute(self, sql):
+        """Execute, retrying when the statement timed out waiting for a lock"""
+        attempt = 0
+        while True:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(sql)
+                if cursor.with_rows:
+                    cursor.fetchall()
+                return cursor.rowcount
+            except Error as e:
+                if e.errno != ER_LOCK_WAIT_TIMEOUT or attempt >= self.retries:
+                    raise
+                wait = min(30, 2 ** attempt)
+                self.report(f'      lock wait timed out, retrying in {wait}s')
+                time.sleep(wait)
+                attempt += 1
+            finally:
+                cursor.close()
+
+    def run_statements(self, statements, first=0, progress=None):
+        """Run statements[first:], calling progress(done) after each one; returns seconds spent"""
+        started = time.monotonic()
+        for index in range(first, len(statements)):
+            line, statement = statements[index]
+            self.report(f'  [{index + 1}/{len(statements)}] {summary(statement, 80)}')
+            step_started = time.monotonic()
+            try:
+                mode, rows = self.execute(statement)
+            except Exception as e:
+                raise MigrationError(f'statement {index + 1} (line {line}) failed: {e}\n    {summary(statement)}')
+            ms = (time.monotonic() - step_started) * 1000
+            details = [mode, f'{rows} rows' if rows and rows > 0 else '', f'{ms:.0f} ms']
+            self.report('      ' + ', '.join(filter(None, details)))
+            if progress:
+                progress(index + 1)
+        return time.monotonic() - started
+
+
+def migrate(connection, migrations, target=None, dry_run=False, **options):
+    """Apply the pending migrations up to ``target``; returns the versions applied"""
+    report = options.get('report', print)
+    cursor = connection.cursor(dictionary=True)
+    applied = applied_migrations(cursor, create=not dry_run)
+
+    for version, name, _, checksum in migrations:
+        row = applied.get(version)
+        if row and row['status'] == 'applied' and row['checksum'] != checksum:
+            report(f'Warning: {version}_{name}.sql changed after it was applied')
+
+    runner = Runner(connection, **options)
+    done = []
+    total_started = time.monotonic()
+    for version, name, path, checksum in migrations:
+        if target is not None and int(version) > int(target):
+            break
+        row = applied.get(version)
+        if row and row['status'] == 'applied':
+            continue
+        statements = split_statements(path.read_text(encoding='utf-8'))
+        first = 0
+        if row:
+            if row['checksum'] != checksum:
+                raise MigrationError(f'{path.name} changed after it was partly applied '
+                                     f'({row["statements_done"]} statements); fix the database by hand, '
+                                     f'then delete its schema_migrations row')
+            first = row['statements_done']
+
+        label = f'{version}_{name}'
+        if dry_run:
+            report(f'{label}: {len(statements) - first} statements')
+            for line, statement in statements[first:]:
+                variants = online_variants(statement) if options.get('online', True) else []
+                modes = ' [' + ' > '.join(mode for mode, _ in variants) + ']' if variants else ''
+                report(f'  line {line}: {summary(statement)}{modes}')
+            continue
+
+        report(f'{label}: ' + (f'resuming at statement {first + 1} of {len(statements)}' if first
+                               else f'{len(statements)} statements'))
+        cursor.execute("""
+            INSERT INTO schema_migrations (version, name, checksum, status, statements_done, statements_total, started_at)
+            VALUES (%s, %s, %s, 'applying', %s, %s, CURRENT_TIMESTAMP)
+            ON DUPLICATE KEY UPDATE statements_total = VALUES(statements_total)
+        """, (version, name, checksum, first, len(statements)))
+
+        def progress(count):
+            cursor.execute("UPDATE schema_migrations SET statements_done = %s WHERE version = %s", (count, version))
+
+        seconds = runner.run_statements(statements, first, progress)
+        cursor.execute("""
+            UPDATE schema_migrations
+            SET status = 'applied', execution_ms = execution_ms + %s, applied_at = CURRENT_TIMESTAMP
+            WHERE version = %s
+        """, (int(seconds * 1000), version))
+        report(f'{label}: applied in {seconds:.1f}s')
+        done.append(version)
+
+    if done:
+        report(f'Applied {len(done)} migration(s) in {time.monotonic() - total_started:.1f}s')
+    elif not dry_run:
+        report('Database is up to date')
+    cursor.close()
+    return done
+
+
+def baseline(connection, migrations, version, report=print):
+    """Record every migration up to ``version`` as applied without running it"""
+    cursor = connection.cursor(dictionary=True)
+    applied = applied_migrations(cursor)
+    for number, name, _, checksum in migrations:
+        if int(number) > int(version):
+            break
+        if number in applied:
+            continue
+        cursor.execute("""
+            INSERT INTO schema_migrations (version, name, checksum, status, applied_at)
+            VALUES (%s, %s, %s, 'applied', CURRENT_TIMESTAMP)
+        """, (number, name, checksum))
+        report(f'{number}_{name}: recorded as applied')
+    cursor.close()
+
+
+def print_status(connection, migrations):
+    cursor = connection.cursor(dictionary=True)
+    applied = applied_migrations(cursor, create=False)
+    cursor.close()
+    for version, name, _, checksum in migrations:
+        row = applied.get(version)
+        if row is None:
+            state = 'pending'
+        elif row['status'] == 'applying':
+            state = f"partly applied ({row['statements_done']} statements)"
+        else:
+            state = f"applied {row['applied_at']}" + (' (file changed since)' if row['checksum'] != checksum else '')
+        print(f'{version}_{name}: {state}')
+    for version in sorted(set(applied) - {m[0] for m in migrations}):
+        print(f"{version}_{applied[version]['name']}: applied, but its file is missing")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=str(MIGRATIONS_DIR), help='Directory of NNN_name.sql files')
+    parser.add_argument('--target', help='Apply migrations up to and including this version')
+    parser.add_argument('--status', action='store_true', help='List applied and pending migrations')
+    parser.add_argument('--dry-run', action='store_true', help='Print pending statements without running them')
+    parser.add_argument('--baseline', metavar='VERSION', help='Record migrations up to VERSION as applied')
+    parser.add_argument('--file', help='Run one SQL file (schema, seed) without recording it')
+    parser.add_argument('--offline', action='store_true', help='Run DDL as written, without ALGORITHM/LOCK')
+    parser.add_argument('--lock-wait-timeout', type=int, default=5,
+                        help='Seconds DDL waits for a metadata lock before retrying')
+    parser.add_argument('--retries', type=int, default=5, help='Retries after a metadata lock timeout')
+    args = parser.parse_args()
+
+    if args.file:
+        statements = split_statements(Path(args.file).read_text(encoding='utf-8'))
+        if args.dry_run:
+            for line, statement in statements:
+                print(f'line {line}: {summary(statement)}')
+            return
+
+    migrations = discover(args.dir)
+    connection = mysql.connector.connect(**DB_CONFIG, autocommit=True)
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (LOCK_NAME,))
+        if not cursor.fetchone()['locked']:
+            raise SystemExit('Another migration run holds the lock; try again when it finishes')
+        cursor.execute("SET SESSION lock_wait_timeout = %s", (args.lock_wait_timeout,))
+
+        options = {'retries': args.retries, 'online': not args.offline}
+        if args.file:
+            seconds = Runner(connection, **options).run_statements(statements)
+            print(f'{args.file}: {len(statements)} statements in {seconds:.1f}s')
+        elif args.status:
+            print_status(connection, migrations)
+        elif args.baseline:
+            baseline(connection, migrations, args.baseline)
+        else:
+            migrate(connection, migrations, args.target, args.dry_run, **options)
+    except MigrationError as e:
+        raise SystemExit(f'Migration failed: {e}')
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""In-process fan-out of new notifications to Server-Sent Events clients.
+
+Each open /api/notifications/stream connection holds a Subscription with a
+bounded event queue. A single watcher thread per process reads rows added to
+the notifications table since the last notification_id it saw (one indexed
+query per poll, however many clients are connected, and none at all while
+nobody is subscribed) and offers each row to its owner's subscriptions.
+Reading the table rather than hooking the writers also picks up notices sent
+by the overdue sweep, stored procedures and other app processes.
+
+An id can become visible after a higher one when its transaction commits
+later, so ids skipped over are re-checked for GAP_RETRY_SECONDS.
+
+A subscriber whose queue fills up (a stalled or very slow client) is closed
+rather than allowed to grow without bound or hold up the others; the stream
+tells the client to reconnect, and the reconnect replays what it missed from
+the table using Last-Event-ID.
+"""
+import threading
+import time
+from collections import deque
+
+GAP_RETRY_SECONDS = 30
+MAX_GAPS = 1000
+FETCH_LIMIT = 500
+
+NOTIFICATION_COLUMNS = "notification_id, user_id, title, message, type, fine, due_date, is_read, send_date"
+
+# Rows a reconnecting client may ask to have replayed after its Last-Event-ID
+MISSED_NOTIFICATIONS_QUERY = f"""
+    SELECT {NOTIFICATION_COLUMNS} FROM notifications
+    WHERE user_id = %s AND notification_id > %s
+    ORDER BY notification_id
+    LIMIT 100
+"""
+
+# Sent to a client whose queue overflowed; it reconnects and replays
+RESYNC = 'resync'
+
+
+def sse_message(event, data, event_id=None):
+    """One Server-Sent Events message; ``data`` is an already serialized string"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines += [f'data: {line}' for line in data.split('\n')]
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """Bounded queue of events for one connected client.
+
+    Threaded servers block in get(); an event loop passes ``wake`` (called
+    from the watcher thread) and collects events with drain().
+    """
+
+    def __init__(self, user_id, max_queued=100, wake=None):
+        self.user_id = user_id
+        self.max_queued = max_queued
+        self.wake = wake
+        self.closed = False
+        self.overflowed = False
+        self._events = deque()
+        self._cond = threading.Condition()
+
+    def offer(self, event):
+        """Queue an event without blocking; False if closed or just overflowed"""
+        with self._cond:
+            if self.closed:
+                return False
+            if len(self._events) >= self.max_queued:
+                self.overflowed = True
+                self.closed = True
+                accepted = False
+            else:
+                self._events.append(event)
+                accepted = True
+            self._cond.notify()
+        if self.wake:
+            self.wake()
+        return accepted
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+        if self.wake:
+            self.wake()
+
+    def get(self, timeout):
+        """Next event, or None after ``timeout`` seconds or once closed and empty"""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def drain(self):
+        """Every queued event, without waiting"""
+        with self._cond:
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+
+class NotificationHub:
+    """Routes new notification rows to the subscriptions of their users"""
+
+    def __init__(self, connect, poll_interval=1.0, queue_size=100, max_clients=1000):
+        self.connect = connect
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+
+        self._subscribers = {}  # user_id -> set of Subscription
+        self._count = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._last_id = None
+        self._gaps = {}  # notification_id -> time first skipped
+
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.polls = 0
+        self.errors = 0
+
+    def subscribe(self, user_id, wake=None):
+        """Register a client; returns None when max_clients are already connected"""
+        subscription = Subscription(user_id, self.queue_size, wake)
+        with self._lock:
+            if self._count >= self.max_clients:
+                self.rejected += 1
+                return None
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name='notification-hub', daemon=True)
+                self._watcher.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, row):
+        """Offer one notification row to every subscription of its user"""
+        with self._lock:
+            targets = list(self._subscribers.get(row['user_id'], ()))
+        event = ('due' if row.get('due_date') else 'notification', row['notification_id'], row)
+        for subscription in targets:
+            if subscription.offer(event):
+                self.published += 1
+            elif subscription.overflowed:
+                self.dropped += 1
+                self.unsubscribe(subscription)
+
+    def _watch(self):
+        """Poll for new rows until the last subscriber leaves"""
+        while True:
+            with self._lock:
+                if not self._count:
+                    # Start from the then-current id when clients come back
+                    self._watcher = None
+                    self._last_id = None
+                    self._gaps = {}
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                self.errors += 1
+                print(f"Notification hub poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def poll(self):
+        """Fetch rows added since the last poll and publish them"""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            if self._last_id is None:
+                # Only rows created after the first subscriber arrived are pushed
+                cursor.execute("SELECT COALESCE(MAX(notification_id), 0) AS last_id FROM notifications")
+                self._last_id = cursor.fetchone()['last_id']
+                rows = []
+            else:
+                now = time.monotonic()
+                self._gaps = {i: t for i, t in self._gaps.items() if now - t < GAP_RETRY_SECONDS}
+                sql = f"SELECT {NOTIFICATION_COLUMNS} FROM notifications WHERE notification_id > %s"
+                params = [self._last_id]
+                if self._gaps:
+                    sql += f" OR notification_id IN ({', '.join(['%s'] * len(self._gaps))})"
+                    params += list(self._gaps)
+                cursor.execute(sql + " ORDER BY notification_id LIMIT %s", params + [FETCH_LIMIT])
+                rows = cursor.fetchall()
+            cursor.close()
+            # Each poll starts a fresh snapshot
+            connection.commit()
+        finally:
+            connection.close()
+        self.polls += 1
+
+        now = time.monotonic()
+        for row in rows:
+            notification_id = row['notification_id']
+            if self._gaps.pop(notification_id, None) is None:
+                for missing in range(self._last_id + 1, notification_id):
+                    if len(self._gaps) >= MAX_GAPS:
+                        break
+                    self._gaps[missing] = now
+                self._last_id = max(self._last_id, notification_id)
+            self.publish(row)
+
+    def stats(self):
+        """Snapshot of hub counters"""
+        with self._lock:
+            clients = self._count
+            users = len(self._subscribers)
+        return {
+            'clients': clients,
+            'users': users,
+            'max_clients': self.max_clients,
+            'published': self.published,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'polls': self.polls,
+            'errors': self.errors,
+            'pending_gaps': len(self._gaps),
+        }
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Chunked overdue-loan sweep, replacing the SendOverdueNotifications procedure.
+
+The procedure ran as one statement over every overdue loan and de-duplicated
+with a LIKE over each user's notifications. This sweep walks overdue loans in
+(due_date, issue_id) order over idx_issues_status_due_date, one bounded chunk
+per transaction. Loans already notified today are skipped by a primary-key
+lookup in overdue_notices. The position is saved in job_checkpoints with
+every chunk, so an interrupted sweep resumes where it stopped.
+
+Loans stay 'issued': the return routes and the after_book_returned trigger
+only handle issued loans, and "overdue" is derived from the due date.
+
+    python overdue_sweeper.py [--chunk 500] [--force]
+"""
+import argparse
+import time
+
+from db_pool import inserted_ids
+
+JOB_NAME = 'overdue_sweep'
+LOCK_NAME = 'library_overdue_sweep'
+NOTICE_TITLE = 'Overdue Book Notice'
+FINE_PER_DAY = 1.00
+
+# Resume point used when there is no checkpoint for today
+START_CURSOR = ('1000-01-01', 0)
+
+
+def load_checkpoint(cursor, today, force=False):
+    """Return (cursor position, processed, notified, finished) for today's run"""
+    cursor.execute(
+        "SELECT run_date, cursor_due_date, cursor_issue_id, processed, notified, finished_at "
+        "FROM job_checkpoints WHERE job_name = %s FOR UPDATE",
+        (JOB_NAME,)
+    )
+    row = cursor.fetchone()
+    if row and row['run_date'] == today and not force:
+        position = (row['cursor_due_date'], row['cursor_issue_id']) if row['cursor_issue_id'] else START_CURSOR
+        return position, row['processed'], row['notified'], row['finished_at'] is not None
+
+    cursor.execute("""
+        INSERT INTO job_checkpoints (job_name, run_date, cursor_due_date, cursor_issue_id, processed, notified, started_at, finished_at)
+        VALUES (%s, %s, NULL, NULL, 0, 0, CURRENT_TIMESTAMP, NULL)
+        ON DUPLICATE KEY UPDATE
+            run_date = VALUES(run_date), cursor_due_date = NULL, cursor_issue_id = NULL,
+            processed = 0, notified = 0, started_at = CURRENT_TIMESTAMP, finished_at = NULL
+    """, (JOB_NAME, today))
+    return START_CURSOR, 0, 0, False
+
+
+def sweep_overdue(connection, chunk_size=500, force=False, refresh_users=None, report=print):
+    """Notify every overdue loan once for today, committing per chunk.
+
+    ``refresh_users(cursor, user_ids)`` is called inside each chunk's
+    transaction for the borrowers it touched (used to bring the per-user
+    overdue counters up to date). Returns a summary dict, or None when
+    another sweep holds the lock.
+    """
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (LOCK_NAME,))
+    if not cursor.fetchone()['locked']:
+        report('Another overdue sweep is running; skipping')
+        cursor.close()
+        return None
+
+    started = time.monotonic()
+    try:
+        cursor.execute("SELECT CURDATE() AS today, @@auto_increment_increment AS step")
+        row = cursor.fetchone()
+        today, id_step = row['today'], row['step']
+
+        (after_due, after_id), processed, notified, finished = load_checkpoint(cursor, today, force)
+        connection.commit()
+        if finished:
+            report(f'Overdue sweep for {today} already finished ({processed} loans, {notified} notices)')
+            return {'date': today.isoformat(), 'processed': processed, 'notified': notified,
+                    'chunks': 0, 'seconds': 0.0, 'resumed': False}
+        resumed = processed > 0
+        if resumed:
+            report(f'Resuming overdue sweep for {today} after issue {after_id} ({processed} loans done)')
+
+        chunks = 0
+        while True:
+            chunk_started = time.monotonic()
+            cursor.execute("""
+                SELECT i.issue_id, i.user_id, i.due_date, b.title,
+                       DATEDIFF(%s, i.due_date) AS days_overdue
+                FROM issues i
+                JOIN books b ON b.book_id = i.book_id
+                WHERE i.status = 'issued' AND i.due_date < %s
+                  AND (i.due_date > %s OR (i.due_date = %s AND i.issue_id > %s))
+                ORDER BY i.due_date, i.issue_id
+                LIMIT %s
+            """, (today, today, after_due, after_due, after_id, chunk_size))
+            loans = cursor.fetchall()
+            if not loans:
+                break
+
+            placeholders = ', '.join(['%s'] * len(loans))
+            cursor.execute(
+                f"SELECT issue_id FROM overdue_notices WHERE notice_date = %s AND issue_id IN ({placeholders})",
+                [today] + [loan['issue_id'] for loan in loans]
+            )
+            already = {r['issue_id'] for r in cursor.fetchall()}
+            pending = [loan for loan in loans if loan['issue_id'] not in already]
+
+            if pending:
+                cursor.execute(
+                    "INSERT INTO notifications (user_id, title, message, type, fine, due_date) VALUES "
+                    + ', '.join(["(%s, %s, %s, 'error', %s, %s)"] * len(pending)),
+                    [v for loan in pending for v in (
+                        loan['user_id'],
+                        NOTICE_TITLE,
+                        f'Your book "{loan["title"]}" is overdue. Please return it immediately to avoid additional fines.',
+                        loan['days_overdue'] * FINE_PER_DAY,
+                        loan['due_date']
+                    )]
+                )
+                notification_ids = inserted_ids(cursor, len(pending), id_step)
+                cursor.execute(
+                    "INSERT INTO overdue_notices (issue_id, notice_date, notification_id) VALUES "
+                    + ', '.join(['(%s, %s, %s)'] * len(pending)),
+                    [v for loan, notification_id in zip(pending, notification_ids)
+                     for v in (loan['issue_id'], today, notification_id)]
+                )
+
+            if refresh_users:
+                refresh_users(cursor, sorted({loan['user_id'] for loan in loans}))
+
+            after_due, after_id = loans[-1]['due_date'], loans[-1]['issue_id']
+            processed += len(loans)
+            notified += len(pending)
+            cursor.execute("""
+                UPDATE job_checkpoints
+                SET cursor_due_date = %s, cursor_issue_id = %s, processed = %s, notified = %s
+                WHERE job_name = %s
+            """, (after_due, after_id, processed, notified, JOB_NAME))
+            connection.commit()
+
+            chunks += 1
+            elapsed = time.monotonic() - started
+            report(f'chunk {chunks}: {len(loans)} loans, {len(pending)} notices in '
+                   f'{(time.monotonic() - chunk_started) * 1000:.0f} ms; total {processed} loans, '
+                   f'{notified} notices, {processed / elapsed:.0f} loans/s')
+
+            if len(loans) < chunk_size:
+                break
+
+        cursor.execute("UPDATE job_checkpoints SET finished_at = CURRENT_TIMESTAMP WHERE job_name = %s", (JOB_NAME,))
+        connection.commit()
+
+        seconds = round(time.monotonic() - started, 3)
+        report(f'Overdue sweep for {today} finished: {processed} loans, {notified} notices, '
+               f'{chunks} chunks in {seconds:.1f}s')
+        return {'date': today.isoformat(), 'processed': processed, 'notified': notified,
+                'chunks': chunks, 'seconds': seconds, 'resumed': resumed}
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunk', type=int, default=500, help='Loans per transaction')
+    parser.add_argument('--force', action='store_true', help="Restart today's sweep from the beginning")
+    args = parser.parse_args()
+
+    import mysql.connector
+    from db_config import DB_CONFIG
+    from loan_stats import refresh_user_overdue
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        sweep_overdue(connection, args.chunk, args.force, refresh_users=refresh_user_overdue)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt costs a few hundred milliseconds of CPU per call. Running it on a
+small dedicated pool caps how many cores logins can take at once, so cheap
+routes stay responsive during a login burst. Requests beyond the queue
+bound are rejected straight away instead of piling up.
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from bcrypt import hashpw, gensalt, checkpw
+
+_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+# bcrypt cost factor for new hashes
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+
+class PasswordHasherUnavailable(Exception):
+    """Raised when hashing is saturated or a hash did not finish in time"""
+
+
+class PasswordHasher:
+    """Run bcrypt on ``workers`` threads with at most ``queue_size`` waiting.
+
+    ``observer(operation, queue_wait, run_seconds)``, when given, is called on
+    the worker thread after each hash or check.
+    """
+
+    def __init__(self, rounds=12, workers=None, queue_size=64, timeout=5.0, observer=None):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 2
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.observer = observer
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._in_flight = 0
+        self._running = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    def _run(self, operation, fn):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherUnavailable('Too many password checks in progress, try again shortly')
+
+        queued_at = time.monotonic()
+        with self._lock:
+            self._submitted += 1
+            self._in_flight += 1
+
+        def task():
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+                wait = started - queued_at
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            try:
+                return fn()
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self._running -= 1
+                    self._in_flight -= 1
+                    self._completed += 1
+                    self._run_total += elapsed
+                    self._run_max = max(self._run_max, elapsed)
+                self._slots.release()
+                if self.observer is not None:
+                    self.observer(operation, wait, elapsed)
+
+        future = self._executor.submit(task)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            if future.cancel():
+                # Never started, so task() will not release its slot
+                with self._lock:
+                    self._in_flight -= 1
+                self._slots.release()
+            with self._lock:
+                self._timeouts += 1
+            raise PasswordHasherUnavailable('Password check timed out, try again shortly')
+
+    def hash(self, password):
+        """bcrypt-hash a password with the configured cost factor"""
+        return self._run(
+            'hash',
+            lambda: hashpw(password.encode('utf-8'), gensalt(rounds=self.rounds)).decode('utf-8')
+        )
+
+    def check(self, password, hashed):
+        """Verify a password against a stored bcrypt hash"""
+        return self._run('check', lambda: checkpw(password.encode('utf-8'), hashed.encode('utf-8')))
+
+    def needs_rehash(self, hashed):
+        """True when a stored hash was made with a different cost factor"""
+        match = _COST_RE.match(hashed or '')
+        return not match or int(match.group(1)) != self.rounds
+
+    def stats(self):
+        """Snapshot of executor counters"""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'rounds': self.rounds,
+                'in_flight': self._in_flight,
+                'running': self._running,
+                'queued': self._in_flight - self._running,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'queue_wait_avg_ms': round(self._wait_total / started * 1000, 3) if started else 0,
+                'queue_wait_max_ms': round(self._wait_max * 1000, 3),
+                'run_avg_ms': round(self._run_total / self._completed * 1000, 3) if self._completed else 0,
+                'run_max_ms': round(self._run_max * 1000, 3),
+            }
@@ -3,6 +3,8 @@ import mysql.connector
 from mysql.connector import Error
 from pathlib import Path
 
+from migrate import split_statements
+
 DB_CONFIG = {
     'host': 'localhost',
     'database': 'library_management_system',
@@ -31,9 +33,8 @@ def run_seed():
     try:
         conn = mysql.connector.connect(**DB_CONFIG)
         cur = conn.cursor()
-        # Execute statements one-by-one (no DELIMITER used in seed file)
-        statements = [s.strip() for s in sql_text.split(';') if s.strip()]
-        for stmt in statements:
+        # Execute statements one-by-one; ';' inside quoted values does not split them
+        for _, stmt in split_statements(sql_text):
             cur.execute(stmt)
         conn.commit()
         cur.close()
@@ -0,0 +1,314 @@
+"""Slow-query log with one EXPLAIN per statement fingerprint.
+
+SlowQueryLog.record() is called after every statement (see the observer of
+db_pool.ConnectionPool) and returns at once when the statement was faster
+than the threshold. Slow statements are normalized (literals and %s
+placeholders become ?, IN lists and multi-row VALUES collapse to one item),
+hashed into a fingerprint, and:
+
+* appended to a JSON-lines log with the parameter shape (types, never
+  values), the duration, rows and the route that ran them;
+* aggregated per fingerprint in memory for GET /api/admin/slow-queries;
+* the first time a fingerprint is seen, explained on a separate connection
+  by a background thread, so the request that was slow is not held up.
+
+    python slow_queries.py slow_queries.log [--top 20] [--json]
+
+aggregates a log file, across processes and restarts, into a report.
+"""
+import argparse
+import datetime
+import decimal
+import hashlib
+import json
+import queue
+import re
+import threading
+
+_COMMENTS = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s')
+_IN_LISTS = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_VALUES_ROWS = re.compile(r'(\(\s*[?\w\'"]+(?:\s*,\s*[?\w\'"]+)*\s*\))(?:\s*,\s*\([^()]*\))+')
+_SPACES = re.compile(r'\s+')
+
+# Only statements MySQL can EXPLAIN without running them
+_EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+def normalize_sql(statement):
+    """Statement text with literals and parameters replaced, for grouping"""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    sql = _COMMENTS.sub(' ', statement)
+    sql = _STRINGS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _SPACES.sub(' ', sql).strip()
+    sql = _IN_LISTS.sub('IN (...)', sql)
+    sql = _VALUES_ROWS.sub(r'\1, ...', sql)
+    return sql
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def param_shape(params):
+    """Types of the parameters, e.g. "int, str, NoneType" or "500 rows x (int, str)" """
+    if params is None:
+        return ''
+    if isinstance(params, dict):
+        return ', '.join(f'{k}: {type(v).__name__}' for k, v in params.items())
+    params = list(params)
+    if params and isinstance(params[0], (list, tuple)):
+        # executemany: one tuple per row
+        return f"{len(params)} rows x ({param_shape(params[0])})"
+    if len(params) > 10:
+        counts = {}
+        for value in params:
+            name = type(value).__name__
+            counts[name] = counts.get(name, 0) + 1
+        return ', '.join(f'{count} x {name}' for name, count in counts.items())
+    return ', '.join(type(value).__name__ for value in params)
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds')
+
+
+def _plain(value):
+    """JSON-safe form of an EXPLAIN cell"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+class SlowQueryLog:
+    """Record statements slower than ``threshold_ms`` and explain each shape once.
+
+    ``connect`` returns a connection for running EXPLAIN (None disables it).
+    Entries go to ``log_path`` as JSON lines when given, else to ``logger``.
+    """
+
+    def __init__(self, threshold_ms=200, connect=None, log_path=None, logger=None, max_fingerprints=1000):
+        self.threshold = threshold_ms / 1000.0
+        self.connect = connect
+        self.log_path = log_path
+        self.logger = logger
+        self.max_fingerprints = max_fingerprints
+
+        self._stats = {}  # fingerprint -> aggregate dict
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._explain_queue = queue.Queue(maxsize=100)
+        self._explainer = None
+        self.explain_failures = 0
+
+    @property
+    def enabled(self):
+        return self.threshold >= 0
+
+    def record(self, statement, params, seconds, rows=None, context=None):
+        """Log a statement if it was slow; cheap no-op otherwise.
+
+        ``seconds`` should include reading the result and ``rows`` is the
+        number of rows read or affected (None when unknown).
+        """
+        if seconds < self.threshold or not self.enabled:
+            return
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        shape = param_shape(params)
+
+        explain = False
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    # Forget the least costly shape to make room
+                    cheapest = min(self._stats, key=lambda k: self._stats[k]['total_ms'])
+                    del self._stats[cheapest]
+                stats = self._stats[key] = {
+                    'fingerprint': key,
+                    'sql': normalized,
+                    'param_shape': shape,
+                    'contexts': [],
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'rows_total': 0,
+                    'rows_max': 0,
+                    'first_seen': _now(),
+                    'last_seen': None,
+                    'explain': None,
+                }
+                explain = True
+            ms = seconds * 1000
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['last_seen'] = _now()
+            if rows is not None:
+                stats['rows_total'] += rows
+                stats['rows_max'] = max(stats['rows_max'], rows)
+            if context and context not in stats['contexts'] and len(stats['contexts']) < 10:
+                stats['contexts'].append(context)
+
+        self._write({
+            'ts': _now(),
+            'fingerprint': key,
+            'sql': normalized,
+            'param_shape': shape,
+            'ms': round(seconds * 1000, 3),
+            'rows': rows,
+            'context': context,
+        })
+        if explain:
+            self._queue_explain(key, normalized, statement, params)
+
+    def _write(self, entry):
+        line = json.dumps(entry, default=str)
+        if self.log_path:
+            with self._file_lock:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+        elif self.logger is not None:
+            self.logger.warning('slow query %s', line)
+
+    def _queue_explain(self, key, normalized, statement, params):
+        if self.connect is None or not normalized.upper().startswith(_EXPLAINABLE):
+            return
+        if isinstance(params, list) and params and isinstance(params[0], (list, tuple)):
+            # executemany batches have no single statement to explain
+            return
+        try:
+            self._explain_queue.put_nowait((key, statement, params))
+        except queue.Full:
+            return
+        with self._lock:
+            if self._explainer is None:
+                self._explainer = threading.Thread(target=self._explain_loop, name='slow-query-explain', daemon=True)
+                self._explainer.start()
+
+    def _explain_loop(self):
+        while True:
+            key, statement, params = self._explain_queue.get()
+            try:
+                plan = self.explain(statement, params)
+            except Exception as e:
+                self.explain_failures += 1
+                plan = {'error': str(e)}
+            with self._lock:
+                if key in self._stats:
+                    self._stats[key]['explain'] = plan
+            self._write({'ts': _now(), 'fingerprint': key, 'explain': plan})
+
+    def explain(self, statement, params):
+        """EXPLAIN rows for a statement, run on a connection of its own"""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute('EXPLAIN ' + statement, params or ())
+            plan = [{k: _plain(v) for k, v in row.items()} for row in cursor.fetchall()]
+            cursor.close()
+            connection.rollback()
+            return plan
+        finally:
+            connection.close()
+
+    def report(self, top=None):
+        """Aggregates per fingerprint, most total time first"""
+        with self._lock:
+            entries = [dict(stats, contexts=list(stats['contexts'])) for stats in self._stats.values()]
+        return summarize(entries, top)
+
+
+def summarize(entries, top=None):
+    entries.sort(key=lambda e: e['total_ms'], reverse=True)
+    for entry in entries:
+        entry['total_ms'] = round(entry['total_ms'], 3)
+        entry['max_ms'] = round(entry['max_ms'], 3)
+        entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 3) if entry['count'] else 0
+    return entries[:top] if top else entries
+
+
+def aggregate_log(path):
+    """Fold a JSON-lines slow-query log into per-fingerprint aggregates"""
+    stats = {}
+    plans = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            key = entry.get('fingerprint')
+            if 'explain' in entry:
+                plans.setdefault(key, entry['explain'])
+                continue
+            agg = stats.setdefault(key, {
+                'fingerprint': key, 'sql': entry['sql'], 'param_shape': entry.get('param_shape'),
+                'contexts': [], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'rows_total': 0, 'rows_max': 0, 'first_seen': entry['ts'], 'last_seen': None, 'explain': None,
+            })
+            agg['count'] += 1
+            agg['total_ms'] += entry['ms']
+            agg['max_ms'] = max(agg['max_ms'], entry['ms'])
+            agg['last_seen'] = entry['ts']
+            if entry.get('rows') is not None:
+                agg['rows_total'] += entry['rows']
+                agg['rows_max'] = max(agg['rows_max'], entry['rows'])
+            context = entry.get('context')
+            if context and context not in agg['contexts']:
+                agg['contexts'].append(context)
+    for key, plan in plans.items():
+        if key in stats:
+            stats[key]['explain'] = plan
+    return list(stats.values())
+
+
+def format_plan(plan):
+    if not isinstance(plan, list):
+        return f"    EXPLAIN failed: {plan.get('error') if isinstance(plan, dict) else plan}"
+    lines = []
+    for row in plan:
+        lines.append(f"    {row.get('table') or '-'}: type={row.get('type')} key={row.get('key')} "
+                     f"rows={row.get('rows')} filtered={row.get('filtered')} extra={row.get('Extra')}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a slow-query log by statement fingerprint')
+    parser.add_argument('log', help='JSON-lines file written with SLOW_QUERY_LOG')
+    parser.add_argument('--top', type=int, default=20, help='Fingerprints to show, by total time')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = summarize(aggregate_log(args.log), args.top)
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+        return
+    if not report:
+        print('No slow queries recorded')
+        return
+    for entry in report:
+        print(f"{entry['fingerprint']}  {entry['count']} x, total {entry['total_ms']:.0f} ms, "
+              f"avg {entry['avg_ms']:.1f} ms, max {entry['max_ms']:.1f} ms, rows max {entry['rows_max']}")
+        print(f"    {entry['sql'][:300]}")
+        if entry['param_shape']:
+            print(f"    params: {entry['param_shape']}")
+        if entry['contexts']:
+            print(f"    from: {', '.join(entry['contexts'])}")
+        if entry['explain'] is not None:
+            print(format_plan(entry['explain']))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Delete a book that is out on loan, then its borrower, and check the counters.
+
+Requires the Flask app on localhost:5000, the admin account used by
+test_all_functions.py and the database from DB_CONFIG.
+"""
+
+import json
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import mysql.connector
+from mysql.connector import Error
+
+BASE_URL = 'http://localhost:5000/api'
+ADMIN_EMAIL = 'admin@libraryms.com'
+ADMIN_PASSWORD = 'password'
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'library_management_system',
+    'user': 'root',
+    'password': 'Gautam@012',
+    'port': 3306
+}
+
+def call(method, endpoint, data=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    req = urllib.request.Request(f'{BASE_URL}{endpoint}', data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode('utf-8') or '{}')
+
+def dashboard_counts(cur):
+    cur.execute("SELECT active_issues, overdue_books, total_fines FROM dashboard_stats WHERE stat_id = 1")
+    return cur.fetchone()
+
+def main():
+    suffix = datetime.now().strftime('%Y%m%d%H%M%S')
+    conn = None
+    book_ids = []
+    user_id = None
+    failures = []
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG, autocommit=True)
+        cur = conn.cursor(dictionary=True)
+
+        status, body = call('POST', '/auth/admin/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'Admin login failed: {status} {body}')
+        admin_token = body['token']
+
+        status, body = call('POST', '/auth/register', {
+            'name': 'Cascade Test User',
+            'email': f'cascade.{suffix}@example.com',
+            'password': 'password123'
+        })
+        if status != 201:
+            raise RuntimeError(f'Registration failed: {status} {body}')
+        user_token, user_id = body['token'], body['user_id']
+
+        for title in ('Cascade Test On Loan', 'Cascade Test Returned Late'):
+            cur.execute(
+                "INSERT INTO books (title, price, stock, available_stock, is_active) VALUES (%s, 0, 1, 1, TRUE)",
+                (f'{title} {suffix}',)
+            )
+            book_ids.append(cur.lastrowid)
+        before = dashboard_counts(cur)
+
+        # One open loan on the book that is deleted, one returned loan with a fine
+        for book_id in book_ids:
+            status, body = call('POST', '/issues', {'book_id': book_id}, user_token)
+            if status != 201:
+                raise RuntimeError(f'Issue failed: {status} {body}')
+            last_issue_id = body['issue_id']
+        status, body = call('PUT', f'/issues/{last_issue_id}/return', token=user_token)
+        if status != 200:
+            raise RuntimeError(f'Return failed: {status} {body}')
+        cur.execute("UPDATE issues SET fine = 3.00 WHERE issue_id = %s", (last_issue_id,))
+
+        status, body = call('DELETE', f'/admin/books/{book_ids[0]}', token=admin_token)
+        if status != 200:
+            failures.append(f'Deleting the book on loan returned {status} {body}')
+        book_ids.pop(0)
+
+        cur.execute("SELECT current_loans, overdue_loans FROM user_loan_stats WHERE user_id = %s", (user_id,))
+        counters = cur.fetchone()
+        print('Loan counters after deleting the book:', counters)
+        if counters['current_loans'] != 0:
+            failures.append(f"current_loans is {counters['current_loans']}, expected 0")
+
+        status, body = call('DELETE', f'/admin/users/{user_id}', token=admin_token)
+        print('Deleting the borrower:', status, body.get('message'))
+        if status != 200:
+            failures.append(f'Deleting the borrower returned {status} {body}')
+        else:
+            user_id = None
+
+        after = dashboard_counts(cur)
+        print('Dashboard before:', before, 'after:', after)
+        for field in ('active_issues', 'overdue_books', 'total_fines'):
+            if after[field] != before[field]:
+                failures.append(f'dashboard_stats.{field} {before[field]} -> {after[field]}')
+
+        if failures:
+            for failure in failures:
+                print('❌', failure)
+        else:
+            print('✅ Loan counters and dashboard_stats stayed exact through both deletes.')
+
+    except Error as e:
+        print('❌ MySQL Error:', e)
+    except Exception as e:
+        print('❌ Error:', e)
+    finally:
+        if conn is not None and conn.is_connected():
+            cur = conn.cursor()
+            if user_id:
+                cur.execute("DELETE FROM issues WHERE user_id = %s", (user_id,))
+                cur.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
+            for book_id in book_ids:
+                cur.execute("DELETE FROM issues WHERE book_id = %s", (book_id,))
+                cur.execute("DELETE FROM books WHERE book_id = %s", (book_id,))
+            cur.close()
+            conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Hammer POST /api/issues for a single-copy book and check it is issued once.
+
+Requires the Flask app on localhost:5000 and the database from DB_CONFIG.
+"""
+
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import mysql.connector
+from mysql.connector import Error
+
+BASE_URL = 'http://localhost:5000/api'
+CONCURRENCY = 20
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'library_management_system',
+    'user': 'root',
+    'password': 'Gautam@012',
+    'port': 3306
+}
+
+def post(endpoint, data, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    req = urllib.request.Request(f'{BASE_URL}{endpoint}', data=json.dumps(data).encode('utf-8'), headers=headers)
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode('utf-8') or '{}')
+
+def main():
+    suffix = datetime.now().strftime('%Y%m%d%H%M%S')
+    conn = None
+    book_id = None
+    user_ids = []
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO books (title, price, stock, available_stock, is_active) VALUES (%s, 0, 1, 1, TRUE)",
+            (f'Concurrency Test {suffix}',)
+        )
+        book_id = cur.lastrowid
+        conn.commit()
+        print(f'Created single-copy book {book_id}')
+
+        tokens = []
+        for i in range(CONCURRENCY):
+            status, body = post('/auth/register', {
+                'name': f'Concurrency User {i}',
+                'email': f'concurrency.{suffix}.{i}@example.com',
+                'password': 'password123'
+            })
+            if status != 201:
+                raise RuntimeError(f'Registration failed: {status} {body}')
+            tokens.append(body['token'])
+            user_ids.append(body['user_id'])
+
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+            results = list(pool.map(lambda t: post('/issues', {'book_id': book_id}, t), tokens))
+
+        issued = sum(1 for status, _ in results if status == 201)
+        rejected = sum(1 for status, _ in results if status == 400)
+        cur.execute("SELECT available_stock FROM books WHERE book_id = %s", (book_id,))
+        available = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM issues WHERE book_id = %s AND status = 'issued'", (book_id,))
+        open_loans = cur.fetchone()[0]
+
+        print('Results:', {'issued': issued, 'rejected': rejected, 'available_stock': available, 'open_loans': open_loans})
+        if issued == 1 and open_loans == 1 and available == 0:
+            print('✅ Single copy issued exactly once.')
+        else:
+            print('❌ Oversold or inconsistent stock!')
+
+    except Error as e:
+        print('❌ MySQL Error:', e)
+    except Exception as e:
+        print('❌ Error:', e)
+    finally:
+        if conn is not None and conn.is_connected():
+            cur = conn.cursor()
+            if user_ids:
+                cur.execute(
+                    f"DELETE FROM users WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})",
+                    user_ids
+                )
+            if book_id:
+                cur.execute("DELETE FROM books WHERE book_id = %s", (book_id,))
+            conn.commit()
+            cur.close()
+            conn.close()
+
+if __name__ == '__main__':
+    main()
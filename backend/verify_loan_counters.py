@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Rebuild user_loan_stats from the issues table and report any drift.
+
+Walks users in user_id ranges of --chunk rows, one transaction per range, so
+counters are only locked briefly. With --dry-run the recount is rolled back
+and only reported. Run it after bulk data changes or writes made outside the
+app (rows removed by ON DELETE CASCADE do not fire triggers), or periodically
+from cron.
+"""
+
+import argparse
+import time
+
+import mysql.connector
+from mysql.connector import Error
+
+from db_config import DB_CONFIG
+from loan_stats import rebuild_user_loan_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chunk', type=int, default=1000, help='Users per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    checked = 0
+    drifted = 0
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cur = conn.cursor(dictionary=True)
+
+        cur.execute("SELECT MIN(user_id) AS first_id, MAX(user_id) AS last_id, COUNT(*) AS users FROM users")
+        bounds = cur.fetchone()
+        conn.commit()
+        if not bounds['users']:
+            print('No users found')
+            return
+
+        first_id = bounds['first_id']
+        while first_id <= bounds['last_id']:
+            last_id = first_id + args.chunk - 1
+            for user_id, stored, actual in rebuild_user_loan_stats(cur, first_id, last_id):
+                drifted += 1
+                if stored is None:
+                    print(f'user {user_id}: counter row missing')
+                    continue
+                diffs = ', '.join(
+                    f'{field} {stored[field]} -> {actual[field]}'
+                    for field in stored if stored[field] != actual[field]
+                )
+                print(f'user {user_id}: {diffs}')
+            if args.dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+            checked = min(last_id, bounds['last_id']) - bounds['first_id'] + 1
+            print(f'... user_id {first_id}-{min(last_id, bounds["last_id"])} '
+                  f'({checked} ids, {time.monotonic() - started:.1f}s)')
+            first_id = last_id + 1
+
+        cur.close()
+        conn.close()
+    except Error as e:
+        print('MySQL Error:', e)
+        raise SystemExit(1)
+
+    action = 'found' if args.dry_run else 'repaired'
+    print(f'Checked {bounds["users"]} users in {time.monotonic() - started:.1f}s; {action} {drifted} drifted counters')
+    if args.dry_run and drifted:
+        raise SystemExit(2)
+
+
+if __name__ == '__main__':
+    main()
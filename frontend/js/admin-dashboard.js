@@ -768,21 +768,43 @@ function getMockLoansData() {
 
 // User management functions
 let usersData = [];
+let usersFilters = {};
+let usersNextCursor = null;
+let usersLoadingMore = false;
 
-// Load users from database
-async function loadUsersData() {
+// Load the first page of users from database
+async function loadUsersData(filters = usersFilters) {
+    usersFilters = filters;
     try {
-        const response = await window.apiService.getUsers();
+        const response = await window.apiService.getUsers(usersFilters);
         usersData = response.users || [];
+        usersNextCursor = response.next_cursor || null;
         updateUsersTable();
     } catch (error) {
         console.error('Error loading users:', error);
         // Fallback to empty array if API fails
         usersData = [];
+        usersNextCursor = null;
         updateUsersTable();
     }
 }
 
+// Append the next page when the users table is scrolled to the bottom
+async function loadMoreUsers() {
+    if (!usersNextCursor || usersLoadingMore) return;
+    usersLoadingMore = true;
+    try {
+        const response = await window.apiService.getUsers({ ...usersFilters, after: usersNextCursor });
+        usersData = usersData.concat(response.users || []);
+        usersNextCursor = response.next_cursor || null;
+        updateUsersTable();
+    } catch (error) {
+        console.error('Error loading more users:', error);
+    } finally {
+        usersLoadingMore = false;
+    }
+}
+
 function showAddUserModal() {
     document.getElementById('userModalTitle').textContent = 'Add New User';
     document.getElementById('userSubmitBtn').textContent = 'Add User';
@@ -916,14 +938,21 @@ document.addEventListener('DOMContentLoaded', function() {
     // Add search functionality for users
     const userSearch = document.getElementById('userSearch');
     if (userSearch) {
+        // Name/email prefix search runs on the server, debounced
+        let searchTimer = null;
         userSearch.addEventListener('input', function(e) {
-            const searchTerm = e.target.value.toLowerCase();
-            const tableRows = document.querySelectorAll('#usersTableBody tr');
-            
-            tableRows.forEach(row => {
-                const text = row.textContent.toLowerCase();
-                row.style.display = text.includes(searchTerm) ? '' : 'none';
-            });
+            const searchTerm = e.target.value.trim();
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => loadUsersData({ ...usersFilters, q: searchTerm }), 300);
+        });
+    }
+    
+    const usersTable = document.querySelector('#manageUsersModal .users-table');
+    if (usersTable) {
+        usersTable.addEventListener('scroll', function() {
+            if (usersTable.scrollTop + usersTable.clientHeight >= usersTable.scrollHeight - 50) {
+                loadMoreUsers();
+            }
         });
     }
     
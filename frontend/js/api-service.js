@@ -110,14 +110,28 @@ class APIService {
     }
 
     // Book Methods
-    async getBooks() {
-        return await this.makeRequest('/books');
+    async getBooks(params = {}) {
+        const query = new URLSearchParams();
+        if (params.after) query.set('after', params.after);
+        if (params.limit) query.set('limit', params.limit);
+        if (params.featured) query.set('featured', '1');
+        if (params.category) query.set('category', params.category);
+        const qs = query.toString();
+        return await this.makeRequest(qs ? `/books?${qs}` : '/books');
     }
 
     async getBook(bookId) {
         return await this.makeRequest(`/books/${bookId}`);
     }
 
+    // Many books in one request: { books: [...in request order], missing: [ids] }
+    async getBooksByIds(bookIds) {
+        return await this.makeRequest('/books/batch', {
+            method: 'POST',
+            body: JSON.stringify({ ids: bookIds })
+        });
+    }
+
     async searchBooks(query) {
         return await this.makeRequest(`/books/search?q=${encodeURIComponent(query)}`);
     }
@@ -168,13 +182,36 @@ class APIService {
         });
     }
 
-    async getBookFeedback(bookId) {
-        return await this.makeRequest(`/feedback/book/${bookId}`);
+    async getBookFeedback(bookId, params = {}) {
+        const query = new URLSearchParams();
+        ['after', 'limit', 'sort'].forEach(key => {
+            if (params[key]) query.set(key, params[key]);
+        });
+        const qs = query.toString();
+        return await this.makeRequest(qs ? `/feedback/book/${bookId}?${qs}` : `/feedback/book/${bookId}`);
     }
 
     // Notification Methods
-    async getUserNotifications(userId) {
-        return await this.makeRequest(`/notifications/user/${userId}`);
+    async getUserNotifications(userId, params = {}) {
+        const query = new URLSearchParams();
+        ['after', 'limit'].forEach(key => {
+            if (params[key]) query.set(key, params[key]);
+        });
+        const qs = query.toString();
+        return await this.makeRequest(qs ? `/notifications/user/${userId}?${qs}` : `/notifications/user/${userId}`);
+    }
+
+    async getUnreadNotificationCount(userId) {
+        return await this.makeRequest(`/notifications/user/${userId}/unread-count`);
+    }
+
+    // EventSource cannot send headers, so a short-lived stream-only token goes
+    // in the query string instead of the login token
+    async notificationStreamURL(lastEventId) {
+        const data = await this.makeRequest('/notifications/stream-token', { method: 'POST' });
+        const query = new URLSearchParams({ token: data.token });
+        if (lastEventId) query.set('last_event_id', lastEventId);
+        return `${this.baseURL}/notifications/stream?${query}`;
     }
 
     async markNotificationRead(notificationId) {
@@ -207,8 +244,13 @@ class APIService {
     }
 
     // --- User Management (Admin) ---
-    async getUsers() {
-        return await this.makeRequest('/admin/users');
+    async getUsers(params = {}) {
+        const query = new URLSearchParams();
+        ['after', 'limit', 'sort', 'order', 'status', 'role', 'overdue', 'q'].forEach(key => {
+            if (params[key]) query.set(key, params[key]);
+        });
+        const qs = query.toString();
+        return await this.makeRequest(qs ? `/admin/users?${qs}` : '/admin/users');
     }
 
     async getUser(userId) {
@@ -114,6 +114,7 @@ const fallbackBooks = [
 let allBooks = [];
 let currentBooks = [];
 let currentPage = 1;
+let nextCursor = null;
 const booksPerPage = 6;
 
 document.addEventListener('DOMContentLoaded', function() {
@@ -138,29 +139,35 @@ async function loadHeroStats() {
     }
 }
 
+function mapApiBook(row) {
+    return {
+        id: row.book_id,
+        title: row.title,
+        author: (row.authors || row.author || ''),
+        category: 'general',
+        year: row.publication_date ? new Date(row.publication_date).getFullYear() : (row.year || ''),
+        publisher: row.publishers || '',
+        price: Number(row.price || 0).toFixed(2),
+        stock: (row.available_copies ?? row.available_stock ?? row.stock ?? 0),
+        rating: Number(row.average_rating || 0),
+        reviews: Number(row.total_reviews || 0),
+        downloads: 0,
+        readTime: '-',
+        image: row.cover_image || 'https://images.unsplash.com/photo-1512820790803-83ca734da794?auto=format&fit=crop&w=400&q=80',
+        preview_url: row.digital_copy_url || '',
+        description: row.description || '',
+        badge: row.is_featured ? 'Featured' : (row.is_digital ? 'Digital' : 'Book'),
+        status: ((row.is_available === true) || ((row.available_copies ?? row.available_stock ?? 0) > 0)) ? 'available' : 'borrowed'
+    };
+}
+
 async function loadBooksFromApi() {
+    nextCursor = null;
     try {
         const data = await window.apiService.getBooks();
         const rows = Array.isArray(data.books) ? data.books : [];
-    allBooks = rows.map(row => ({
-            id: row.book_id,
-            title: row.title,
-        author: (row.authors || row.author || ''),
-            category: 'general',
-            year: row.publication_date ? new Date(row.publication_date).getFullYear() : (row.year || ''),
-            publisher: row.publishers || '',
-            price: Number(row.price || 0).toFixed(2),
-            stock: (row.available_copies ?? row.available_stock ?? row.stock ?? 0),
-            rating: Number(row.average_rating || 0),
-            reviews: Number(row.total_reviews || 0),
-            downloads: 0,
-            readTime: '-',
-            image: row.cover_image || 'https://images.unsplash.com/photo-1512820790803-83ca734da794?auto=format&fit=crop&w=400&q=80',
-            preview_url: row.digital_copy_url || '',
-            description: row.description || '',
-            badge: row.is_featured ? 'Featured' : (row.is_digital ? 'Digital' : 'Book'),
-            status: ((row.is_available === true) || ((row.available_copies ?? row.available_stock ?? 0) > 0)) ? 'available' : 'borrowed'
-        }));
+        allBooks = rows.map(mapApiBook);
+        nextCursor = data.next_cursor || null;
     } catch (e) {
         console.warn('Falling back to mock books data', e);
         allBooks = [...fallbackBooks];
@@ -171,6 +178,23 @@ async function loadBooksFromApi() {
     updateLoadMoreButton();
 }
 
+// Fetch the next catalog page only when the reader asks for more books
+async function fetchNextBooksPage() {
+    if (!nextCursor) return;
+    try {
+        const data = await window.apiService.getBooks({ after: nextCursor });
+        const books = (Array.isArray(data.books) ? data.books : []).map(mapApiBook);
+        allBooks.push(...books);
+        currentBooks.push(...books.filter(matchesFilters));
+        // The new page may belong anywhere in the chosen order, not at the end
+        const filters = getFilterValues();
+        if (filters) sortBooks(currentBooks, filters.sortBy);
+        nextCursor = data.next_cursor || null;
+    } catch (e) {
+        console.warn('Failed to load the next catalog page', e);
+    }
+}
+
 function initializePage() {}
 
 function setupEventListeners() {
@@ -284,64 +308,93 @@ function handleFilter() {
     filterBooks();
 }
 
-function filterBooks() {
+function getFilterValues() {
     const searchInput = document.getElementById('searchInput');
     const categoryFilter = document.getElementById('categoryFilter');
     const sortFilter = document.getElementById('sortFilter');
     const availabilityFilter = document.getElementById('availabilityFilter');
     
-    if (!searchInput || !categoryFilter || !sortFilter || !availabilityFilter) return;
-    
-    const searchTerm = searchInput.value.toLowerCase();
-    const category = categoryFilter.value;
-    const sortBy = sortFilter.value;
-    const availability = availabilityFilter.value;
-    
-    let filteredBooks = [...allBooks];
-    
-    if (searchTerm) {
-        filteredBooks = filteredBooks.filter(book => 
-            book.title.toLowerCase().includes(searchTerm) ||
-            book.author.toLowerCase().includes(searchTerm) ||
-            book.category.toLowerCase().includes(searchTerm)
-        );
-    }
+    if (!searchInput || !categoryFilter || !sortFilter || !availabilityFilter) return null;
     
-    if (category !== 'all') {
-        filteredBooks = filteredBooks.filter(book => book.category === category);
-    }
-    
-    if (availability !== 'all') {
-        filteredBooks = filteredBooks.filter(book => book.status === availability);
+    return {
+        searchTerm: searchInput.value.toLowerCase(),
+        category: categoryFilter.value,
+        sortBy: sortFilter.value,
+        availability: availabilityFilter.value
+    };
+}
+
+function matchesFilters(book) {
+    const filters = getFilterValues();
+    if (!filters) return true;
+    const { searchTerm, category, availability } = filters;
+    
+    if (searchTerm && !(
+        book.title.toLowerCase().includes(searchTerm) ||
+        book.author.toLowerCase().includes(searchTerm) ||
+        book.category.toLowerCase().includes(searchTerm)
+    )) {
+        return false;
     }
-    
+    if (category !== 'all' && book.category !== category) return false;
+    if (availability !== 'all' && book.status !== availability) return false;
+    return true;
+}
+
+function sortBooks(books, sortBy) {
     switch (sortBy) {
         case 'title':
-            filteredBooks.sort((a, b) => a.title.localeCompare(b.title));
+            books.sort((a, b) => a.title.localeCompare(b.title));
             break;
         case 'author':
-            filteredBooks.sort((a, b) => a.author.localeCompare(b.author));
+            books.sort((a, b) => a.author.localeCompare(b.author));
             break;
         case 'rating':
-            filteredBooks.sort((a, b) => b.rating - a.rating);
+            books.sort((a, b) => b.rating - a.rating);
             break;
         case 'newest':
-            filteredBooks.sort((a, b) => b.year - a.year);
+            books.sort((a, b) => b.year - a.year);
             break;
         case 'popular':
-            filteredBooks.sort((a, b) => b.downloads - a.downloads);
+            books.sort((a, b) => b.downloads - a.downloads);
             break;
     }
+    return books;
+}
+
+function filterBooks() {
+    const filters = getFilterValues();
+    if (!filters) return;
     
-    currentBooks = filteredBooks;
+    currentBooks = sortBooks(allBooks.filter(matchesFilters), filters.sortBy);
     currentPage = 1;
     displayBooks(currentBooks.slice(0, booksPerPage));
     updateLoadMoreButton();
 }
 
-function loadMoreBooks() {
+async function loadMoreBooks() {
     const startIndex = currentPage * booksPerPage;
     const endIndex = startIndex + booksPerPage;
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    
+    // Only go to the server once the books already fetched run out
+    if (endIndex > currentBooks.length && nextCursor) {
+        if (loadMoreBtn) {
+            loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i><span>Loading...</span>';
+            loadMoreBtn.disabled = true;
+        }
+        await fetchNextBooksPage();
+        if (loadMoreBtn) {
+            loadMoreBtn.innerHTML = '<i class="fas fa-plus"></i><span>Load More Books</span>';
+            loadMoreBtn.disabled = false;
+        }
+        // Re-sorting may have moved new books among the ones already shown
+        displayBooks(currentBooks.slice(0, endIndex));
+        currentPage++;
+        updateLoadMoreButton();
+        return;
+    }
+    
     const moreBooks = currentBooks.slice(startIndex, endIndex);
     
     if (moreBooks.length > 0) {
@@ -349,7 +402,6 @@ function loadMoreBooks() {
         if (!booksGrid) return;
         
         // Add loading animation to button
-        const loadMoreBtn = document.getElementById('loadMoreBtn');
         if (loadMoreBtn) {
             loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i><span>Loading...</span>';
             loadMoreBtn.disabled = true;
@@ -372,6 +424,8 @@ function loadMoreBooks() {
             currentPage++;
             updateLoadMoreButton();
         }, 500);
+    } else {
+        updateLoadMoreButton();
     }
 }
 
@@ -382,7 +436,7 @@ function updateLoadMoreButton() {
     const totalBooks = currentBooks.length;
     const displayedBooks = currentPage * booksPerPage;
     
-    if (displayedBooks >= totalBooks) {
+    if (displayedBooks >= totalBooks && !nextCursor) {
         loadMoreBtn.style.display = 'none';
     } else {
         loadMoreBtn.style.display = 'inline-flex';
@@ -2,6 +2,9 @@
 
 let currentUser = null;
 let userIssues = [];
+// Books on the user's issues that are not in cachedBooks, by book_id
+let issueBooks = new Map();
+const ISSUE_BOOKS_BATCH = 300;
 let userNotifications = [];
 
 // Initialize dashboard
@@ -37,6 +40,8 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Initial counts update placeholder
     updateNotificationBadges(0);
+    // New notifications are pushed by the server instead of polled
+    openNotificationStream();
     // Try to preload books quietly for the Books section
     try { loadBooks(); } catch (_) {}
 });
@@ -99,6 +104,10 @@ async function loadUserIssues() {
         renderMyBooks();
         renderHistory();
         renderRecentActivity();
+        if (await loadIssueBooks()) {
+            renderMyBooks();
+            renderHistory();
+        }
     } catch (error) {
         console.error('Error loading issues:', error);
         // Show fallback data
@@ -108,6 +117,29 @@ async function loadUserIssues() {
     }
 }
 
+// Fetch details of borrowed books outside the loaded catalog page in one
+// batch request per ISSUE_BOOKS_BATCH ids; returns whether any were added
+async function loadIssueBooks() {
+    const ids = [...new Set(userIssues.map(i => i.book_id))]
+        .filter(id => !issueBooks.has(id) && !(cachedBooks || []).some(b => b.book_id === id));
+    let added = false;
+    for (let start = 0; start < ids.length; start += ISSUE_BOOKS_BATCH) {
+        try {
+            const data = await window.apiService.getBooksByIds(ids.slice(start, start + ISSUE_BOOKS_BATCH));
+            (data.books || []).forEach(b => issueBooks.set(b.book_id, b));
+            added = added || (data.books || []).length > 0;
+        } catch (e) {
+            console.warn('Failed to load borrowed book details', e);
+            break;
+        }
+    }
+    return added;
+}
+
+function findBook(bookId) {
+    return (cachedBooks || []).find(b => b.book_id === bookId) || issueBooks.get(bookId) || null;
+}
+
 // Display user's issues
 function displayUserIssues() {
     const issuesList = document.getElementById('issuesList');
@@ -155,30 +187,15 @@ function displayUserIssues() {
     }).join('');
 }
 
-// Load user notifications
+// Load the unread badge count; the list itself is fetched when the modal opens
 async function loadUserNotifications() {
     try {
-        const response = await window.apiService.makeRequest(`/notifications/user/${currentUser.user_id}`);
-        
-        if (response.ok) {
-            const data = await response.json();
-            userNotifications = data.notifications || [];
-            updateNotificationBadges(userNotifications.filter(n => !n.is_read).length);
-        } else {
-            throw new Error('Failed to load notifications');
-        }
+        const data = await window.apiService.getUnreadNotificationCount(currentUser.user_id);
+        notificationsUnreadCount = data.unread_count || 0;
+        updateNotificationBadges(notificationsUnreadCount);
     } catch (error) {
         console.error('Error loading notifications:', error);
-        // Show sample notifications
-        userNotifications = [
-            {
-                notification_id: 1,
-                message: 'Welcome to your library dashboard!',
-                send_date: new Date().toISOString(),
-                is_read: false
-            }
-        ];
-        updateNotificationBadges(1);
+        updateNotificationBadges(0);
     }
 }
 
@@ -252,12 +269,23 @@ async function returnBook(issueId) {
 
 // Notifications: state, rendering, and actions
 let notificationsFilterState = 'all'; // all | unread | due | fines
+let notificationsNextCursor = null;
+let notificationsUnreadCount = 0;
+
+function setUnreadCount(count) {
+    notificationsUnreadCount = Math.max(count || 0, 0);
+    updateNotificationBadges(notificationsUnreadCount);
+}
 
 async function refreshNotifications() {
     try {
-        const data = await window.apiService.getUserNotifications(currentUser.user_id);
+        const [data, counts] = await Promise.all([
+            window.apiService.getUserNotifications(currentUser.user_id),
+            window.apiService.getUnreadNotificationCount(currentUser.user_id)
+        ]);
         userNotifications = Array.isArray(data.notifications) ? data.notifications : [];
-        updateNotificationBadges(userNotifications.filter(n => !n.is_read).length);
+        notificationsNextCursor = data.next_cursor || null;
+        setUnreadCount(counts.unread_count);
         renderNotifications();
     } catch (e) {
         console.error('Failed to refresh notifications', e);
@@ -265,6 +293,71 @@ async function refreshNotifications() {
     }
 }
 
+// Live notifications over Server-Sent Events. EventSource reconnects by itself
+// (sending Last-Event-ID, so missed notifications are replayed by the server)
+// until its short-lived stream token runs out; then a new token is fetched and
+// the stream reopened from the last event id seen.
+let notificationStream = null;
+let notificationStreamOpening = false;
+let notificationStreamLastId = null;
+
+async function openNotificationStream() {
+    if (!window.EventSource || !window.apiService || !window.apiService.token) return;
+    if (notificationStream || notificationStreamOpening) return;
+    notificationStreamOpening = true;
+    let url;
+    try {
+        url = await window.apiService.notificationStreamURL(notificationStreamLastId);
+    } catch (e) {
+        console.error('Failed to open notification stream', e);
+        return;
+    } finally {
+        notificationStreamOpening = false;
+    }
+    const stream = notificationStream = new EventSource(url);
+    const onNotification = (event) => {
+        if (event.lastEventId) notificationStreamLastId = event.lastEventId;
+        let n;
+        try { n = JSON.parse(event.data); } catch (_) { return; }
+        if (userNotifications.some(x => x.notification_id === n.notification_id)) return;
+        userNotifications = [n, ...userNotifications];
+        if (!n.is_read) setUnreadCount(notificationsUnreadCount + 1);
+        if (event.type === 'due') showNotification(n.message || 'A book is due', 'warning');
+        const modal = document.getElementById('notificationsModal');
+        if (modal && modal.style.display === 'block') renderNotifications();
+    };
+    stream.addEventListener('notification', onNotification);
+    stream.addEventListener('due', onNotification);
+    // The server dropped events for this client; reload the list from the API
+    stream.addEventListener('resync', refreshNotifications);
+    // The login token ran out; stop until the user signs in again
+    stream.addEventListener('expired', closeNotificationStream);
+    stream.addEventListener('error', () => {
+        // A reconnect refused with the expired stream token closes the stream
+        if (stream.readyState === EventSource.CLOSED && notificationStream === stream) {
+            notificationStream = null;
+            setTimeout(openNotificationStream, 5000);
+        }
+    });
+}
+
+function closeNotificationStream() {
+    if (notificationStream) {
+        notificationStream.close();
+        notificationStream = null;
+    }
+}
+
+async function loadMoreNotifications() {
+    if (!notificationsNextCursor) return;
+    try {
+        const data = await window.apiService.getUserNotifications(currentUser.user_id, { after: notificationsNextCursor });
+        userNotifications = userNotifications.concat(Array.isArray(data.notifications) ? data.notifications : []);
+        notificationsNextCursor = data.next_cursor || null;
+        renderNotifications();
+    } catch (e) { adminToast('Failed to load more notifications', 'error'); }
+}
+
 function setNotificationsFilter(filter) {
     notificationsFilterState = filter || 'all';
     renderNotifications();
@@ -276,7 +369,7 @@ function renderNotifications() {
     if (!modal || !modalBody) return;
 
     // Controls header
-    const unreadCount = userNotifications.filter(n => !n.is_read).length;
+    const unreadCount = notificationsUnreadCount;
     const headerHtml = `
         <div style="display:flex;align-items:center;justify-content:space-between;margin-bottom:12px">
             <div style="display:flex;gap:8px">
@@ -329,7 +422,13 @@ function renderNotifications() {
         </div>
     `;
 
-    modalBody.innerHTML = headerHtml + listHtml;
+    const moreHtml = notificationsNextCursor ? `
+        <div style="text-align:center;margin-top:8px">
+            <button class="btn-secondary" onclick="loadMoreNotifications()">Load older notifications</button>
+        </div>
+    ` : '';
+
+    modalBody.innerHTML = headerHtml + listHtml + moreHtml;
 }
 
 // Show notifications modal (fetch fresh first)
@@ -342,10 +441,10 @@ async function showNotifications() {
 
 async function markNotificationRead(notificationId) {
     try {
-        await window.apiService.markNotificationRead(notificationId);
+        const result = await window.apiService.markNotificationRead(notificationId);
         // Update local state
         userNotifications = userNotifications.map(n => n.notification_id === notificationId ? { ...n, is_read: true } : n);
-        updateNotificationBadges(userNotifications.filter(n => !n.is_read).length);
+        setUnreadCount(result.unread_count);
         renderNotifications();
     } catch (e) { adminToast('Failed to mark read', 'error'); }
 }
@@ -354,16 +453,16 @@ async function markAllNotificationsRead() {
     try {
         await window.apiService.markAllNotificationsRead(currentUser.user_id);
         userNotifications = userNotifications.map(n => ({ ...n, is_read: true }));
-        updateNotificationBadges(0);
+        setUnreadCount(0);
         renderNotifications();
     } catch (e) { adminToast('Failed to mark all as read', 'error'); }
 }
 
 async function deleteNotification(notificationId) {
     try {
-        await window.apiService.deleteNotification(notificationId);
+        const result = await window.apiService.deleteNotification(notificationId);
         userNotifications = userNotifications.filter(n => n.notification_id !== notificationId);
-        updateNotificationBadges(userNotifications.filter(n => !n.is_read).length);
+        setUnreadCount(result.unread_count);
         renderNotifications();
     } catch (e) { adminToast('Failed to delete', 'error'); }
 }
@@ -372,7 +471,8 @@ async function clearAllNotifications() {
     try {
         await window.apiService.clearAllNotifications(currentUser.user_id);
         userNotifications = [];
-        updateNotificationBadges(0);
+        notificationsNextCursor = null;
+        setUnreadCount(0);
         renderNotifications();
     } catch (e) { adminToast('Failed to clear', 'error'); }
 }
@@ -549,30 +649,62 @@ function showQuickActions() {
 
 // ----------------- Books rendering -----------------
 let cachedBooks = [];
+let booksNextCursor = null;
 let booksFilterCategory = 'all';
 let booksSortKey = 'title';
+
+// Normalize and enrich with availability and rough category guess
+function normalizeDashboardBook(b) {
+    const available = b.is_available === true || (b.available_copies ?? 0) > 0 || (b.available_stock ?? 0) > 0;
+    const copies = (b.available_copies ?? b.available_stock ?? 0) || 0;
+    const text = `${b.title||''} ${b.description||''}`.toLowerCase();
+    let category = 'general';
+    if (/ai|tech|technology|software|program|computer/.test(text)) category = 'technology';
+    else if (/history|guide|biography|non[- ]fiction|science|learn|how to/.test(text)) category = 'non-fiction';
+    else category = 'fiction';
+    return { ...b, __available: available, __copies: copies, __category: category };
+}
+
+// GET /api/books returns one page at a time; filters and sort apply to the
+// pages loaded so far, and Load More Books fetches the next one
 async function loadBooks() {
     const grid = document.getElementById('booksGrid');
     if (!grid) return;
     try {
         const data = await window.apiService.getBooks();
         const rows = Array.isArray(data.books) ? data.books : [];
-        // Normalize and enrich with availability and rough category guess
-        cachedBooks = rows.map(b => {
-            const available = b.is_available === true || (b.available_copies ?? 0) > 0 || (b.available_stock ?? 0) > 0;
-            const copies = (b.available_copies ?? b.available_stock ?? 0) || 0;
-            const text = `${b.title||''} ${b.description||''}`.toLowerCase();
-            let category = 'general';
-            if (/ai|tech|technology|software|program|computer/.test(text)) category = 'technology';
-            else if (/history|guide|biography|non[- ]fiction|science|learn|how to/.test(text)) category = 'non-fiction';
-            else category = 'fiction';
-            return { ...b, __available: available, __copies: copies, __category: category };
-        });
+        cachedBooks = rows.map(normalizeDashboardBook);
+        booksNextCursor = data.next_cursor || null;
         renderBooks(applyBookFilters(cachedBooks));
     } catch (e) {
         console.error('Failed to load books', e);
         grid.innerHTML = '<p>Failed to load books.</p>';
     }
+    updateBooksLoadMore();
+}
+
+async function loadMoreBooks() {
+    if (!booksNextCursor) return;
+    const btn = document.querySelector('.load-more-section .load-more-btn');
+    if (btn) btn.disabled = true;
+    try {
+        const data = await window.apiService.getBooks({ after: booksNextCursor });
+        const rows = Array.isArray(data.books) ? data.books : [];
+        cachedBooks.push(...rows.map(normalizeDashboardBook));
+        booksNextCursor = data.next_cursor || null;
+        renderBooks(applyBookFilters(cachedBooks));
+    } catch (e) {
+        console.error('Failed to load more books', e);
+        showNotification('Failed to load more books', 'error');
+    } finally {
+        if (btn) btn.disabled = false;
+        updateBooksLoadMore();
+    }
+}
+
+function updateBooksLoadMore() {
+    const section = document.querySelector('.load-more-section');
+    if (section) section.style.display = booksNextCursor ? '' : 'none';
 }
 
 function renderBooks(books) {
@@ -663,8 +795,7 @@ function renderMyBooks() {
     if (!grid) return;
     const issues = Array.isArray(userIssues) ? userIssues : [];
     const withBookMeta = issues.map(i => {
-        const b = (cachedBooks || []).find(x => x.book_id === i.book_id) || {};
-        return { issue: i, book: b };
+        return { issue: i, book: findBook(i.book_id) || {} };
     });
     if (countEl) countEl.textContent = `${withBookMeta.length} total`;
     if (!withBookMeta.length) {
@@ -756,8 +887,10 @@ function renderHistory() {
             return (a.title || '').localeCompare(b.title || '');
         }
         if (sortKey === 'rating') {
-            // rating not tracked; fall back to title to keep deterministic
-            return (a.rating || 0) - (b.rating || 0) || (a.title || '').localeCompare(b.title || '');
+            // Highest rated book first, by title among equal ratings
+            const ratingA = Number(findBook(a.book_id)?.average_rating || 0);
+            const ratingB = Number(findBook(b.book_id)?.average_rating || 0);
+            return ratingB - ratingA || (a.title || '').localeCompare(b.title || '');
         }
         // Choose the most relevant date for comparisons
         const dateA = new Date(a.return_date || a.issue_date || 0);
@@ -863,10 +996,10 @@ async function borrowBookFromDashboard(bookId) {
 function previewBookFromDashboard(urlOrId) {
     const modal = document.getElementById('previewModal');
     if (!modal) return;
-    // Find the book in cachedBooks by id if a number was passed
+    // Find the book in cachedBooks or issueBooks by id if a number was passed
     let book = null;
     if (typeof urlOrId === 'number') {
-        book = (cachedBooks || []).find(b => b.book_id === urlOrId) || null;
+        book = findBook(urlOrId);
     }
     const titleEl = document.getElementById('pvTitle');
     const titleTextEl = document.getElementById('pvTitleText');
@@ -919,6 +1052,7 @@ function getCurrentUser() {
 }
 
 function logout() {
+    closeNotificationStream();
     localStorage.removeItem('userToken');
     localStorage.removeItem('userData');
     localStorage.removeItem('adminToken');
@@ -31,16 +31,21 @@ class HomepageAPI {
         }
     }
 
-    // Get all books
-    async getBooks() {
-        return this.makeRequest('/books');
+    // Get one page of books; { limit, featured, category } filter on the server
+    async getBooks(params = {}) {
+        const query = new URLSearchParams();
+        if (params.limit) query.set('limit', params.limit);
+        if (params.featured) query.set('featured', '1');
+        if (params.category) query.set('category', params.category);
+        const qs = query.toString();
+        return this.makeRequest(qs ? `/books?${qs}` : '/books');
     }
 
     // Get featured books (books with is_featured = 1)
     async getFeaturedBooks() {
         try {
-            const data = await this.getBooks();
-            return data.books.filter(book => book.is_featured === 1).slice(0, 6);
+            const data = await this.getBooks({ featured: true, limit: 6 });
+            return data.books;
         } catch (error) {
             console.error('Failed to fetch featured books:', error);
             return [];
@@ -67,7 +72,8 @@ class HomepageAPI {
     // Get book feedback/reviews for testimonials
     async getBookFeedback(bookId) {
         try {
-            const data = await this.makeRequest(`/feedback/book/${bookId}`);
+            // Only the newest few are shown, so fetch a short page
+            const data = await this.makeRequest(`/feedback/book/${bookId}?limit=3`);
             return data.feedbacks || [];
         } catch (error) {
             console.error('Failed to fetch book feedback:', error);
@@ -78,7 +84,7 @@ class HomepageAPI {
     // Get recent book feedback for testimonials
     async getRecentFeedback() {
         try {
-            const booksData = await this.getBooks();
+            const booksData = await this.getBooks({ limit: 3 });
             const allFeedback = [];
             
             // Get feedback from first few books
@@ -101,13 +107,11 @@ class HomepageAPI {
         }
     }
 
-    // Get books by category
-    async getBooksByCategory(category) {
+    // Get the first `limit` books of a category (category names as in the categories table)
+    async getBooksByCategory(category, limit = 6) {
         try {
-            const data = await this.getBooks();
-            if (category === 'all') return data.books;
+            if (category === 'all') return (await this.getBooks({ limit })).books;
             
-            // Map categories to book properties
             const categoryMap = {
                 'fiction': 'Fiction',
                 'non-fiction': 'Non-Fiction', 
@@ -117,10 +121,8 @@ class HomepageAPI {
                 'biography': 'Biography'
             };
             
-            return data.books.filter(book => 
-                book.description && 
-                book.description.toLowerCase().includes(categoryMap[category]?.toLowerCase() || category.toLowerCase())
-            );
+            const data = await this.getBooks({ category: categoryMap[category] || category, limit });
+            return data.books;
         } catch (error) {
             console.error('Failed to fetch books by category:', error);
             return [];
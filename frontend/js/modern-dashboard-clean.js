@@ -6,6 +6,8 @@ class ModernDashboard {
         this.userNotifications = [];
         this.activityData = [];
         this.favorites = new Set();
+        this.books = [];
+        this.booksNextCursor = null;
         this.isInitialized = false;
         
         this.init();
@@ -54,26 +56,13 @@ class ModernDashboard {
                 </div>
             `;
 
-            // Fetch books from API
+            // Fetch the first page of books; loadMoreBooks() fetches the next on request
             const response = await window.apiService.getBooks();
-            const books = response.books.map(book => ({
-                id: book.book_id,
-                title: book.title,
-                author: book.authors,
-                category: 'fiction', // Default category
-                available: book.is_available,
-                image: 'https://images.unsplash.com/photo-1544947950-fa07a98d237f?ixlib=rb-4.0.3&auto=format&fit=crop&w=400&q=80',
-                rating: 4.0, // Default rating
-                reviewCount: 0, // Default reviews
-                downloads: Math.floor(Math.random() * 10000) + 1000,
-                readTime: '6h',
-                badge: book.is_available ? 'Available' : 'Out of Stock',
-                description: `A ${book.year} book by ${book.authors}`,
-                stock: book.stock,
-                available_copies: book.available_copies
-            }));
+            this.books = response.books.map(book => this.mapBook(book));
+            this.booksNextCursor = response.next_cursor || null;
 
-            this.renderBooks(books);
+            this.renderBooks(this.books);
+            this.setupLoadMoreBooks();
         } catch (error) {
             console.error('Error loading books:', error);
             // Fallback to mock data if API fails
@@ -112,6 +101,51 @@ class ModernDashboard {
         }
     }
 
+    mapBook(book) {
+        return {
+            id: book.book_id,
+            title: book.title,
+            author: book.authors,
+            category: 'fiction', // Default category
+            available: book.is_available,
+            image: 'https://images.unsplash.com/photo-1544947950-fa07a98d237f?ixlib=rb-4.0.3&auto=format&fit=crop&w=400&q=80',
+            rating: 4.0, // Default rating
+            reviewCount: 0, // Default reviews
+            downloads: Math.floor(Math.random() * 10000) + 1000,
+            readTime: '6h',
+            badge: book.is_available ? 'Available' : 'Out of Stock',
+            description: `A ${book.year} book by ${book.authors}`,
+            stock: book.stock,
+            available_copies: book.available_copies
+        };
+    }
+
+    setupLoadMoreBooks() {
+        const loadMoreBtn = document.querySelector('.load-more-btn');
+        if (!loadMoreBtn) return;
+        if (!loadMoreBtn.dataset.bound) {
+            loadMoreBtn.dataset.bound = '1';
+            loadMoreBtn.addEventListener('click', () => this.loadMoreBooks());
+        }
+        loadMoreBtn.style.display = this.booksNextCursor ? '' : 'none';
+    }
+
+    async loadMoreBooks() {
+        if (!this.booksNextCursor) return;
+        try {
+            const response = await window.apiService.getBooks({ after: this.booksNextCursor });
+            this.books.push(...response.books.map(book => this.mapBook(book)));
+            this.booksNextCursor = response.next_cursor || null;
+            this.renderBooks(this.books);
+            // Keep the active category filter on the newly rendered cards
+            const active = document.querySelector('.filter-btn.active');
+            if (active) this.filterBooks(active.dataset.category);
+        } catch (error) {
+            console.error('Error loading more books:', error);
+        }
+        this.setupLoadMoreBooks();
+    }
+
     renderBooks(books) {
         const booksGrid = document.getElementById('booksGrid');
         if (!booksGrid) return;